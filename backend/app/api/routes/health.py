@@ -1,6 +1,11 @@
 from fastapi import APIRouter
+from typing import Dict, Any
 from app.models.response import HealthResponse
 from app.config import settings
+from app.core.llm.client import llm_client
+from app.core.llm.router import model_router
+from app.core.sql.repair import sql_repairer
+from app.utils.metrics import metrics
 from datetime import datetime
 
 router = APIRouter(prefix="/health", tags=["Health"])
@@ -20,3 +25,21 @@ async def health_check():
         version=settings.APP_VERSION,
         timestamp=datetime.now()
     )
+
+
+@router.get(
+    "/metrics",
+    response_model=Dict[str, Any],
+    summary="Performance metrics"
+)
+async def get_metrics():
+    """
+    Return in-process performance counters and latency histograms.
+    """
+    snapshot = metrics.snapshot()
+    snapshot["sql_repair"] = sql_repairer.get_stats()
+    snapshot["llm_usage"] = llm_client.get_usage_stats()
+    snapshot["llm_models"] = llm_client.models.get_stats()
+    snapshot["llm_hedging"] = llm_client.hedging.get_stats()
+    snapshot["model_router"] = model_router.get_stats()
+    return snapshot
@@ -1,18 +1,21 @@
 from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import StreamingResponse
-import asyncio
+import csv
+import io
 import json
 
-from app.models.request import TextToSQLRequest, QueryExecutionRequest
+from app.models.request import TextToSQLRequest, QueryExecutionRequest, QueryStreamRequest
 from app.models.response import (
     TextToSQLResponse,
+    ExplanationResponse,
     QueryExecutionResponse,
     ErrorResponse,
 )
 from app.services.query_service import query_service
 from app.services.cache_service import cache_service
+from app.services.request_coalescer import request_coalescer
 from app.utils.logger import logger
-from app.utils.exceptions import Text2SQLException
+from app.utils.exceptions import Text2SQLException, ExplanationNotFoundException
 
 router = APIRouter(prefix="/query", tags=["Query"])
 
@@ -31,21 +34,25 @@ async def text_to_sql(request: TextToSQLRequest):
         logger.info(f"Received text-to-SQL request: {request.query}")
 
         
+        # Shared by Redis and the coalescer, so it covers every response-shaping option
         cache_key = cache_service.generate_query_key(
             query=request.query,
             database_name=request.database_name,
+            options=request.dict(exclude={"query", "database_name"}),
         )
 
-        cached_result = cache_service.get(cache_key)
+        cached_result = await cache_service.aget(cache_key)
         if cached_result:
             logger.info("Returning cached result")
             return TextToSQLResponse(**cached_result)
 
-        
-        response = await query_service.text_to_sql(request)
+        async def generate_and_cache() -> TextToSQLResponse:
+            result = await query_service.text_to_sql(request)
+            await cache_service.aset(cache_key, result.dict())
+            return result
 
-        
-        cache_service.set(cache_key, response.dict())
+        # Identical concurrent requests share a single generation pipeline.
+        response = await request_coalescer.run(cache_key, generate_and_cache)
 
         return response
 
@@ -64,6 +71,41 @@ async def text_to_sql(request: TextToSQLRequest):
         )
 
 
+@router.get(
+    "/text-to-sql/{explanation_id}/explanation",
+    response_model=ExplanationResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Get the explanation for a generated SQL query",
+)
+async def get_explanation(explanation_id: str):
+    """
+    Explain a query returned by text-to-sql. Generated on first request,
+    then served from cache.
+    """
+    try:
+        return await query_service.get_explanation(explanation_id)
+
+    except ExplanationNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+
+    except Text2SQLException as e:
+        logger.error(f"Explanation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
+        )
+
+
 @router.post(
     "/text-to-sql/stream",
     summary="Convert natural language to SQL with streaming explanation",
@@ -76,30 +118,26 @@ async def text_to_sql_stream(request: TextToSQLRequest):
     try:
         logger.info(f"Streaming text-to-SQL for: {request.query}")
 
-        response = await query_service.text_to_sql(request)
+        events = query_service.text_to_sql_stream(request)
+
+        # Wait for the validated SQL before committing to a 200 response so
+        # generation failures still map to proper HTTP status codes.
+        first_event = await events.__anext__()
 
         def sse_event(event: str, data: dict) -> str:
             return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
         async def event_generator():
-            
-            yield sse_event(
-                "sql",
-                {
-                    "sql_query": response.sql_query,
-                    "confidence": response.confidence,
-                    "tables_used": response.tables_used,
-                },
-            )
-
-            
-            if request.include_explanation and response.explanation:
-                words = response.explanation.split()
-                for word in words:
-                    yield sse_event("explanation", {"chunk": word + " "})
-                    await asyncio.sleep(0.03)
-
-            yield sse_event("done", {})
+            yield sse_event(*first_event)
+
+            try:
+                async for event, data in events:
+                    yield sse_event(event, data)
+            except Exception as e:
+                logger.error(f"Streaming interrupted: {str(e)}")
+                detail = str(e) if isinstance(e, Text2SQLException) else "Internal server error"
+                yield sse_event("error", {"detail": detail})
+                yield sse_event("done", {})
 
         return StreamingResponse(
             event_generator(),
@@ -113,7 +151,7 @@ async def text_to_sql_stream(request: TextToSQLRequest):
         async def error_gen():
             error_data = json.dumps({"detail": error_detail})
             yield "event: error\ndata: " + error_data + "\n\n"
-            yield "event: done\n\n"
+            yield "event: done\ndata: {}\n\n"
 
         return StreamingResponse(
             error_gen(),
@@ -128,7 +166,7 @@ async def text_to_sql_stream(request: TextToSQLRequest):
         async def error_gen():
             error_data = json.dumps({"detail": error_detail})
             yield "event: error\ndata: " + error_data + "\n\n"
-            yield "event: done\n\n"
+            yield "event: done\ndata: {}\n\n"
 
         return StreamingResponse(
             error_gen(),
@@ -150,13 +188,66 @@ async def execute_query(request: QueryExecutionRequest):
     try:
         logger.info(f"Executing query for database: {request.database_name}")
 
+        response = await query_service.execute_query(request)
+
+        return response
+
+    except Text2SQLException as e:
+        logger.error(f"Query execution error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
         raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="Query execution requires database connection configuration",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error",
         )
 
+
+@router.post(
+    "/execute/stream",
+    summary="Execute SQL query and stream rows",
+)
+async def execute_query_stream(request: QueryStreamRequest):
+    """
+    Execute a SQL query and stream rows as NDJSON or CSV chunks.
+    Rows are read from a server-side cursor, so memory stays flat
+    regardless of the result size.
+    """
+    try:
+        logger.info(f"Streaming query for database: {request.database_name}")
+
+        columns, batches = await query_service.stream_query(request)
+
+        async def ndjson_chunks():
+            async for batch in batches:
+                yield "".join(
+                    json.dumps(dict(zip(columns, row)), default=str) + "\n"
+                    for row in batch
+                )
+
+        async def csv_chunks():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+            async for batch in batches:
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(batch)
+                yield buffer.getvalue()
+
+        if request.format == "csv":
+            return StreamingResponse(csv_chunks(), media_type="text/csv")
+
+        return StreamingResponse(ndjson_chunks(), media_type="application/x-ndjson")
+
     except Text2SQLException as e:
-        logger.error(f"Query execution error: {str(e)}")
+        logger.error(f"Query streaming error: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
@@ -1,36 +1,38 @@
 from fastapi import APIRouter, HTTPException, status
 from typing import List, Dict, Any
 from app.models.request import SchemaIndexRequest
-from app.models.response import SchemaIndexResponse
+from app.models.response import SchemaJobResponse
 from app.services.schema_service import schema_service
+from app.services.job_service import indexing_job_service
 from app.utils.logger import logger
-from app.utils.exceptions import Text2SQLException
+from app.utils.exceptions import Text2SQLException, JobConflictException, JobNotFoundException
 
 router = APIRouter(prefix="/schema", tags=["Schema"])
 
 @router.post(
     "/index",
-    response_model=SchemaIndexResponse,
-    status_code=status.HTTP_201_CREATED,
+    response_model=SchemaJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
     summary="Index database schema"
 )
 async def index_schema(request: SchemaIndexRequest):
     """
-    Index a database schema into the vector store.
+    Submit a background job that indexes a database schema into the vector store.
+    Poll **GET /schema/jobs/{job_id}** for progress. Returns 409 while
+    another job for the same database is queued or running.
     - **connection_string**: Database connection string
     - **database_name**: Name of the database
     - **description**: Optional description of the database
     """
     try:
         logger.info(f"Indexing schema for database: {request.database_name}")
-        response = await schema_service.index_schema(request)
+        job = indexing_job_service.submit(request)
 
-        return response
+        return job
     
-    except Text2SQLException as e:
-        logger.error(f"Schema indexing error: {str(e)}")
+    except JobConflictException as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_409_CONFLICT,
             detail=str(e)
         )
     
@@ -42,6 +44,58 @@ async def index_schema(request: SchemaIndexRequest):
         )
 
 
+@router.get(
+    "/jobs",
+    response_model=List[SchemaJobResponse],
+    summary="List indexing jobs"
+)
+async def list_jobs():
+    """
+    List recent indexing jobs, newest first.
+    """
+    return indexing_job_service.list_jobs()
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=SchemaJobResponse,
+    summary="Get indexing job status"
+)
+async def get_job(job_id: str):
+    """
+    Get status and per-phase progress of an indexing job.
+    - **job_id**: Job identifier returned by POST /schema/index
+    """
+    try:
+        return indexing_job_service.get(job_id)
+    
+    except JobNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.delete(
+    "/jobs/{job_id}",
+    response_model=SchemaJobResponse,
+    summary="Cancel indexing job"
+)
+async def cancel_job(job_id: str):
+    """
+    Cancel a queued or running indexing job.
+    - **job_id**: Job identifier returned by POST /schema/index
+    """
+    try:
+        return indexing_job_service.cancel(job_id)
+    
+    except JobNotFoundException as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
 @router.get(
     "/{database_name}",
     response_model=Dict[str, Any],
@@ -55,7 +109,7 @@ async def get_schema(database_name: str):
     try:
         logger.info(f"Retrieving schema info for: {database_name}")
         
-        schema_info = schema_service.get_schema_info(database_name)
+        schema_info = await schema_service.get_schema_info(database_name)
         
         return schema_info
     
@@ -86,7 +140,7 @@ async def list_databases():
     try:
         logger.info("Listing all indexed databases")
         
-        databases = schema_service.list_databases()
+        databases = await schema_service.list_databases()
         
         return databases
     
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 
 
 class Settings(BaseSettings):
@@ -19,8 +19,26 @@ class Settings(BaseSettings):
     )
     AUTO_DISCOVER_MODELS: bool = True
     EXCLUDED_MODEL_KEYWORDS: str = "opus"
+    MODEL_DISCOVERY_REFRESH_SECONDS: int = 600
+    MODEL_BREAKER_FAILURE_THRESHOLD: int = 3
+    MODEL_BREAKER_COOLDOWN_SECONDS: int = 30
+    MODEL_NOT_FOUND_COOLDOWN_SECONDS: int = 3600
+    MODEL_ROUTING_ENABLED: bool = False
+    FAST_MODEL_NAME: str = ""
+    STRONG_MODEL_NAME: str = ""
+    MODEL_ROUTING_THRESHOLD: float = 3.0
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_DELAY_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY_MS: int = 1000
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_BUDGET_PERCENT: float = 5.0
+    LLM_HEDGE_DELAY_REFRESH_SECONDS: float = 5.0
     LLM_TEMPERATURE: float = 0.0
     MAX_TOKENS: int = 2000
+    PROMPT_CACHE_ENABLED: bool = True
+    # Send the whole catalog as the cached schema section when it renders to
+    # at most this many characters, so every question shares one prefix (0 = off)
+    PROMPT_CACHE_FULL_SCHEMA_MAX_CHARS: int = 0
     
     
     HUGGINGFACE_API_KEY: str = ""
@@ -31,16 +49,56 @@ class Settings(BaseSettings):
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     CHUNK_SIZE: int = 1000
     CHUNK_OVERLAP: int = 200
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+    EMBEDDING_CACHE_PATH: str = "./data/embedding_cache"
+    EMBEDDING_DISK_CACHE_MAX_ENTRIES: int = 50000
+    VECTOR_INDEX_IN_MEMORY: bool = True
+    VECTOR_INDEX_TTL_SECONDS: int = 300
+    VECTOR_STORE_MAX_WORKERS: int = 4
     
    
     DATABASE_URL: str = ""
     DB_POOL_SIZE: int = 10
     DB_MAX_OVERFLOW: int = 20
+    DB_ENGINE_IDLE_SECONDS: int = 900
+    DB_IDLE_SWEEP_INTERVAL_SECONDS: int = 60
+    DB_PREWARM_ON_STARTUP: bool = True
+    DB_PREWARM_CONNECTIONS: int = 2
+    SCHEMA_BULK_REFLECTION: bool = True
+    SCHEMA_CATALOG_REFRESH_SECONDS: int = 30
+    INDEXING_BATCH_SIZE: int = 256
+    INDEXING_MAX_CONCURRENT_JOBS: int = 2
+    INDEXING_JOB_RETENTION: int = 200
+    SQL_EXECUTOR_MAX_WORKERS: int = 8
+    SQL_STREAM_BATCH_SIZE: int = 1000
+    SQL_STREAM_QUEUE_SIZE: int = 4
+    SQL_STREAM_IDLE_TIMEOUT_SECONDS: int = 60
+    SQL_VALIDATION_CACHE_SIZE: int = 2048
+    SQL_REPAIR_ENABLED: bool = True
+    SQL_REPAIR_MIN_SIMILARITY: float = 0.75
+    SQL_REPAIR_MIN_MARGIN: float = 0.1
+    # Candidates generated concurrently on the first attempt (1 = sequential only)
+    SQL_CANDIDATES: int = 1
+    SQL_CANDIDATE_TEMPERATURES: str = "0.0,0.4,0.8"
+    SQL_CANDIDATE_STAGGER_MS: float = 0.0
     
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_MAX_CONNECTIONS: int = 50
     CACHE_TTL: int = 3600
+    # Off by default: similar questions can need different SQL. Entries and
+    # their invalidation are per process, so workers do not share them
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1000
+    EXPLANATION_MODE: Literal["inline", "parallel", "deferred"] = "inline"
+    EXPLANATION_CACHE_MAX_ENTRIES: int = 1000
     
 
+    LOOP_LAG_INTERVAL_MS: int = 250
+    LOOP_LAG_WARN_MS: int = 100
+
     MAX_QUERY_LENGTH: int = 500
     API_RATE_LIMIT: int = 100
  
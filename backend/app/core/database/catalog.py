@@ -0,0 +1,198 @@
+from threading import Lock
+from typing import Dict, Any, List, Optional, Set
+import asyncio
+import time
+from app.config import settings
+from app.core.database.metadata import metadata_store
+from app.models.schema import TableSchema
+from app.utils.logger import logger
+
+
+class DatabaseCatalog:
+    """Compact lookup structures for one database's schema"""
+
+    def __init__(self, name: str, metadata: Dict[str, Any], version: int):
+        self.name = name
+        self.metadata = metadata
+        self.version = version
+        # Keys are lower-cased so lookups match normalized SQL identifiers
+        self.tables: Dict[str, Dict[str, Any]] = {}
+        self.columns: Dict[str, Set[str]] = {}
+        self.relations: Dict[str, Set[str]] = {}
+        self._description: Optional[str] = None
+
+        for entry in metadata.get("tables", []):
+            # Metadata written before columns were stored lists names only
+            if isinstance(entry, str):
+                entry = {"name": entry, "columns": []}
+            if not isinstance(entry, dict) or not entry.get("name"):
+                continue
+
+            table_key = entry["name"].lower()
+            self.tables[table_key] = entry
+            self.columns[table_key] = {
+                col["name"].lower() for col in entry.get("columns", []) if col.get("name")
+            }
+
+            for col in entry.get("columns", []):
+                reference = col.get("foreign_key")
+                if reference:
+                    referred_table = reference.rsplit(".", 1)[0].lower()
+                    self.relations.setdefault(table_key, set()).add(referred_table)
+                    self.relations.setdefault(referred_table, set()).add(table_key)
+
+    @property
+    def exists(self) -> bool:
+        return bool(self.metadata)
+
+    def has_table(self, table_name: str) -> bool:
+        return table_name.lower() in self.tables
+
+    def related_tables(self, table_name: str) -> Set[str]:
+        """Tables joined to this one by a foreign key in either direction"""
+        return self.relations.get(table_name.lower(), set())
+
+    def describe_table(self, table_name: str) -> Optional[str]:
+        """Render a table the same way the indexer renders its documents"""
+        entry = self.tables.get(table_name.lower())
+        if entry is None:
+            return None
+
+        lines = [f"Table: {entry['name']}", "", "Columns:"]
+        for col in entry.get("columns", []):
+            line = f"- {col['name']} ({col.get('type', 'UNKNOWN')})"
+            if col.get("primary_key"):
+                line += " [PRIMARY KEY]"
+            if col.get("foreign_key"):
+                line += f" [FOREIGN KEY -> {col['foreign_key']}]"
+            if not col.get("nullable", True):
+                line += " [NOT NULL]"
+            lines.append(line)
+
+        return "\n".join(lines)
+
+    def describe(self) -> str:
+        """Render every table in name order; stable for a given version"""
+        if self._description is None:
+            self._description = "\n\n".join(
+                self.describe_table(table) for table in sorted(self.tables)
+            )
+        return self._description
+
+
+class SchemaCatalog:
+    """
+    Versioned in-memory schema catalog backed by the metadata store.
+    Loaded lazily per database; every re-index installs a new version.
+    """
+
+    def __init__(self):
+        self.store = metadata_store
+        # Another process may re-index; re-check the file at most this often
+        self.refresh_seconds = settings.SCHEMA_CATALOG_REFRESH_SECONDS
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def table_entry(table: TableSchema) -> Dict[str, Any]:
+        """Compact, JSON-serializable form of a table stored in metadata"""
+        return {
+            "name": table.name,
+            "columns": [
+                {
+                    "name": col.name,
+                    "type": col.data_type,
+                    "nullable": col.is_nullable,
+                    "primary_key": col.is_primary_key,
+                    "foreign_key": (
+                        f"{col.foreign_key_table}.{col.foreign_key_column}"
+                        if col.is_foreign_key else None
+                    ),
+                }
+                for col in table.columns
+            ],
+        }
+
+    def get(self, database_name: str) -> DatabaseCatalog:
+        """Return the catalog for a database, loading it from disk if needed"""
+        entry = self._entries.get(database_name)
+        if entry is not None and not self._stale(entry):
+            return entry["catalog"]
+
+        with self._lock:
+            entry = self._entries.get(database_name)
+            if entry is None:
+                return self._load(database_name)
+
+            if self._stale(entry):
+                if self.store.get_mtime(database_name) != entry["mtime"]:
+                    logger.info(f"Schema metadata changed on disk for database: {database_name}")
+                    return self._load(database_name)
+                entry["checked_at"] = time.monotonic()
+
+            return entry["catalog"]
+
+    async def aget(self, database_name: str) -> DatabaseCatalog:
+        """Return the catalog, touching disk off the event loop when needed"""
+        entry = self._entries.get(database_name)
+        if entry is not None and not self._stale(entry):
+            return entry["catalog"]
+        return await asyncio.to_thread(self.get, database_name)
+
+    def version(self, database_name: str) -> int:
+        return self.get(database_name).version
+
+    def save(self, database_name: str, metadata: Dict[str, Any]) -> DatabaseCatalog:
+        """Write metadata atomically and install it as the next version"""
+        with self._lock:
+            self.store.save_metadata(database_name, metadata)
+            return self._install(database_name, metadata, self.store.get_mtime(database_name))
+
+    async def asave(self, database_name: str, metadata: Dict[str, Any]) -> DatabaseCatalog:
+        return await asyncio.to_thread(self.save, database_name, metadata)
+
+    def put(self, database_name: str, metadata: Dict[str, Any]) -> DatabaseCatalog:
+        """Install metadata in memory only, without writing it to disk"""
+        with self._lock:
+            return self._install(database_name, metadata, self.store.get_mtime(database_name))
+
+    def invalidate(self, database_name: str):
+        """Drop a database so the next lookup reloads it with a new version"""
+        with self._lock:
+            self._entries.pop(database_name, None)
+
+    async def alist_databases(self) -> List[str]:
+        return await self.store.alist_databases()
+
+    def _stale(self, entry: Dict[str, Any]) -> bool:
+        return (
+            self.refresh_seconds > 0
+            and time.monotonic() - entry["checked_at"] > self.refresh_seconds
+        )
+
+    def _load(self, database_name: str) -> DatabaseCatalog:
+        mtime = self.store.get_mtime(database_name)
+        metadata = self.store.load_metadata(database_name) if mtime is not None else {}
+        return self._install(database_name, metadata, mtime)
+
+    def _install(
+        self,
+        database_name: str,
+        metadata: Dict[str, Any],
+        mtime: Optional[int]
+    ) -> DatabaseCatalog:
+        version = self._versions.get(database_name, 0) + 1
+        self._versions[database_name] = version
+
+        catalog = DatabaseCatalog(database_name, metadata, version)
+        self._entries[database_name] = {
+            "catalog": catalog,
+            "mtime": mtime,
+            "checked_at": time.monotonic(),
+        }
+        return catalog
+
+
+# Global instance
+schema_catalog = SchemaCatalog()
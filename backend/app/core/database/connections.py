@@ -1,6 +1,8 @@
 from sqlalchemy import create_engine, pool, text
 from sqlalchemy.orm import sessionmaker
-from typing import Dict, Any
+from threading import Lock
+from typing import Dict, Any, List, Optional
+import time
 from app.config import settings
 from app.utils.logger import logger
 from app.utils.exceptions import DatabaseException
@@ -12,26 +14,78 @@ class DatabaseConnectionManager:
     def __init__(self):
         self.engines: Dict[str, Any] = {}
         self.sessions: Dict[str, Any] = {}
+        self.last_used: Dict[str, float] = {}
+        # Per-database pool settings outlive idle eviction so a recreated
+        # engine keeps them even when the caller only has the connection string
+        self.pool_options: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
     
-    def get_engine(self, connection_string: str, pool_size: int = 5):
+    def get_engine(
+        self,
+        connection_string: str,
+        pool_size: Optional[int] = None,
+        max_overflow: Optional[int] = None
+    ):
         """Get or create database engine"""
-        if connection_string not in self.engines:
-            try:
-                engine = create_engine(
-                    connection_string,
-                    poolclass=pool.QueuePool,
-                    pool_size=pool_size,
-                    max_overflow=10,
-                    pool_pre_ping=True
-                )
-                self.engines[connection_string] = engine
-                logger.info(f"Created database engine for connection")
+        with self._lock:
+            if pool_size is not None or max_overflow is not None:
+                self.pool_options[connection_string] = {
+                    "pool_size": pool_size,
+                    "max_overflow": max_overflow,
+                }
+            else:
+                options = self.pool_options.get(connection_string, {})
+                pool_size = options.get("pool_size")
+                max_overflow = options.get("max_overflow")
             
-            except Exception as e:
-                logger.error(f"Failed to create database engine: {str(e)}")
-                raise DatabaseException(f"Failed to connect to database: {str(e)}")
+            if connection_string not in self.engines:
+                try:
+                    engine = create_engine(
+                        connection_string,
+                        poolclass=pool.QueuePool,
+                        pool_size=pool_size or settings.DB_POOL_SIZE,
+                        max_overflow=(
+                            max_overflow if max_overflow is not None else settings.DB_MAX_OVERFLOW
+                        ),
+                        pool_pre_ping=True
+                    )
+                    self.engines[connection_string] = engine
+                    logger.info(f"Created database engine for connection")
+                
+                except Exception as e:
+                    logger.error(f"Failed to create database engine: {str(e)}")
+                    raise DatabaseException(f"Failed to connect to database: {str(e)}")
+            
+            self.last_used[connection_string] = time.monotonic()
+            return self.engines[connection_string]
+    
+    def dispose_engine(self, connection_string: str, keep_pool_options: bool = False):
+        """Close the pool for a single connection string"""
+        with self._lock:
+            engine = self.engines.pop(connection_string, None)
+            self.sessions.pop(connection_string, None)
+            self.last_used.pop(connection_string, None)
+            if not keep_pool_options:
+                self.pool_options.pop(connection_string, None)
+        
+        if engine is not None:
+            engine.dispose()
+            logger.info("Disposed database engine")
+    
+    def evict_idle(self, max_idle_seconds: float) -> List[str]:
+        """Dispose engines that have not been used recently"""
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                connection_string
+                for connection_string, used in self.last_used.items()
+                if now - used > max_idle_seconds
+            ]
+        
+        for connection_string in idle:
+            self.dispose_engine(connection_string, keep_pool_options=True)
         
-        return self.engines[connection_string]
+        return idle
     
     def get_session(self, connection_string: str):
         """Get database session"""
@@ -62,6 +116,8 @@ class DatabaseConnectionManager:
             engine.dispose()
         self.engines.clear()
         self.sessions.clear()
+        self.last_used.clear()
+        self.pool_options.clear()
         logger.info("All database connections closed")
 
 
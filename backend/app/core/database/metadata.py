@@ -1,8 +1,11 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
 import json
 import os
+import tempfile
 from datetime import datetime
 from app.utils.logger import logger
+from app.utils.exceptions import DatabaseException
 
 
 class SchemaMetadataStore:
@@ -17,19 +20,46 @@ class SchemaMetadataStore:
         database_name: str,
         metadata: Dict[str, Any]
     ):
-        """Save schema metadata to file"""
+        """
+        Save schema metadata to file atomically: readers see either the old
+        file or the complete new one, never a partial write.
+        """
         try:
             metadata['last_updated'] = datetime.now().isoformat()
             
-            file_path = os.path.join(self.storage_path, f"{database_name}.json")
+            file_path = self._file_path(database_name)
             
-            with open(file_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.storage_path,
+                prefix=f".{database_name}.",
+                suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(metadata, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
             
             logger.info(f"Saved metadata for database: {database_name}")
         
         except Exception as e:
             logger.error(f"Failed to save metadata: {str(e)}")
+            raise DatabaseException(f"Failed to save metadata: {str(e)}")
+    
+    def get_mtime(self, database_name: str) -> Optional[int]:
+        """Modification time of the metadata file, or None if it does not exist"""
+        try:
+            return os.stat(self._file_path(database_name)).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _file_path(self, database_name: str) -> str:
+        return os.path.join(self.storage_path, f"{database_name}.json")
     
     def load_metadata(
         self,
@@ -37,7 +67,7 @@ class SchemaMetadataStore:
     ) -> Dict[str, Any]:
         """Load schema metadata from file"""
         try:
-            file_path = os.path.join(self.storage_path, f"{database_name}.json")
+            file_path = self._file_path(database_name)
             
             if not os.path.exists(file_path):
                 logger.warning(f"No metadata found for database: {database_name}")
@@ -53,6 +83,25 @@ class SchemaMetadataStore:
             logger.error(f"Failed to load metadata: {str(e)}")
             return {}
     
+    async def asave_metadata(
+        self,
+        database_name: str,
+        metadata: Dict[str, Any]
+    ):
+        """Save schema metadata off the event loop"""
+        await asyncio.to_thread(self.save_metadata, database_name, metadata)
+    
+    async def aload_metadata(
+        self,
+        database_name: str
+    ) -> Dict[str, Any]:
+        """Load schema metadata off the event loop"""
+        return await asyncio.to_thread(self.load_metadata, database_name)
+    
+    async def alist_databases(self) -> List[str]:
+        """List databases off the event loop"""
+        return await asyncio.to_thread(self.list_databases)
+    
     def list_databases(self) -> List[str]:
         """List all databases with stored metadata"""
         try:
@@ -67,7 +116,7 @@ class SchemaMetadataStore:
     def delete_metadata(self, database_name: str):
         """Delete metadata for a database"""
         try:
-            file_path = os.path.join(self.storage_path, f"{database_name}.json")
+            file_path = self._file_path(database_name)
             
             if os.path.exists(file_path):
                 os.remove(file_path)
@@ -1,11 +1,46 @@
-from sqlalchemy import inspect, MetaData
-from typing import List, Dict, Any
+from sqlalchemy import inspect, text, MetaData
+from typing import Iterator, List, Dict, Any, Optional
+import hashlib
+import time
+from app.config import settings
 from app.core.database.connections import db_manager
 from app.models.schema import DatabaseSchema, TableSchema, ColumnSchema
 from app.utils.logger import logger
 from app.utils.exceptions import DatabaseException
 
 
+# Ordered catalog queries whose rows cover tables, columns, primary and
+# foreign keys; far cheaper than reflection on large schemas
+_MYSQL_FINGERPRINT_QUERIES = [
+    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE "
+    "FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE() "
+    "ORDER BY TABLE_NAME, ORDINAL_POSITION",
+    "SELECT TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME "
+    "FROM information_schema.KEY_COLUMN_USAGE WHERE TABLE_SCHEMA = DATABASE() "
+    "ORDER BY TABLE_NAME, CONSTRAINT_NAME, ORDINAL_POSITION",
+]
+FINGERPRINT_QUERIES: Dict[str, List[str]] = {
+    "sqlite": [
+        "SELECT name, sql FROM sqlite_master "
+        "WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name",
+    ],
+    "postgresql": [
+        "SELECT c.table_name, c.column_name, c.data_type, c.is_nullable "
+        "FROM information_schema.columns c "
+        "JOIN information_schema.tables t "
+        "ON t.table_schema = c.table_schema AND t.table_name = c.table_name "
+        "WHERE c.table_schema = current_schema() AND t.table_type = 'BASE TABLE' "
+        "ORDER BY c.table_name, c.ordinal_position",
+        "SELECT conrelid::regclass::text, contype, pg_get_constraintdef(oid) "
+        "FROM pg_constraint "
+        "WHERE connamespace = current_schema()::regnamespace AND contype IN ('p', 'f') "
+        "ORDER BY 1, 3",
+    ],
+    "mysql": _MYSQL_FINGERPRINT_QUERIES,
+    "mariadb": _MYSQL_FINGERPRINT_QUERIES,
+}
+
+
 class SchemaExtractor:
     """Extract database schema metadata"""
     
@@ -15,51 +50,220 @@ class SchemaExtractor:
     def extract_schema(
         self,
         connection_string: str,
-        database_name: str
+        database_name: str,
+        bulk: Optional[bool] = None
     ) -> DatabaseSchema:
         """Extract complete database schema"""
         logger.info(f"Extracting schema for database: {database_name}")
         
+        if bulk is None:
+            bulk = settings.SCHEMA_BULK_REFLECTION
+        
         try:
             engine = self.db_manager.get_engine(connection_string)
             inspector = inspect(engine)
             
+            start_time = time.perf_counter()
+            
             table_names = inspector.get_table_names()
             logger.info(f"Found {len(table_names)} tables")
             
-            tables = []
-            for table_name in table_names:
-                table_schema = self._extract_table_schema(inspector, table_name)
-                tables.append(table_schema)
+            tables = None
+            mode = "per_table"
+            if bulk and table_names:
+                try:
+                    tables = self._extract_bulk(inspector, table_names)
+                    mode = "bulk"
+                except (AttributeError, NotImplementedError) as e:
+                    logger.warning(
+                        f"Bulk reflection unsupported for dialect '{engine.dialect.name}'; "
+                        f"falling back to per-table reflection: {str(e)}"
+                    )
+            
+            if tables is None:
+                tables = [
+                    self._extract_table_schema(inspector, table_name)
+                    for table_name in table_names
+                ]
+            
+            duration_ms = (time.perf_counter() - start_time) * 1000
             
             database_schema = DatabaseSchema(
                 name=database_name,
-                tables=tables
+                tables=tables,
+                metadata={
+                    "extraction": {
+                        "mode": mode,
+                        "duration_ms": round(duration_ms, 2)
+                    }
+                }
             )
             
-            logger.info(f"Successfully extracted schema for {len(tables)} tables")
+            logger.info(
+                f"Successfully extracted schema for {len(tables)} tables "
+                f"({mode} reflection, {duration_ms:.0f} ms)"
+            )
             return database_schema
         
         except Exception as e:
             logger.error(f"Schema extraction failed: {str(e)}")
             raise DatabaseException(f"Failed to extract schema: {str(e)}")
     
+    def get_table_names(self, connection_string: str) -> List[str]:
+        """List table names without reflecting columns or constraints"""
+        try:
+            engine = self.db_manager.get_engine(connection_string)
+            return inspect(engine).get_table_names()
+        
+        except Exception as e:
+            logger.error(f"Table listing failed: {str(e)}")
+            raise DatabaseException(f"Failed to list tables: {str(e)}")
+    
+    def iter_table_batches(
+        self,
+        connection_string: str,
+        table_names: List[str],
+        batch_size: int,
+        bulk: Optional[bool] = None
+    ) -> Iterator[List[TableSchema]]:
+        """
+        Reflect tables a batch at a time so only one batch of reflected
+        metadata is held in memory, however large the schema is.
+        """
+        if bulk is None:
+            bulk = settings.SCHEMA_BULK_REFLECTION
+        
+        engine = self.db_manager.get_engine(connection_string)
+        inspector = inspect(engine)
+        
+        for start in range(0, len(table_names), batch_size):
+            chunk = table_names[start:start + batch_size]
+            
+            tables = None
+            if bulk:
+                try:
+                    tables = self._extract_bulk(inspector, chunk)
+                except (AttributeError, NotImplementedError) as e:
+                    logger.warning(
+                        f"Bulk reflection unsupported for dialect '{engine.dialect.name}'; "
+                        f"falling back to per-table reflection: {str(e)}"
+                    )
+                    bulk = False
+            
+            if tables is None:
+                tables = [
+                    self._extract_table_schema(inspector, table_name)
+                    for table_name in chunk
+                ]
+            
+            yield tables
+    
+    def compute_fingerprint(self, connection_string: str) -> str:
+        """
+        Hash table names, column names/types/nullability, primary keys and
+        foreign keys. Known dialects read them with a couple of plain catalog
+        queries; others fall back to bulk reflection.
+        """
+        try:
+            engine = self.db_manager.get_engine(connection_string)
+            queries = FINGERPRINT_QUERIES.get(engine.dialect.name)
+            
+            digest = hashlib.sha256()
+            if queries:
+                with engine.connect() as conn:
+                    for query in queries:
+                        digest.update(query.encode())
+                        for row in conn.execute(text(query)):
+                            digest.update(repr(tuple(row)).encode())
+            else:
+                self._reflect_fingerprint(engine, digest)
+            
+            return digest.hexdigest()
+        
+        except Exception as e:
+            logger.error(f"Schema fingerprinting failed: {str(e)}")
+            raise DatabaseException(f"Failed to fingerprint schema: {str(e)}")
+    
+    def _reflect_fingerprint(self, engine, digest):
+        """Feed the reflected catalog into digest for dialects without a query"""
+        inspector = inspect(engine)
+        table_names = sorted(inspector.get_table_names())
+        
+        try:
+            columns_by_table = inspector.get_multi_columns(filter_names=table_names)
+            pks_by_table = inspector.get_multi_pk_constraint(filter_names=table_names)
+            fks_by_table = inspector.get_multi_foreign_keys(filter_names=table_names)
+        except (AttributeError, NotImplementedError):
+            columns_by_table = {(None, t): inspector.get_columns(t) for t in table_names}
+            pks_by_table = {(None, t): inspector.get_pk_constraint(t) for t in table_names}
+            fks_by_table = {(None, t): inspector.get_foreign_keys(t) for t in table_names}
+        
+        for table_name in table_names:
+            key = (None, table_name)
+            columns = sorted(
+                (col["name"], str(col["type"]), bool(col.get("nullable", True)))
+                for col in columns_by_table.get(key, [])
+            )
+            primary_keys = sorted((pks_by_table.get(key) or {}).get("constrained_columns", []))
+            foreign_keys = sorted(
+                (
+                    tuple(fk.get("constrained_columns", [])),
+                    fk.get("referred_table") or "",
+                    tuple(fk.get("referred_columns", []))
+                )
+                for fk in fks_by_table.get(key, [])
+            )
+            digest.update(repr((table_name, columns, primary_keys, foreign_keys)).encode())
+    
+    def _extract_bulk(
+        self,
+        inspector,
+        table_names: List[str]
+    ) -> List[TableSchema]:
+        """Reflect every table with a handful of catalog queries (SQLAlchemy 2.0+)"""
+        # Keys are (schema, table_name); the default schema is None
+        columns_by_table = inspector.get_multi_columns(filter_names=table_names)
+        pks_by_table = inspector.get_multi_pk_constraint(filter_names=table_names)
+        fks_by_table = inspector.get_multi_foreign_keys(filter_names=table_names)
+        
+        tables = []
+        for table_name in table_names:
+            key = (None, table_name)
+            tables.append(
+                self._build_table_schema(
+                    table_name,
+                    columns_by_table.get(key, []),
+                    pks_by_table.get(key) or {},
+                    fks_by_table.get(key, [])
+                )
+            )
+        return tables
+    
     def _extract_table_schema(
         self,
         inspector,
         table_name: str
     ) -> TableSchema:
         """Extract schema for a single table"""
-        # Get columns
+        return self._build_table_schema(
+            table_name,
+            inspector.get_columns(table_name),
+            inspector.get_pk_constraint(table_name),
+            inspector.get_foreign_keys(table_name)
+        )
+    
+    def _build_table_schema(
+        self,
+        table_name: str,
+        column_info: List[Dict[str, Any]],
+        pk_constraint: Dict[str, Any],
+        fk_constraints: List[Dict[str, Any]]
+    ) -> TableSchema:
+        """Build a table schema from reflected columns and constraints"""
         columns = []
-        column_info = inspector.get_columns(table_name)
         
-        
-        pk_constraint = inspector.get_pk_constraint(table_name)
         primary_keys = pk_constraint.get('constrained_columns', [])
         
-        
-        fk_constraints = inspector.get_foreign_keys(table_name)
         foreign_key_map = {}
         
         for fk in fk_constraints:
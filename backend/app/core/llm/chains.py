@@ -1,6 +1,7 @@
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 from app.core.llm.client import llm_client
 from app.core.llm.prompts import prompt_templates
+from app.config import settings
 from app.utils.logger import logger
 from app.utils.helpers import clean_sql_query
 
@@ -17,15 +18,19 @@ class SQLGenerationChain:
         schema_context: str,
         few_shot_examples: Optional[str] = None,
         validation_feedback: Optional[str] = None,
+        system_prompt: Optional[List[Dict[str, Any]]] = None,
+        temperature: Optional[float] = None,
+        model: Optional[str] = None,
+        hedge: bool = True,
     ) -> Dict[str, Any]:
-        """Generate SQL from user query"""
+        """
+        Generate SQL from user query.
+        Pass a prebuilt system_prompt to skip rebuilding it on retries.
+        """
         logger.info(f"Generating SQL for query: {user_query}")
         
-        
-        system_prompt = prompt_templates.sql_generation_system_prompt(
-            schema_context,
-            few_shot_examples or ""
-        )
+        if system_prompt is None:
+            system_prompt = self.build_system_prompt(schema_context, few_shot_examples)
         
         
         user_content = user_query
@@ -40,7 +45,13 @@ class SQLGenerationChain:
             {"role": "user", "content": user_content}
         ]
         
-        response = await self.llm.generate_completion(messages)
+        response = await self.llm.generate_completion(
+            messages,
+            temperature=temperature,
+            model=model,
+            hedge=hedge,
+            purpose="sql"
+        )
         
         
         sql = clean_sql_query(response)
@@ -50,6 +61,18 @@ class SQLGenerationChain:
             "raw_response": response
         }
     
+    def build_system_prompt(
+        self,
+        schema_context: str,
+        few_shot_examples: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Build the SQL generation system prompt as cacheable content blocks"""
+        return prompt_templates.sql_generation_system_blocks(
+            schema_context,
+            few_shot_examples or "",
+            cache=settings.PROMPT_CACHE_ENABLED
+        )
+    
     async def explain_sql(
         self,
         sql: str,
@@ -64,9 +87,26 @@ class SQLGenerationChain:
             {"role": "user", "content": prompt}
         ]
         
-        explanation = await self.llm.generate_completion(messages)
+        explanation = await self.llm.generate_completion(messages, purpose="explanation")
         return explanation
 
+    async def stream_explanation(
+        self,
+        sql: str,
+        schema_context: str
+    ) -> AsyncIterator[str]:
+        """Stream explanation for SQL query as tokens are generated"""
+        logger.info("Streaming explanation for SQL")
+
+        prompt = prompt_templates.sql_explanation_prompt(sql, schema_context)
+
+        messages = [
+            {"role": "user", "content": prompt}
+        ]
+
+        async for chunk in self.llm.stream_completion(messages):
+            yield chunk
+
 
 class SchemaDescriptionChain:
     """Chain for generating schema descriptions"""
@@ -85,7 +125,9 @@ class SchemaDescriptionChain:
             {"role": "user", "content": prompt}
         ]
         
-        description = await self.llm.generate_completion(messages, temperature=0.3)
+        description = await self.llm.generate_completion(
+            messages, temperature=0.3, purpose="description"
+        )
         return description.strip()
 
 
@@ -1,198 +1,366 @@
 from anthropic import AsyncAnthropic
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Any, Optional, Tuple, Union
+import asyncio
+import time
 from app.config import settings
+from app.core.llm.hedging import HedgingPolicy
+from app.core.llm.model_registry import ModelHealthRegistry
 from app.utils.logger import logger
+from app.utils.metrics import metrics
 from app.utils.exceptions import LLMException
 
 
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_read_input_tokens",
+    "cache_creation_input_tokens",
+)
+
+
 class LLMClient:
     """Client for interacting with Large Language Models"""
     
     def __init__(self):
         self.client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
         self.model = settings.MODEL_NAME
-        self.fallback_models = self._parse_fallback_models(settings.FALLBACK_MODELS)
-        self.excluded_model_keywords = self._parse_model_keywords(
-            settings.EXCLUDED_MODEL_KEYWORDS
-        )
-        self.auto_discover_models = settings.AUTO_DISCOVER_MODELS
         self.temperature = settings.LLM_TEMPERATURE
         self.max_tokens = settings.MAX_TOKENS
-        self._cached_available_models: Optional[List[str]] = None
+        self.models = ModelHealthRegistry(self._list_models)
+        self.hedging = HedgingPolicy()
 
-    @staticmethod
-    def _parse_fallback_models(raw_fallbacks: str) -> List[str]:
-        """Parse comma-separated fallback models from settings."""
-        return [model.strip() for model in raw_fallbacks.split(",") if model.strip()]
-
-    @staticmethod
-    def _parse_model_keywords(raw_keywords: str) -> List[str]:
-        """Parse comma-separated model filter keywords."""
-        return [keyword.strip().lower() for keyword in raw_keywords.split(",") if keyword.strip()]
+    async def _list_models(self) -> List[str]:
+        """Fetch model IDs available for the configured Anthropic API key."""
+        response = await self.client.models.list(limit=100)
+        data = getattr(response, "data", None)
+        if data:
+            return [m.id for m in data if getattr(m, "id", None)]
+        # Fallback for SDK response shapes that return an iterable directly.
+        return [m.id for m in response if getattr(m, "id", None)]
 
-    @staticmethod
-    def _unique_preserve_order(items: List[str]) -> List[str]:
-        """Return unique items while preserving their first-seen order."""
-        return list(dict.fromkeys(items))
-
-    def _filter_excluded_models(self, models: List[str]) -> List[str]:
-        """Exclude model IDs containing configured blocked keywords."""
-        if not self.excluded_model_keywords:
-            return models
-
-        filtered: List[str] = []
-        for model in models:
-            model_lower = model.lower()
-            if any(keyword in model_lower for keyword in self.excluded_model_keywords):
-                continue
-            filtered.append(model)
-        return filtered
+    def _request_kwargs(
+        self,
+        model_name: str,
+        system_message: Union[str, List[Dict[str, Any]]],
+        anthropic_messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int]
+    ) -> Dict[str, Any]:
+        request_kwargs: Dict[str, Any] = {
+            "model": model_name,
+            "max_tokens": max_tokens or self.max_tokens,
+            "system": system_message,
+            "messages": anthropic_messages,
+        }
+        if self.models.supports_temperature(model_name):
+            request_kwargs["temperature"] = (
+                temperature if temperature is not None else self.temperature
+            )
+        return request_kwargs
 
-    async def _get_available_models(self) -> List[str]:
-        """Fetch model IDs available for the configured Anthropic API key."""
-        if self._cached_available_models is not None:
-            return self._cached_available_models
+    def _drop_temperature(
+        self,
+        model_name: str,
+        request_kwargs: Dict[str, Any],
+        error: Exception
+    ) -> bool:
+        """Strip temperature after a model rejects it, remembering that for later calls"""
+        error_text = str(error).lower()
+        if not (
+            "temperature" in request_kwargs
+            and "temperature" in error_text
+            and "deprecated" in error_text
+        ):
+            return False
 
-        discovered: List[str] = []
-        try:
-            response = await self.client.models.list(limit=100)
-            data = getattr(response, "data", None)
-            if data:
-                discovered = [m.id for m in data if getattr(m, "id", None)]
-            else:
-                # Fallback for SDK response shapes that return an iterable directly.
-                discovered = [m.id for m in response if getattr(m, "id", None)]
-        except Exception as e:
-            logger.warning(f"Unable to discover Anthropic models automatically: {e}")
+        logger.warning(
+            f"Model '{model_name}' does not support temperature; retrying without it."
+        )
+        self.models.mark_no_temperature(model_name)
+        request_kwargs.pop("temperature")
+        return True
 
-        self._cached_available_models = self._unique_preserve_order(discovered)
-        return self._cached_available_models
+    def _log_fallback(self, model_name: str, requested: Optional[str] = None):
+        requested = requested or self.model
+        if model_name != requested:
+            logger.warning(
+                f"Configured model '{requested}' unavailable; "
+                f"used fallback model '{model_name}'"
+            )
 
-    async def _build_candidate_models(self) -> List[str]:
-        """Build ordered candidate list, preferring configured and available models."""
-        configured = self._filter_excluded_models(
-            self._unique_preserve_order([self.model] + self.fallback_models)
+    @staticmethod
+    def _unavailable_error(attempted_models: List[str], last_error: Optional[Exception]) -> LLMException:
+        if last_error is None:
+            return LLMException(
+                "No LLM models available; every candidate model is cooling down after failures"
+            )
+        return LLMException(
+            "No configured Anthropic model is available. "
+            f"Attempted models: {', '.join(attempted_models)}. "
+            "Set MODEL_NAME and FALLBACK_MODELS to model IDs enabled for your API key. "
+            f"Last error: {last_error}"
         )
 
-        if not self.auto_discover_models:
-            return configured
+    @staticmethod
+    def _split_messages(
+        messages: List[Dict[str, Any]]
+    ) -> Tuple[Union[str, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Split chat messages into the Anthropic system prompt and message list.
+        System content may be a string or a list of content blocks carrying
+        cache_control breakpoints.
+        """
+        system_message: Union[str, List[Dict[str, Any]]] = ""
+        anthropic_messages = []
 
-        available = self._filter_excluded_models(await self._get_available_models())
-        if not available:
-            return configured
+        for msg in messages:
+            if msg["role"] == "system":
+                system_message = msg["content"]
+            else:
+                anthropic_messages.append({
+                    "role": msg["role"],
+                    "content": msg["content"]
+                })
 
-        configured_available = [m for m in configured if m in available]
-        extra_available = [m for m in available if m not in configured_available]
+        return system_message, anthropic_messages
 
-        if configured_available:
-            return configured_available + extra_available
+    @staticmethod
+    def _record_usage(usage: Any):
+        """Report token usage, including prompt cache reads and writes"""
+        if usage is None:
+            return
 
-        logger.warning(
-            "None of the configured models are available for this API key. "
-            "Falling back to discovered available models."
+        for field in USAGE_FIELDS:
+            metrics.increment(f"llm.{field}", getattr(usage, field, None) or 0)
+
+        logger.info(
+            "LLM usage: input=%s cache_read=%s cache_creation=%s output=%s",
+            getattr(usage, "input_tokens", 0),
+            getattr(usage, "cache_read_input_tokens", None) or 0,
+            getattr(usage, "cache_creation_input_tokens", None) or 0,
+            getattr(usage, "output_tokens", 0),
         )
-        return available
-    
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Token totals and the share of prompt tokens served from the cache"""
+        totals = {field: metrics.get_counter(f"llm.{field}") for field in USAGE_FIELDS}
+        prompt_tokens = (
+            totals["input_tokens"]
+            + totals["cache_read_input_tokens"]
+            + totals["cache_creation_input_tokens"]
+        )
+        totals["cache_read_ratio"] = (
+            round(totals["cache_read_input_tokens"] / prompt_tokens, 4) if prompt_tokens else 0.0
+        )
+        return totals
+
     async def generate_completion(
         self,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+        hedge: bool = True,
+        purpose: str = "completion"
     ) -> str:
-        """Generate completion from LLM"""
+        """
+        Generate completion from LLM, trying `model` first when given.
+        hedge=False skips hedging for callers that already race requests.
+        purpose (e.g. sql, explanation) keys the latency the hedge delay uses.
+        """
         try:
+            system_message, anthropic_messages = self._split_messages(messages)
             
-            system_message = ""
-            anthropic_messages = []
-            
-            for msg in messages:
-                if msg["role"] == "system":
-                    system_message = msg["content"]
-                else:
-                    anthropic_messages.append({
-                        "role": msg["role"],
-                        "content": msg["content"]
-                    })
-            
-            
-            candidate_models = await self._build_candidate_models()
+            candidate_models = await self.models.candidates(preferred=model)
+
+            async def call(model_name: str) -> Any:
+                return await self._create_message(
+                    model_name, system_message, anthropic_messages, temperature, max_tokens, purpose
+                )
 
             last_error: Optional[Exception] = None
             attempted_models: List[str] = []
+            # Models that already failed as a hedge are not tried again
+            failed_models: set = set()
 
-            for model_name in candidate_models:
+            for index, model_name in enumerate(candidate_models):
+                if model_name in failed_models:
+                    continue
                 attempted_models.append(model_name)
+
+                hedge_model = next(
+                    (m for m in candidate_models[index + 1:] if m not in failed_models),
+                    None
+                )
                 try:
-                    selected_temperature = (
-                        temperature if temperature is not None else self.temperature
-                    )
-                    response = await self.client.messages.create(
-                        model=model_name,
-                        max_tokens=max_tokens or self.max_tokens,
-                        temperature=selected_temperature,
-                        system=system_message,
-                        messages=anthropic_messages
-                    )
-
-                    if model_name != self.model:
-                        logger.warning(
-                            f"Configured model '{self.model}' unavailable; "
-                            f"used fallback model '{model_name}'"
+                    if hedge and self.hedging.enabled and hedge_model is not None:
+                        model_name, response = await self._hedged_call(
+                            model_name, hedge_model, call, failed_models, purpose
                         )
-
-                    content = response.content[0].text
-                    logger.info("LLM completion generated successfully")
-                    return content
+                    else:
+                        response = await call(model_name)
                 except Exception as model_error:
                     last_error = model_error
-                    error_text = str(model_error).lower()
-
-                    if "temperature" in error_text and "deprecated" in error_text:
-                        logger.warning(
-                            f"Model '{model_name}' does not support temperature; retrying without it."
-                        )
-                        try:
-                            response = await self.client.messages.create(
-                                model=model_name,
-                                max_tokens=max_tokens or self.max_tokens,
-                                system=system_message,
-                                messages=anthropic_messages
-                            )
-
-                            if model_name != self.model:
-                                logger.warning(
-                                    f"Configured model '{self.model}' unavailable; "
-                                    f"used fallback model '{model_name}'"
-                                )
-
-                            content = response.content[0].text
-                            logger.info("LLM completion generated successfully")
-                            return content
-                        except Exception as retry_error:
-                            last_error = retry_error
-                            error_text = str(retry_error).lower()
-
-                    if "not_found_error" in error_text or "model:" in error_text:
+                    if self.models.record_failure(model_name, model_error):
                         logger.warning(
-                            f"Model '{model_name}' not found. Trying next fallback model."
+                            f"Model '{model_name}' unavailable: {model_error}. Trying next fallback model."
                         )
                         continue
                     raise
 
-            if last_error:
-                raise LLMException(
-                    "No configured Anthropic model is available. "
-                    f"Attempted models: {', '.join(attempted_models)}. "
-                    "Set MODEL_NAME and FALLBACK_MODELS to model IDs enabled for your API key. "
-                    f"Last error: {last_error}"
-                )
+                self._log_fallback(model_name, model)
+                self._record_usage(getattr(response, "usage", None))
+                content = response.content[0].text
+                logger.info("LLM completion generated successfully")
+                return content
 
-            raise LLMException("No LLM models available")
+            raise self._unavailable_error(attempted_models, last_error)
         
         except Exception as e:
             logger.error(f"LLM generation failed: {str(e)}")
             raise LLMException(f"Failed to generate completion: {str(e)}")
-    
+
+    async def _create_message(
+        self,
+        model_name: str,
+        system_message: Union[str, List[Dict[str, Any]]],
+        anthropic_messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        purpose: str = "completion"
+    ) -> Any:
+        """One messages.create call on one model"""
+        request_kwargs = self._request_kwargs(
+            model_name, system_message, anthropic_messages, temperature, max_tokens
+        )
+        started = time.perf_counter()
+        try:
+            response = await self.client.messages.create(**request_kwargs)
+        except Exception as model_error:
+            if not self._drop_temperature(model_name, request_kwargs, model_error):
+                raise
+            started = time.perf_counter()
+            response = await self.client.messages.create(**request_kwargs)
+
+        self.hedging.record_latency((time.perf_counter() - started) * 1000, purpose, model_name)
+        self.models.record_success(model_name)
+        return response
+
+    async def _hedged_call(
+        self,
+        primary: str,
+        secondary: str,
+        call: Callable[[str], Awaitable[Any]],
+        failed_models: set,
+        purpose: str = "completion"
+    ) -> Tuple[str, Any]:
+        """
+        Call the primary model; if it has not answered within the hedge delay
+        and the budget allows, race a second request on the next candidate.
+        The first success wins and the other request is cancelled. Errors from
+        the primary propagate so the caller can fall back as usual.
+        """
+        self.hedging.on_request()
+        started = time.perf_counter()
+        primary_task = asyncio.ensure_future(call(primary))
+
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=self.hedging.delay_seconds(purpose, primary))
+        except BaseException:
+            primary_task.cancel()
+            raise
+
+        if done or not self.hedging.try_acquire():
+            return primary, await primary_task
+
+        logger.info(f"Hedging slow call to '{primary}' with '{secondary}'")
+        hedge_task = asyncio.ensure_future(call(secondary))
+        models = {primary_task: primary, hedge_task: secondary}
+        pending = set(models)
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is None:
+                        self.hedging.record_win(task is hedge_task)
+                        if task is hedge_task and primary_task.done() and primary_task.exception():
+                            self.models.record_failure(primary, primary_task.exception())
+                        elif task is hedge_task:
+                            # Censored sample: the cancelled primary took at least this long,
+                            # and dropping it would pull the hedge delay down over time
+                            self.hedging.record_latency(
+                                (time.perf_counter() - started) * 1000, purpose, primary
+                            )
+                        return models[task], task.result()
+
+                    if task is hedge_task:
+                        failed_models.add(secondary)
+                        self.models.record_failure(secondary, error)
+
+            # Both failed: surface the primary's error to the caller
+            raise primary_task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """Stream completion text deltas from LLM as they are generated"""
+        system_message, anthropic_messages = self._split_messages(messages)
+        candidate_models = await self.models.candidates()
+
+        last_error: Optional[Exception] = None
+        attempted_models: List[str] = []
+
+        for model_name in candidate_models:
+            attempted_models.append(model_name)
+            request_kwargs = self._request_kwargs(
+                model_name, system_message, anthropic_messages, temperature, max_tokens
+            )
+
+            for _ in range(2):
+                emitted = False
+                try:
+                    async with self.client.messages.stream(**request_kwargs) as stream:
+                        async for text in stream.text_stream:
+                            emitted = True
+                            yield text
+                        final_message = await stream.get_final_message()
+                        self._record_usage(getattr(final_message, "usage", None))
+
+                    self.models.record_success(model_name)
+                    self._log_fallback(model_name)
+                    logger.info("LLM completion streamed successfully")
+                    return
+                except Exception as model_error:
+                    # Once tokens reached the caller the stream cannot be replayed.
+                    if emitted:
+                        self.models.record_failure(model_name, model_error)
+                        logger.error(f"LLM stream interrupted: {str(model_error)}")
+                        raise LLMException(f"LLM stream interrupted: {str(model_error)}")
+
+                    last_error = model_error
+                    if self._drop_temperature(model_name, request_kwargs, model_error):
+                        continue
+                    break
+
+            if self.models.record_failure(model_name, last_error):
+                logger.warning(
+                    f"Model '{model_name}' unavailable: {last_error}. Trying next fallback model."
+                )
+                continue
+
+            logger.error(f"LLM streaming failed: {str(last_error)}")
+            raise LLMException(f"Failed to stream completion: {str(last_error)}")
+
+        raise self._unavailable_error(attempted_models, last_error)
+
     async def generate_sql(
         self,
         user_query: str,
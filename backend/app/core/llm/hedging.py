@@ -0,0 +1,88 @@
+from typing import Any, Dict, Optional, Tuple
+import time
+from app.config import settings
+from app.utils.metrics import metrics
+
+
+class HedgingPolicy:
+    """
+    Decide when a slow LLM call gets a backup request on the next candidate
+    model, with hedges capped to a share of traffic by a token bucket.
+    """
+
+    # Overall latency; per purpose and model under LATENCY_METRIC.<purpose>.<model>
+    LATENCY_METRIC = "llm.completion_ms"
+
+    def __init__(self):
+        self.enabled = settings.LLM_HEDGING_ENABLED
+        self.delay_percentile = settings.LLM_HEDGE_DELAY_PERCENTILE
+        self.min_delay_ms = settings.LLM_HEDGE_MIN_DELAY_MS
+        self.min_samples = settings.LLM_HEDGE_MIN_SAMPLES
+        self.budget = settings.LLM_HEDGE_BUDGET_PERCENT / 100
+        self.delay_refresh_seconds = settings.LLM_HEDGE_DELAY_REFRESH_SECONDS
+        # Every request earns `budget` of a hedge; a small burst is allowed
+        self.max_tokens = max(1.0, self.budget * 100)
+        self._tokens = 0.0
+        # Metric name -> (delay in seconds, when it was computed)
+        self._delays: Dict[str, Tuple[float, float]] = {}
+
+    def _metric(self, purpose: str, model: Optional[str]) -> str:
+        return f"{self.LATENCY_METRIC}.{purpose}.{model}" if model else self.LATENCY_METRIC
+
+    def record_latency(self, elapsed_ms: float, purpose: str = "completion", model: Optional[str] = None):
+        metrics.observe(self.LATENCY_METRIC, elapsed_ms)
+        if model:
+            metrics.observe(self._metric(purpose, model), elapsed_ms)
+
+    def delay_seconds(self, purpose: str = "completion", model: Optional[str] = None) -> float:
+        """
+        Rolling latency percentile for this kind of call on this model, never
+        below the configured floor. Recomputed at most every refresh interval
+        so requests do not sort the latency window each time.
+        """
+        metric = self._metric(purpose, model)
+        now = time.monotonic()
+        cached = self._delays.get(metric)
+        if cached is not None and now - cached[1] < self.delay_refresh_seconds:
+            return cached[0]
+
+        delay_ms = self.min_delay_ms
+        if metrics.get_count(metric) >= self.min_samples:
+            delay_ms = max(delay_ms, metrics.percentile(metric, self.delay_percentile))
+        self._delays[metric] = (delay_ms / 1000, now)
+        return delay_ms / 1000
+
+    def on_request(self):
+        """Count a hedge-eligible request and earn its share of the budget"""
+        metrics.increment("llm.hedge.requests")
+        self._tokens = min(self.max_tokens, self._tokens + self.budget)
+
+    def try_acquire(self) -> bool:
+        """Spend one hedge from the budget if available"""
+        if self._tokens < 1.0:
+            metrics.increment("llm.hedge.budget_exhausted")
+            return False
+        self._tokens -= 1.0
+        metrics.increment("llm.hedge.fired")
+        return True
+
+    def record_win(self, hedge_won: bool):
+        metrics.increment("llm.hedge.hedge_wins" if hedge_won else "llm.hedge.primary_wins")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge rate over eligible requests and how often the hedge won"""
+        requests = metrics.get_counter("llm.hedge.requests")
+        fired = metrics.get_counter("llm.hedge.fired")
+        hedge_wins = metrics.get_counter("llm.hedge.hedge_wins")
+        return {
+            "enabled": self.enabled,
+            "delay_ms": {
+                metric[len(self.LATENCY_METRIC) + 1:] or "all": round(delay * 1000, 1)
+                for metric, (delay, _) in self._delays.items()
+            },
+            "requests": requests,
+            "hedged": fired,
+            "hedge_rate": round(fired / requests, 4) if requests else 0.0,
+            "hedge_wins": hedge_wins,
+            "win_rate": round(hedge_wins / fired, 4) if fired else 0.0,
+        }
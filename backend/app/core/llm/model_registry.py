@@ -0,0 +1,234 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import time
+from anthropic import APIConnectionError
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+class ModelHealthRegistry:
+    """
+    Ordered candidate models with a circuit breaker per model, so requests
+    never spend a round trip on a model known to be unavailable.
+    """
+
+    def __init__(self, list_models: Callable[[], Awaitable[List[str]]]):
+        self.list_models = list_models
+        self.excluded_model_keywords = self._parse_list(settings.EXCLUDED_MODEL_KEYWORDS, lower=True)
+        self.configured = self._filter_excluded_models(self._unique_preserve_order(
+            [settings.MODEL_NAME] + self._parse_list(settings.FALLBACK_MODELS)
+        ))
+        self.auto_discover_models = settings.AUTO_DISCOVER_MODELS
+        self.refresh_interval = settings.MODEL_DISCOVERY_REFRESH_SECONDS
+        self.failure_threshold = settings.MODEL_BREAKER_FAILURE_THRESHOLD
+        self.cooldown_seconds = settings.MODEL_BREAKER_COOLDOWN_SECONDS
+        self.not_found_cooldown_seconds = settings.MODEL_NOT_FOUND_COOLDOWN_SECONDS
+
+        self._available: Optional[List[str]] = None
+        self._ordered: List[str] = list(self.configured)
+        self._health: Dict[str, Dict[str, Any]] = {}
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _parse_list(raw: str, lower: bool = False) -> List[str]:
+        """Parse a comma-separated settings value."""
+        items = [item.strip() for item in raw.split(",") if item.strip()]
+        return [item.lower() for item in items] if lower else items
+
+    @staticmethod
+    def _unique_preserve_order(items: List[str]) -> List[str]:
+        """Return unique items while preserving their first-seen order."""
+        return list(dict.fromkeys(items))
+
+    def _filter_excluded_models(self, models: List[str]) -> List[str]:
+        """Exclude model IDs containing configured blocked keywords."""
+        if not self.excluded_model_keywords:
+            return models
+
+        return [
+            model for model in models
+            if not any(keyword in model.lower() for keyword in self.excluded_model_keywords)
+        ]
+
+    async def candidates(self, preferred: Optional[str] = None) -> List[str]:
+        """
+        Precomputed candidate order minus models whose breaker is open.
+        A preferred model (e.g. chosen by the router) is tried first.
+        """
+        if self.auto_discover_models and self._available is None:
+            await self.refresh(force=False)
+
+        ordered = self._ordered
+        if preferred and self._allowed(preferred):
+            ordered = [preferred] + [model for model in ordered if model != preferred]
+
+        now = time.monotonic()
+        return [model for model in ordered if not self._is_open(model, now)]
+
+    def _allowed(self, model: str) -> bool:
+        """Not excluded by keyword and, once discovery succeeded, listed by it"""
+        if not self._filter_excluded_models([model]):
+            return False
+        if self.auto_discover_models and self._available and model not in self._available:
+            logger.warning(f"Preferred model '{model}' is not available; using default order")
+            return False
+        return True
+
+    async def refresh(self, force: bool = True):
+        """
+        Re-discover available models and recompute the candidate order.
+        With force=False it is a no-op once discovery has already run.
+        """
+        async with self._refresh_lock:
+            # Concurrent first requests wait here; only one of them lists models
+            if not force and self._available is not None:
+                return
+            try:
+                discovered = self._filter_excluded_models(
+                    self._unique_preserve_order(await self.list_models())
+                )
+            except Exception as e:
+                logger.warning(f"Unable to discover Anthropic models automatically: {e}")
+                discovered = None
+
+            if discovered:
+                self._available = discovered
+                # A model listed again is worth another try
+                for model in discovered:
+                    health = self._health.get(model)
+                    if health is not None and health["reason"] == "not_found":
+                        self._health.pop(model)
+            elif self._available is None:
+                self._available = []
+
+            self._ordered = self._build_candidate_models()
+            metrics.increment("llm_models.refreshes")
+
+    def _build_candidate_models(self) -> List[str]:
+        """Build ordered candidate list, preferring configured and available models."""
+        if not self.auto_discover_models or not self._available:
+            return list(self.configured)
+
+        configured_available = [m for m in self.configured if m in self._available]
+        extra_available = [m for m in self._available if m not in configured_available]
+
+        if configured_available:
+            return configured_available + extra_available
+
+        logger.warning(
+            "None of the configured models are available for this API key. "
+            "Falling back to discovered available models."
+        )
+        return list(self._available)
+
+    def record_success(self, model: str):
+        health = self._health.get(model)
+        if health is not None:
+            health["failures"] = 0
+            health["open_until"] = 0.0
+            health["reason"] = None
+
+    def record_failure(self, model: str, error: Exception) -> bool:
+        """
+        Update the model's breaker after a failed call.
+        Returns True when the error is model-specific and the next candidate
+        should be tried, False when it should be raised to the caller.
+        """
+        kind = self._classify(error)
+        if kind is None:
+            return False
+
+        health = self._health.setdefault(
+            model,
+            {"failures": 0, "open_until": 0.0, "reason": None, "temperature": True}
+        )
+
+        if kind == "not_found":
+            self._open(model, health, "not_found", self.not_found_cooldown_seconds)
+            return True
+
+        health["failures"] += 1
+        # Half-open after a cool-down: one more failure reopens immediately
+        if health["failures"] >= self.failure_threshold:
+            self._open(model, health, "unavailable", self.cooldown_seconds)
+        return True
+
+    def supports_temperature(self, model: str) -> bool:
+        health = self._health.get(model)
+        return health is None or health["temperature"]
+
+    def mark_no_temperature(self, model: str):
+        """Remember that a model rejects temperature so later calls omit it"""
+        self._health.setdefault(
+            model,
+            {"failures": 0, "open_until": 0.0, "reason": None, "temperature": True}
+        )["temperature"] = False
+
+    def _open(self, model: str, health: Dict[str, Any], reason: str, seconds: float):
+        health["open_until"] = time.monotonic() + seconds
+        health["reason"] = reason
+        metrics.increment(f"llm_models.breaker_opened.{reason}")
+        logger.warning(f"Skipping model '{model}' for {seconds}s ({reason})")
+
+    def _is_open(self, model: str, now: float) -> bool:
+        health = self._health.get(model)
+        return health is not None and health["open_until"] > now
+
+    @staticmethod
+    def _classify(error: Exception) -> Optional[str]:
+        """not_found, unavailable (5xx, overload, connection) or None"""
+        status_code = getattr(error, "status_code", None)
+        error_text = str(error).lower()
+
+        if status_code == 404 or "not_found_error" in error_text:
+            return "not_found"
+        if (
+            (status_code is not None and status_code >= 500)
+            or "overloaded" in error_text
+            or isinstance(error, APIConnectionError)
+        ):
+            return "unavailable"
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Candidate order and breaker state per model"""
+        now = time.monotonic()
+        return {
+            "candidates": list(self._ordered),
+            "discovered": len(self._available or []),
+            "models": {
+                model: {
+                    "state": "open" if self._is_open(model, now) else "closed",
+                    "failures": health["failures"],
+                    "reason": health["reason"],
+                    "retry_in_seconds": round(max(0.0, health["open_until"] - now), 1),
+                    "temperature": health["temperature"],
+                }
+                for model, health in self._health.items()
+            },
+        }
+
+    def start(self):
+        """Refresh discovered models on a background timer"""
+        if not self.auto_discover_models or self.refresh_interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the refresh timer"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
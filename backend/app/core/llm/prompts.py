@@ -4,17 +4,11 @@ from typing import List, Dict, Any
 class PromptTemplates:
     """Collection of prompt templates for LLM"""
     
-    @staticmethod
-    def sql_generation_system_prompt(schema: str, examples: str = "") -> str:
-        """System prompt for SQL generation"""
-        prompt = f"""You are an expert SQL query generator. Convert natural language questions into SQL queries.
-
-Database Schema:
-{schema}
+    SQL_GENERATION_INSTRUCTIONS = """You are an expert SQL query generator. Convert natural language questions into SQL queries.
 
 Guidelines:
 - Generate syntactically correct SQL
-- Use ONLY table names and column names present in the schema above
+- Use ONLY table names and column names present in the database schema below
 - Use table aliases for readability
 - Qualify columns with table aliases when multiple tables are used
 - Include appropriate JOINs for multi-table queries
@@ -24,12 +18,41 @@ Guidelines:
 - Handle NULL values appropriately
 - Do NOT invent tables or columns that are not in the provided schema
 - Return ONLY the SQL query in a code block
-
 """
+    
+    @staticmethod
+    def sql_generation_system_blocks(
+        schema: str,
+        examples: str = "",
+        cache: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        System prompt for SQL generation as content blocks, ordered from most
+        to least stable so the instructions and schema form a cacheable prefix.
+        """
+        schema_block: Dict[str, Any] = {
+            "type": "text",
+            "text": f"Database Schema:\n{schema}\n",
+        }
+        if cache:
+            schema_block["cache_control"] = {"type": "ephemeral"}
+        
+        blocks = [
+            {"type": "text", "text": PromptTemplates.SQL_GENERATION_INSTRUCTIONS},
+            schema_block,
+        ]
         if examples:
-            prompt += f"Examples:\n{examples}\n\n"
+            blocks.append({"type": "text", "text": f"Examples:\n{examples}\n"})
         
-        return prompt
+        return blocks
+    
+    @staticmethod
+    def sql_generation_system_prompt(schema: str, examples: str = "") -> str:
+        """System prompt for SQL generation as plain text"""
+        return "\n".join(
+            block["text"]
+            for block in PromptTemplates.sql_generation_system_blocks(schema, examples, cache=False)
+        )
     
     @staticmethod
     def sql_explanation_prompt(sql: str, schema: str) -> str:
@@ -0,0 +1,159 @@
+from collections import deque
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Set
+import re
+from app.config import settings
+from app.core.database.catalog import DatabaseCatalog
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+AGGREGATION_PATTERN = re.compile(
+    r"\b(average|avg|sum|total|count|how many|number of|per|each|group|max(imum)?|"
+    r"min(imum)?|median|percent(age)?|ratio|share|distribution)\b",
+    re.IGNORECASE
+)
+WINDOW_PATTERN = re.compile(
+    r"\b(rank(ing)?|top \d+|top|bottom|running|cumulative|moving|rolling|"
+    r"percentile|compared?|versus|vs|growth|change|previous|consecutive)\b",
+    re.IGNORECASE
+)
+TIME_PATTERN = re.compile(
+    r"\b(day|daily|week|weekly|month|monthly|quarter|quarterly|year|yearly|annual|"
+    r"since|before|after|between|last|recent|trend|over time|yoy|date)\b",
+    re.IGNORECASE
+)
+
+# Distance charged for tables with no short foreign-key path between them
+UNCONNECTED_HOPS = 3
+
+
+class ModelRouter:
+    """
+    Score each request's complexity before generation and route easy ones
+    to the fast model and hard ones to the strong model.
+    """
+
+    FAST = "fast"
+    STRONG = "strong"
+
+    def __init__(self):
+        self.enabled = settings.MODEL_ROUTING_ENABLED
+        self.threshold = settings.MODEL_ROUTING_THRESHOLD
+        self.models = {
+            self.FAST: settings.FAST_MODEL_NAME or settings.MODEL_NAME,
+            self.STRONG: settings.STRONG_MODEL_NAME or settings.MODEL_NAME,
+        }
+
+    def score(
+        self,
+        user_query: str,
+        tables: List[str],
+        catalog: Optional[DatabaseCatalog] = None
+    ) -> Dict[str, float]:
+        """Cheap complexity features and their weighted total"""
+        # Retrieval always returns top-k tables; count the ones the question names
+        tables = self._mentioned_tables(user_query, tables)
+        features = {
+            "tables": 0.5 * max(0, len(tables) - 1),
+            "fk_hops": 0.5 * self._max_hops(tables, catalog) if catalog is not None else 0.0,
+            "aggregation": 1.0 if AGGREGATION_PATTERN.search(user_query) else 0.0,
+            "window": 1.5 if WINDOW_PATTERN.search(user_query) else 0.0,
+            "time": 1.0 if TIME_PATTERN.search(user_query) else 0.0,
+            "length": min(2.0, len(user_query.split()) / 15),
+        }
+        features["total"] = round(sum(features.values()), 3)
+        return features
+
+    def route(
+        self,
+        user_query: str,
+        tables: List[str],
+        catalog: Optional[DatabaseCatalog] = None
+    ) -> str:
+        """Return the route for a request: fast or strong"""
+        if not self.enabled:
+            return self.FAST
+
+        features = self.score(user_query, tables, catalog)
+        route = self.STRONG if features["total"] >= self.threshold else self.FAST
+        metrics.observe("model_router.score", features["total"])
+        logger.info(f"Routing to {route} model (score {features['total']}): {features}")
+        return route
+
+    def model_for(self, route: str) -> Optional[str]:
+        """Model for a route, or None to use the client's default order"""
+        return self.models[route] if self.enabled else None
+
+    def escalate(self, route: str) -> str:
+        """Route a retry after a validation failure to the strong model"""
+        if self.enabled and route != self.STRONG:
+            metrics.increment("model_router.escalations")
+            logger.info("Escalating SQL generation to the strong model after validation failure")
+            return self.STRONG
+        return route
+
+    def record(self, route: str, valid: bool, elapsed_ms: float, escalated: bool = False):
+        """Per-route outcome of a whole generate-and-validate cycle"""
+        metrics.increment(f"model_router.{route}.requests")
+        metrics.increment(f"model_router.{route}.{'valid' if valid else 'invalid'}")
+        if escalated:
+            metrics.increment(f"model_router.{route}.escalated")
+        metrics.observe(f"model_router.{route}.latency_ms", elapsed_ms)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Success rate and escalations per route"""
+        stats: Dict[str, Any] = {"enabled": self.enabled, "models": dict(self.models)}
+        for route in (self.FAST, self.STRONG):
+            requests = metrics.get_counter(f"model_router.{route}.requests")
+            valid = metrics.get_counter(f"model_router.{route}.valid")
+            stats[route] = {
+                "requests": requests,
+                "success_rate": round(valid / requests, 4) if requests else 0.0,
+                "escalated": metrics.get_counter(f"model_router.{route}.escalated"),
+                "p50_ms": round(metrics.percentile(f"model_router.{route}.latency_ms", 50), 1),
+                "p95_ms": round(metrics.percentile(f"model_router.{route}.latency_ms", 95), 1),
+            }
+        return stats
+
+    @staticmethod
+    def _mentioned_tables(user_query: str, tables: List[str]) -> List[str]:
+        words = {word.rstrip("s") for word in re.findall(r"[a-z0-9]+", user_query.lower())}
+        return [
+            table for table in tables
+            if any(
+                part.rstrip("s") in words
+                for part in re.split(r"[^a-z0-9]+", table.lower()) if len(part) > 2
+            )
+        ]
+
+    @staticmethod
+    def _max_hops(tables: List[str], catalog: DatabaseCatalog) -> int:
+        """Longest shortest foreign-key path between any two of the tables"""
+        keys = [table.lower() for table in tables]
+        longest = 0
+        for source, target in combinations(keys, 2):
+            longest = max(longest, ModelRouter._hops(source, target, catalog.relations))
+            if longest >= UNCONNECTED_HOPS:
+                break
+        return longest
+
+    @staticmethod
+    def _hops(source: str, target: str, relations: Dict[str, Set[str]]) -> int:
+        seen = {source}
+        queue = deque([(source, 0)])
+        while queue:
+            table, distance = queue.popleft()
+            if table == target:
+                return distance
+            if distance + 1 >= UNCONNECTED_HOPS:
+                continue
+            for neighbour in relations.get(table, ()):
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    queue.append((neighbour, distance + 1))
+        return UNCONNECTED_HOPS
+
+
+# Global instance
+model_router = ModelRouter()
@@ -0,0 +1,251 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import os
+import numpy as np
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+class DiskEmbeddingStore:
+    """
+    Append-only float32 vector file plus key index that survives restarts.
+    Past max_entries the oldest rows are evicted by rewriting the files
+    down to COMPACT_RATIO of capacity, so compaction is infrequent.
+    """
+
+    COMPACT_RATIO = 0.75
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.keys_path = os.path.join(path, "keys.txt")
+        self.meta_path = os.path.join(path, "meta.json")
+        self.dim: Optional[int] = None
+        self.index: Dict[str, int] = {}
+        self._mmap: Optional[np.memmap] = None
+        self._load()
+
+    def _load(self):
+        """Load the key index and drop any half-written trailing rows"""
+        os.makedirs(self.path, exist_ok=True)
+
+        if not os.path.exists(self.meta_path):
+            return
+
+        with open(self.meta_path, "r") as f:
+            self.dim = json.load(f)["dim"]
+
+        keys: List[str] = []
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "r") as f:
+                keys = [line.strip() for line in f if line.strip()]
+
+        row_bytes = self.dim * 4
+        vector_bytes = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        rows = min(len(keys), vector_bytes // row_bytes)
+
+        # A crash between the two appends leaves the files out of step.
+        if vector_bytes != rows * row_bytes:
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+        if len(keys) != rows:
+            keys = keys[:rows]
+            with open(self.keys_path, "w") as f:
+                f.writelines(f"{key}\n" for key in keys)
+
+        self.index = {key: row for row, key in enumerate(keys)}
+        logger.info(f"Loaded {len(self.index)} cached embeddings from {self.path}")
+
+    def get(self, key: str) -> Optional[List[float]]:
+        row = self.index.get(key)
+        if row is None:
+            return None
+
+        if self._mmap is None or row >= self._mmap.shape[0]:
+            self._mmap = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self.index), self.dim)
+            )
+        return self._mmap[row].tolist()
+
+    def put_many(self, items: Dict[str, List[float]]):
+        new_items = {key: vec for key, vec in items.items() if key not in self.index}
+        if len(new_items) > self.max_entries:
+            new_items = dict(list(new_items.items())[-self.max_entries:])
+        if not new_items:
+            return
+
+        vectors = np.asarray(list(new_items.values()), dtype=np.float32)
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            with open(self.meta_path, "w") as f:
+                json.dump({"dim": self.dim}, f)
+        if vectors.shape[1] != self.dim:
+            logger.warning("Embedding dimension changed; skipping disk cache write")
+            return
+
+        if len(self.index) + len(new_items) > self.max_entries:
+            self._compact(max(0, int(self.max_entries * self.COMPACT_RATIO) - len(new_items)))
+
+        with open(self.vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self.keys_path, "a") as f:
+            f.writelines(f"{key}\n" for key in new_items)
+
+        start = len(self.index)
+        for offset, key in enumerate(new_items):
+            self.index[key] = start + offset
+
+
+    def _compact(self, keep: int):
+        """Rewrite the store with only the newest `keep` rows"""
+        keys = sorted(self.index, key=self.index.get)[len(self.index) - keep:] if keep else []
+        rows = np.memmap(
+            self.vectors_path,
+            dtype=np.float32,
+            mode="r",
+            shape=(len(self.index), self.dim)
+        )[len(self.index) - len(keys):]
+
+        with open(self.vectors_path + ".tmp", "wb") as f:
+            f.write(np.ascontiguousarray(rows).tobytes())
+        with open(self.keys_path + ".tmp", "w") as f:
+            f.writelines(f"{key}\n" for key in keys)
+
+        # Without keys.txt a crash mid-swap loads as an empty store, never misaligned
+        os.remove(self.keys_path)
+        os.replace(self.vectors_path + ".tmp", self.vectors_path)
+        os.replace(self.keys_path + ".tmp", self.keys_path)
+
+        logger.info(f"Compacted embedding disk cache from {len(self.index)} to {len(keys)} entries")
+        metrics.increment("embedding_cache.disk_evictions", len(self.index) - len(keys))
+        self.index = {key: row for row, key in enumerate(keys)}
+        self._mmap = None
+
+
+class EmbeddingCache:
+    """
+    Content-hash keyed in-memory LRU for embeddings with an optional disk
+    tier. Only writes made with persist=True (schema documents) reach the
+    disk, which evicts its oldest rows once full.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int,
+        storage_path: Optional[str] = None,
+        disk_max_entries: int = 50000
+    ):
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        # The memory lock is never held across disk I/O, so event-loop
+        # callers touching only memory do not wait behind a disk write
+        self._lock = Lock()
+        self._disk_lock = Lock()
+        self._disk: Optional[DiskEmbeddingStore] = None
+
+        if storage_path:
+            # One directory per model keeps vector dimensions consistent.
+            model_dir = hashlib.sha1(model_name.encode()).hexdigest()[:16]
+            try:
+                self._disk = DiskEmbeddingStore(
+                    os.path.join(storage_path, model_dir),
+                    max_entries=disk_max_entries
+                )
+            except Exception as e:
+                logger.warning(f"Embedding disk cache unavailable: {str(e)}")
+
+    def make_key(self, text: str) -> str:
+        """Key on the model as well as the text so model changes invalidate entries"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Look up embeddings, returning None for misses"""
+        keys = [self.make_key(text) for text in texts]
+        results = self._memory_lookup(keys)
+
+        missing = [i for i, embedding in enumerate(results) if embedding is None]
+        if missing and self._disk is not None:
+            # Disk reads hold only the disk lock so memory lookups never wait on I/O
+            with self._disk_lock:
+                found = {i: self._disk.get(keys[i]) for i in missing}
+            with self._lock:
+                for i, embedding in found.items():
+                    if embedding is not None:
+                        results[i] = embedding
+                        self._remember(keys[i], embedding)
+
+        for embedding in results:
+            metrics.increment(
+                "embedding_cache.hits" if embedding is not None else "embedding_cache.misses"
+            )
+        return results
+
+    def get(self, text: str) -> Optional[List[float]]:
+        return self.get_many([text])[0]
+
+    async def aget_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """get_many with disk reads kept off the event loop"""
+        if self._disk is None:
+            return self.get_many(texts)
+        return await asyncio.to_thread(self.get_many, texts)
+
+    def _memory_lookup(self, keys: List[str]) -> List[Optional[List[float]]]:
+        with self._lock:
+            results = []
+            for key in keys:
+                embedding = self._memory.get(key)
+                if embedding is not None:
+                    self._memory.move_to_end(key)
+                results.append(embedding)
+            return results
+
+    def put_many(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        persist: bool = False
+    ):
+        """Store embeddings in memory and, when persist is set, on disk"""
+        items = {self.make_key(text): embedding for text, embedding in zip(texts, embeddings)}
+
+        with self._lock:
+            for key, embedding in items.items():
+                self._remember(key, embedding)
+
+        if persist and self._disk is not None:
+            try:
+                with self._disk_lock:
+                    self._disk.put_many(items)
+            except Exception as e:
+                logger.warning(f"Embedding disk cache write failed: {str(e)}")
+
+    def put(self, text: str, embedding: List[float]):
+        self.put_many([text], [embedding])
+
+    async def aput_many(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        persist: bool = False
+    ):
+        """put_many with disk writes kept off the event loop"""
+        if not persist or self._disk is None:
+            self.put_many(texts, embeddings)
+            return
+        await asyncio.to_thread(self.put_many, texts, embeddings, True)
+
+    def _remember(self, key: str, embedding: List[float]):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
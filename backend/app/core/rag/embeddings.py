@@ -1,9 +1,78 @@
-from typing import List, Optional
+from typing import Callable, List, Optional, Set, Tuple
 import asyncio
 import os
+import time
 from app.config import settings
 from app.utils.logger import logger
+from app.utils.metrics import metrics
 from app.utils.exceptions import VectorStoreException
+from app.core.rag.embedding_cache import EmbeddingCache
+
+
+class EmbeddingBatcher:
+    """Coalesce concurrent single-text embedding requests into batched encode calls"""
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], List[List[float]]],
+        max_batch_size: int,
+        max_wait_ms: float
+    ):
+        self.encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> List[float]:
+        """Queue a text and wait for its embedding from the next batch"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the pending texts to a single encode call"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        texts = [text for text, _, _ in batch]
+        started = time.perf_counter()
+
+        try:
+            loop = asyncio.get_running_loop()
+            embeddings = await loop.run_in_executor(None, self.encode, texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        finished = time.perf_counter()
+        metrics.observe("embedding.batch_size", len(batch))
+        metrics.observe("embedding.batch_encode_ms", (finished - started) * 1000)
+
+        for (_, future, enqueued), embedding in zip(batch, embeddings):
+            metrics.observe("embedding.request_latency_ms", (finished - enqueued) * 1000)
+            if not future.done():
+                future.set_result(embedding)
 
 
 class EmbeddingGenerator:
@@ -12,6 +81,17 @@ class EmbeddingGenerator:
     def __init__(self):
         self.model_name = settings.EMBEDDING_MODEL
         self.model = None
+        self.cache = EmbeddingCache(
+            model_name=self.model_name,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            storage_path=settings.EMBEDDING_CACHE_PATH or None,
+            disk_max_entries=settings.EMBEDDING_DISK_CACHE_MAX_ENTRIES
+        )
+        self.batcher = EmbeddingBatcher(
+            encode=self._encode,
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+        )
         
     
     def _load_model(self):
@@ -32,18 +112,25 @@ class EmbeddingGenerator:
         """Load model on first use to reduce startup memory usage."""
         if self.model is None:
             self._load_model()
+
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        """Encode a batch of texts in one forward pass"""
+        return self.model.encode(texts, convert_to_numpy=True).tolist()
     
 
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single text"""
         try:
+            cached = (await self.cache.aget_many([text]))[0]
+            if cached is not None:
+                return cached
+
             self._ensure_model_loaded()
             
-            loop = asyncio.get_event_loop()
-            embedding = await loop.run_in_executor(
-                None,
-                lambda: self.model.encode(text, convert_to_numpy=True).tolist()
-            )
+            # Concurrent callers share one batched encode call
+            embedding = await self.batcher.submit(text)
+            await self.cache.aput_many([text], [embedding])
             logger.info(f"Generated embedding for text of length {len(text)}")
             return embedding
         
@@ -54,14 +141,24 @@ class EmbeddingGenerator:
     async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for multiple texts"""
         try:
-            self._ensure_model_loaded()
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
-            embeddings = await loop.run_in_executor(
-                None,
-                lambda: self.model.encode(texts, convert_to_numpy=True).tolist()
+            embeddings = await self.cache.aget_many(texts)
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+            if missing:
+                self._ensure_model_loaded()
+                missing_texts = [texts[i] for i in missing]
+                # Run in thread pool to avoid blocking
+                loop = asyncio.get_event_loop()
+                encoded = await loop.run_in_executor(None, self._encode, missing_texts)
+                # Batch callers embed schema documents, which are worth keeping on disk
+                await self.cache.aput_many(missing_texts, encoded, persist=True)
+                for i, embedding in zip(missing, encoded):
+                    embeddings[i] = embedding
+
+            logger.info(
+                f"Generated {len(missing)} embeddings "
+                f"({len(texts) - len(missing)} served from cache)"
             )
-            logger.info(f"Generated {len(embeddings)} embeddings")
             return embeddings
         
         except Exception as e:
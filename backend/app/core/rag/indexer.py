@@ -1,9 +1,12 @@
-from typing import List, Dict, Any
+from typing import Callable, Iterator, List, Dict, Any, Optional
+import asyncio
+import hashlib
+from app.config import settings
 from app.core.rag.vector_store import get_vector_store
 from app.core.rag.embeddings import get_embedding_generator
+from app.core.rag.vector_index import vector_index_registry
 from app.models.schema import TableSchema, DatabaseSchema
 from app.utils.logger import logger
-import uuid
 
 
 class SchemaIndexer:
@@ -25,48 +28,160 @@ class SchemaIndexer:
     
     async def index_database_schema(
         self,
-        database_schema: DatabaseSchema
+        database_schema: DatabaseSchema,
+        progress: Optional[Callable[[str, int, int], None]] = None
     ) -> Dict[str, int]:
-        """Index entire database schema"""
-        logger.info(f"Indexing schema for database: {database_schema.name}")
+        """Index an already extracted database schema"""
+        batch_size = settings.INDEXING_BATCH_SIZE
+        tables = database_schema.tables
+        batches = (tables[i:i + batch_size] for i in range(0, len(tables), batch_size))
+        
+        return await self.index_table_batches(
+            database_schema.name,
+            batches,
+            total_tables=len(tables),
+            progress=progress
+        )
+    
+    async def index_table_batches(
+        self,
+        database_name: str,
+        batches: Iterator[List[TableSchema]],
+        total_tables: int = 0,
+        progress: Optional[Callable[[str, int, int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        Index a schema incrementally as a stream of table batches.
+        Only tables whose rendered document changed are re-embedded. Embedding
+        batch N+1 overlaps with writing batch N, so at most two batches are
+        held in memory regardless of schema size.
+        """
+        logger.info(f"Indexing schema for database: {database_name}")
+        report = progress or (lambda phase, done, total: None)
         vector_store = self._get_vector_store()
         embedding_generator = self._get_embedding_generator()
         
-        documents = []
-        metadatas = []
-        ids = []
-        
-        # Delete existing documents for this database
-        vector_store.delete_by_database(database_schema.name)
+        # Content hashes of what is currently indexed, keyed by document ID
+        existing = await vector_store.aget_metadata_by_database(database_name)
+        existing_hashes = {
+            doc_id: (meta or {}).get("content_hash")
+            for doc_id, meta in zip(existing["ids"], existing["metadatas"])
+        }
         
-        # Process each table
-        for table in database_schema.tables:
-            doc_data = self._create_table_document(table, database_schema.name)
-            documents.append(doc_data["document"])
-            metadatas.append(doc_data["metadata"])
-            ids.append(doc_data["id"])
+        current_ids = set()
+        tables_seen = columns_seen = 0
+        added = changed = unchanged = 0
+        embedded = stored = 0
+        pending_write: Optional[asyncio.Task] = None
+        
+        report("extract", 0, total_tables)
+        
+        try:
+            while True:
+                # Batches may come from blocking catalog queries, so pull off the loop
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    break
+                
+                documents = []
+                metadatas = []
+                ids = []
+                
+                for table in batch:
+                    doc_data = self._create_table_document(table, database_name)
+                    doc_id = doc_data["id"]
+                    current_ids.add(doc_id)
+                    columns_seen += len(table.columns)
+                    
+                    if doc_id not in existing_hashes:
+                        added += 1
+                    elif existing_hashes[doc_id] != doc_data["metadata"]["content_hash"]:
+                        changed += 1
+                    else:
+                        unchanged += 1
+                        continue
+                    
+                    documents.append(doc_data["document"])
+                    metadatas.append(doc_data["metadata"])
+                    ids.append(doc_id)
+                
+                tables_seen += len(batch)
+                report("extract", tables_seen, max(total_tables, tables_seen))
+                
+                if not documents:
+                    continue
+                
+                embeddings = await embedding_generator.generate_embeddings(documents)
+                embedded += len(documents)
+                report("embed", embedded, added + changed)
+                
+                # Keep a single write in flight so memory stays bounded
+                if pending_write is not None:
+                    stored += await pending_write
+                    report("store", stored, added + changed)
+                
+                pending_write = asyncio.create_task(
+                    self._write_batch(vector_store, documents, embeddings, metadatas, ids)
+                )
+            
+            if pending_write is not None:
+                stored += await pending_write
+                pending_write = None
+        
+        finally:
+            if pending_write is not None:
+                pending_write.cancel()
+        
+        # Includes documents from before IDs were deterministic
+        removed_ids = [doc_id for doc_id in existing_hashes if doc_id not in current_ids]
+        
+        if removed_ids:
+            await vector_store.adelete_ids(removed_ids)
+        
+        report("embed", embedded, embedded)
+        report("store", stored + len(removed_ids), stored + len(removed_ids))
+        
+        if stored or removed_ids:
+            # Next retrieval reloads the in-memory index from Chroma
+            vector_index_registry.invalidate(database_name)
         
-
-        # Generate embeddings
-        embeddings = await embedding_generator.generate_embeddings(documents)
+        stats = {
+            "tables_indexed": tables_seen,
+            "columns_indexed": columns_seen,
+            "tables_added": added,
+            "tables_changed": changed,
+            "tables_removed": len(removed_ids),
+            "tables_unchanged": unchanged
+        }
         
+        logger.info(
+            f"Indexed {stats['tables_indexed']} tables with {stats['columns_indexed']} columns "
+            f"(added {added}, changed {changed}, removed {len(removed_ids)}, unchanged {unchanged})"
+        )
         
-        # Add to vector store
-        vector_store.add_documents(
+        return stats
+    
+    async def count_documents(self, database_name: str) -> int:
+        """Number of table documents currently indexed for a database"""
+        existing = await self._get_vector_store().aget_metadata_by_database(database_name)
+        return len(existing["ids"])
+    
+    async def _write_batch(
+        self,
+        vector_store,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ) -> int:
+        """Upsert one batch and return how many documents were written"""
+        await vector_store.aupsert_documents(
             documents=documents,
             embeddings=embeddings,
             metadatas=metadatas,
             ids=ids
         )
-        
-        stats = {
-            "tables_indexed": len(database_schema.tables),
-            "columns_indexed": sum(len(t.columns) for t in database_schema.tables)
-        }
-        
-        logger.info(f"Indexed {stats['tables_indexed']} tables with {stats['columns_indexed']} columns")
-        
-        return stats
+        return len(ids)
     
     def _create_table_document(
         self,
@@ -107,11 +222,17 @@ class SchemaIndexer:
             "database_name": database_name,
             "table_name": table.name,
             "column_count": len(table.columns),
-            "has_foreign_keys": len(table.foreign_keys) > 0
+            "has_foreign_keys": len(table.foreign_keys) > 0,
+            # The model is part of the hash so switching EMBEDDING_MODEL
+            # re-embeds every table instead of mixing vector spaces
+            "content_hash": hashlib.sha256(
+                f"{settings.EMBEDDING_MODEL}\0{document}".encode()
+            ).hexdigest()
         }
         
-        # Generate unique ID
-        doc_id = f"{database_name}_{table.name}_{uuid.uuid4().hex[:8]}"
+        # Stable ID so re-indexing can upsert and diff table by table
+        id_hash = hashlib.sha1(f"{database_name}\0{table.name}".encode()).hexdigest()[:8]
+        doc_id = f"{database_name}_{table.name}_{id_hash}"
         
         return {
             "document": document,
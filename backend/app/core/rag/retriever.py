@@ -1,6 +1,8 @@
 from typing import List, Dict, Any
+from app.core.database.catalog import schema_catalog
 from app.core.rag.vector_store import get_vector_store
 from app.core.rag.embeddings import get_embedding_generator
+from app.core.rag.vector_index import vector_index_registry
 from app.utils.logger import logger
 
 
@@ -35,12 +37,19 @@ class SchemaRetriever:
         # Generate query embedding
         query_embedding = await embedding_generator.generate_embedding(user_query)
         
-        # Query vector store
-        results = vector_store.query(
-            query_embedding=query_embedding,
-            n_results=top_k,
-            where={"database_name": database_name}
-        )
+        # Query the in-memory index; Chroma stays the durable store
+        if vector_index_registry.enabled:
+            results = await vector_index_registry.query(
+                database_name=database_name,
+                query_embedding=query_embedding,
+                n_results=top_k
+            )
+        else:
+            results = await vector_store.aquery(
+                query_embedding=query_embedding,
+                n_results=top_k,
+                where={"database_name": database_name}
+            )
         
         # Format context
         context = self._format_context(results)
@@ -50,7 +59,8 @@ class SchemaRetriever:
         return {
             "context": context,
             "retrieved_documents": results["documents"],
-            "metadata": results["metadatas"]
+            "metadata": results["metadatas"],
+            "query_embedding": query_embedding
         }
     
     def _format_context(self, results: Dict[str, Any]) -> str:
@@ -60,7 +70,12 @@ class SchemaRetriever:
         
         context_parts = []
         
-        for doc, meta in zip(documents, metadatas):
+        # Order by table rather than by score so the same tables always render
+        # the same prompt text, which keeps the prompt cache prefix stable
+        for doc, meta in sorted(
+            zip(documents, metadatas),
+            key=lambda item: (item[1].get("table_name") or "", item[0])
+        ):
             table_name = meta.get("table_name", "Unknown")
             context_parts.append(f"Table: {table_name}\n{doc}\n")
         
@@ -71,16 +86,18 @@ class SchemaRetriever:
         table_names: List[str],
         database_name: str
     ) -> str:
-        """Retrieve specific table schemas by name"""
+        """Retrieve specific table schemas by name from the schema catalog"""
         logger.info(f"Retrieving schemas for tables: {table_names}")
         
-        # This would query the vector store for specific tables
-        # For now, we'll use a simple implementation
+        catalog = await schema_catalog.aget(database_name)
         context_parts = []
         
         for table_name in table_names:
-            # In production, query vector store with table name filter
-            context_parts.append(f"Table: {table_name}")
+            description = catalog.describe_table(table_name)
+            if description is None:
+                logger.warning(f"Table '{table_name}' not found in catalog for {database_name}")
+                continue
+            context_parts.append(description)
         
         return "\n\n".join(context_parts)
 
@@ -0,0 +1,156 @@
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import re
+import numpy as np
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+# Numbers and quoted values; questions differing only in these embed almost
+# identically but need different SQL ("last 30 days" vs "last 60 days")
+LITERAL_PATTERN = re.compile(r"'[^']*'|\"[^\"]*\"|\d+(?:[.,:/-]\d+)*")
+
+
+def _literals(question: str) -> Tuple[str, ...]:
+    return tuple(sorted(match.lower() for match in LITERAL_PATTERN.findall(question)))
+
+
+class _DatabaseSemanticCache:
+    """LRU of validated question/SQL pairs for a single database"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def _build_matrix(self):
+        """Stack normalized embeddings so a lookup is one matrix-vector product"""
+        self._keys = list(self.entries.keys())
+        self._matrix = np.vstack([self.entries[k]["embedding"] for k in self._keys])
+
+    def lookup(
+        self,
+        question: str,
+        embedding: np.ndarray,
+        threshold: float
+    ) -> Optional[Dict[str, Any]]:
+        """Most similar entry above threshold whose literals match the question's"""
+        if not self.entries:
+            return None
+        if self._matrix is None:
+            self._build_matrix()
+
+        scores = self._matrix @ embedding
+        literals = _literals(question)
+        for index in np.argsort(-scores):
+            score = float(scores[index])
+            if score < threshold:
+                return None
+
+            key = self._keys[int(index)]
+            if self.entries[key]["literals"] != literals:
+                metrics.increment("semantic_cache.literal_mismatches")
+                continue
+
+            self.entries.move_to_end(key)
+            return {**self.entries[key], "similarity": score}
+        return None
+
+    def add(self, question: str, sql: str, embedding: np.ndarray):
+        key = question.strip().lower()
+        self.entries[key] = {
+            "question": question,
+            "sql": sql,
+            "embedding": embedding,
+            "literals": _literals(question),
+        }
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._matrix = None
+
+    def discard(self, question: str):
+        if self.entries.pop(question.strip().lower(), None) is not None:
+            self._matrix = None
+
+
+class SemanticCache:
+    """
+    Return previously validated SQL for questions similar to earlier ones.
+    Entries live in this process only, so invalidation after a re-index does
+    not reach other workers.
+    """
+
+    def __init__(self):
+        self.enabled = settings.SEMANTIC_CACHE_ENABLED
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self._caches: Dict[str, _DatabaseSemanticCache] = {}
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(
+        self,
+        database_name: str,
+        question: str,
+        embedding: List[float]
+    ) -> Optional[Dict[str, Any]]:
+        """Find a cached entry whose question embedding is close enough"""
+        if not self.enabled:
+            return None
+
+        cache = self._caches.get(database_name)
+        hit = cache.lookup(question, self._normalize(embedding), self.threshold) if cache else None
+
+        if hit is None:
+            metrics.increment("semantic_cache.misses")
+            return None
+
+        metrics.increment("semantic_cache.hits")
+        logger.info(
+            f"Semantic cache hit for database {database_name} "
+            f"(similarity {hit['similarity']:.3f}): {hit['question']}"
+        )
+        return hit
+
+    def add(
+        self,
+        database_name: str,
+        question: str,
+        sql: str,
+        embedding: List[float]
+    ):
+        """Store a validated question/SQL pair"""
+        if not self.enabled:
+            return
+
+        cache = self._caches.get(database_name)
+        if cache is None:
+            cache = self._caches[database_name] = _DatabaseSemanticCache(self.max_entries)
+        cache.add(question, sql, self._normalize(embedding))
+
+    def discard(self, database_name: str, question: str):
+        """Drop an entry that no longer validates"""
+        cache = self._caches.get(database_name)
+        if cache:
+            cache.discard(question)
+
+    def invalidate(self, database_name: str):
+        """Drop every entry for a database, e.g. after its schema is re-indexed"""
+        if self._caches.pop(database_name, None) is not None:
+            metrics.increment("semantic_cache.invalidations")
+            logger.info(f"Invalidated semantic cache for database: {database_name}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get entry counts per database"""
+        return {name: len(cache.entries) for name, cache in self._caches.items()}
+
+
+# Global instance
+semantic_cache = SemanticCache()
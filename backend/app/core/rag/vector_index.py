@@ -0,0 +1,124 @@
+from typing import List, Dict, Any, Optional
+import asyncio
+import time
+import numpy as np
+from app.config import settings
+from app.core.rag.vector_store import get_vector_store
+from app.utils.logger import logger
+
+
+class DatabaseVectorIndex:
+    """Read-optimized brute-force index over one database's schema embeddings"""
+
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.loaded_at = time.monotonic()
+
+        if embeddings is not None and len(embeddings):
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.matrix = matrix / norms
+        else:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query(
+        self,
+        query_embedding: List[float],
+        n_results: int = 5
+    ) -> Dict[str, Any]:
+        """Return the top-k documents by cosine similarity, in VectorStore.query shape"""
+        if not len(self):
+            return {"documents": [], "metadatas": [], "distances": [], "ids": []}
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = self.matrix @ query
+        k = min(n_results, len(scores))
+
+        # argpartition is O(n); only the k winners are fully sorted
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return {
+            "documents": [self.documents[i] for i in top],
+            "metadatas": [self.metadatas[i] for i in top],
+            "distances": [float(1.0 - scores[i]) for i in top],
+            "ids": [self.ids[i] for i in top]
+        }
+
+
+class VectorIndexRegistry:
+    """Lazily loaded in-memory indexes per database, backed by the Chroma store"""
+
+    def __init__(self):
+        self.enabled = settings.VECTOR_INDEX_IN_MEMORY
+        # Re-indexing from another process (e.g. scripts/index_schemas.py)
+        # cannot invalidate this cache, so entries also expire after a TTL
+        self.ttl = settings.VECTOR_INDEX_TTL_SECONDS
+        self._indexes: Dict[str, DatabaseVectorIndex] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._generations: Dict[str, int] = {}
+
+    async def get_index(self, database_name: str) -> DatabaseVectorIndex:
+        """Return the index for a database, loading it from Chroma on first use"""
+        index = self._indexes.get(database_name)
+        if index is not None and not self._expired(index):
+            return index
+
+        lock = self._locks.setdefault(database_name, asyncio.Lock())
+        async with lock:
+            index = self._indexes.get(database_name)
+            if index is None or self._expired(index):
+                generation = self._generations.get(database_name, 0)
+                records = await get_vector_store().aget_by_database(database_name)
+                index = DatabaseVectorIndex(
+                    ids=records["ids"],
+                    documents=records["documents"],
+                    metadatas=records["metadatas"],
+                    embeddings=records["embeddings"]
+                )
+                # Skip caching if the schema was re-indexed while loading
+                if self._generations.get(database_name, 0) == generation:
+                    self._indexes[database_name] = index
+                logger.info(f"Loaded in-memory vector index for {database_name} ({len(index)} documents)")
+
+        return index
+
+    def _expired(self, index: DatabaseVectorIndex) -> bool:
+        return self.ttl > 0 and time.monotonic() - index.loaded_at > self.ttl
+
+    async def query(
+        self,
+        database_name: str,
+        query_embedding: List[float],
+        n_results: int = 5
+    ) -> Dict[str, Any]:
+        """Query the in-memory index for a database"""
+        index = await self.get_index(database_name)
+        return index.query(query_embedding, n_results)
+
+    def invalidate(self, database_name: Optional[str] = None):
+        """Drop cached indexes so the next query reloads from Chroma"""
+        names = list(self._locks) if database_name is None else [database_name]
+        for name in names:
+            self._indexes.pop(name, None)
+            self._generations[name] = self._generations.get(name, 0) + 1
+
+
+# Global instance
+vector_index_registry = VectorIndexRegistry()
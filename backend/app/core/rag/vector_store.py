@@ -1,6 +1,9 @@
 import chromadb
 from chromadb.config import Settings as ChromaSettings
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, List, Dict, Any, Optional
+import asyncio
 from app.config import settings
 from app.utils.logger import logger
 from app.utils.exceptions import VectorStoreException
@@ -13,6 +16,11 @@ class VectorStore:
     def __init__(self):
         self.client = None
         self.collection = None
+        # Dedicated bounded pool so Chroma/SQLite work never runs on the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.VECTOR_STORE_MAX_WORKERS,
+            thread_name_prefix="vector-store"
+        )
         self._initialize()
     
     def _initialize(self):
@@ -39,6 +47,13 @@ class VectorStore:
             logger.error(f"Vector store initialization failed: {str(e)}")
             raise VectorStoreException(f"Failed to initialize vector store: {str(e)}")
     
+    def _max_batch_size(self) -> int:
+        """Largest batch Chroma accepts in a single write"""
+        try:
+            return self.client.get_max_batch_size()
+        except AttributeError:
+            return 5000
+    
     def add_documents(
         self,
         documents: List[str],
@@ -86,6 +101,81 @@ class VectorStore:
             logger.error(f"Query failed: {str(e)}")
             raise VectorStoreException(f"Failed to query vector store: {str(e)}")
     
+    def upsert_documents(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ):
+        """Insert or replace documents with embeddings by ID"""
+        try:
+            batch_size = self._max_batch_size()
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                self.collection.upsert(
+                    documents=documents[start:end],
+                    embeddings=embeddings[start:end],
+                    metadatas=metadatas[start:end],
+                    ids=ids[start:end]
+                )
+            logger.info(f"Upserted {len(documents)} documents to vector store")
+        
+        except Exception as e:
+            logger.error(f"Failed to upsert documents: {str(e)}")
+            raise VectorStoreException(f"Failed to upsert documents: {str(e)}")
+    
+    def get_metadata_by_database(self, database_name: str) -> Dict[str, Any]:
+        """Get document IDs and metadata (without embeddings) for a database"""
+        try:
+            results = self.collection.get(
+                where={"database_name": database_name},
+                include=["metadatas"]
+            )
+            
+            return {
+                "ids": results["ids"],
+                "metadatas": results["metadatas"]
+            }
+        
+        except Exception as e:
+            logger.error(f"Failed to get metadata: {str(e)}")
+            raise VectorStoreException(f"Failed to get metadata: {str(e)}")
+    
+    def delete_ids(self, ids: List[str]):
+        """Delete documents by ID"""
+        if not ids:
+            return
+        
+        try:
+            batch_size = self._max_batch_size()
+            for start in range(0, len(ids), batch_size):
+                self.collection.delete(ids=ids[start:start + batch_size])
+            logger.info(f"Deleted {len(ids)} documents from vector store")
+        
+        except Exception as e:
+            logger.error(f"Failed to delete documents: {str(e)}")
+            raise VectorStoreException(f"Failed to delete documents: {str(e)}")
+    
+    def get_by_database(self, database_name: str) -> Dict[str, Any]:
+        """Get all documents and embeddings stored for a specific database"""
+        try:
+            results = self.collection.get(
+                where={"database_name": database_name},
+                include=["documents", "metadatas", "embeddings"]
+            )
+            
+            return {
+                "ids": results["ids"],
+                "documents": results["documents"],
+                "metadatas": results["metadatas"],
+                "embeddings": results["embeddings"]
+            }
+        
+        except Exception as e:
+            logger.error(f"Failed to get documents: {str(e)}")
+            raise VectorStoreException(f"Failed to get documents: {str(e)}")
+    
     def delete_by_database(self, database_name: str):
         """Delete all documents for a specific database"""
         try:
@@ -98,6 +188,73 @@ class VectorStore:
             logger.error(f"Failed to delete documents: {str(e)}")
             raise VectorStoreException(f"Failed to delete documents: {str(e)}")
     
+    async def _run_async(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking vector store call on the dedicated thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+    
+    async def aadd_documents(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ):
+        """Async variant of add_documents"""
+        await self._run_async(
+            self.add_documents,
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=ids
+        )
+    
+    async def aquery(
+        self,
+        query_embedding: List[float],
+        n_results: int = 5,
+        where: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Async variant of query"""
+        return await self._run_async(
+            self.query,
+            query_embedding=query_embedding,
+            n_results=n_results,
+            where=where
+        )
+    
+    async def aupsert_documents(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ):
+        """Async variant of upsert_documents"""
+        await self._run_async(
+            self.upsert_documents,
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas,
+            ids=ids
+        )
+    
+    async def aget_metadata_by_database(self, database_name: str) -> Dict[str, Any]:
+        """Async variant of get_metadata_by_database"""
+        return await self._run_async(self.get_metadata_by_database, database_name)
+    
+    async def adelete_ids(self, ids: List[str]):
+        """Async variant of delete_ids"""
+        await self._run_async(self.delete_ids, ids)
+    
+    async def aget_by_database(self, database_name: str) -> Dict[str, Any]:
+        """Async variant of get_by_database"""
+        return await self._run_async(self.get_by_database, database_name)
+    
+    async def adelete_by_database(self, database_name: str):
+        """Async variant of delete_by_database"""
+        await self._run_async(self.delete_by_database, database_name)
+    
     def get_collection_count(self) -> int:
         """Get total count of documents in collection"""
         try:
@@ -1,17 +1,36 @@
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+from sqlalchemy import text
+import asyncio
+import threading
 import time
+from app.config import settings
 from app.core.database.connections import db_manager
 from app.core.sql.validator import sql_validator
 from app.utils.logger import logger
+from app.utils.metrics import metrics
 from app.utils.exceptions import DatabaseException, ValidationException
 
 
+_STREAM_END = object()
+
+
+class _StreamAbandoned(Exception):
+    """Raised in the producer thread when the consumer stops reading"""
+    pass
+
+
 class SQLExecutor:
     """Execute SQL queries safely"""
     
     def __init__(self):
         self.db_manager = db_manager
         self.validator = sql_validator
+        # Bounded pool keeps blocking driver calls off the event loop
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.SQL_EXECUTOR_MAX_WORKERS,
+            thread_name_prefix="sql-executor"
+        )
     
     async def execute(
         self,
@@ -34,37 +53,188 @@ class SQLExecutor:
         sql_to_execute = self._add_limit(sql, limit)
         
         try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self.executor,
+                self._execute_sync,
+                sql_to_execute,
+                connection_string
+            )
             
-            engine = self.db_manager.get_engine(connection_string)
-            
-            
-            start_time = time.time()
-            
-            with engine.connect() as conn:
-                result = conn.execute(sql_to_execute)
-                rows = result.fetchall()
-                columns = result.keys()
-            
-            execution_time = (time.time() - start_time) * 1000  
-            
+            logger.info(f"Query executed successfully, returned {result['row_count']} rows")
             
+            return result
+        
+        except Exception as e:
+            logger.error(f"Query execution failed: {str(e)}")
+            raise DatabaseException(f"Failed to execute query: {str(e)}")
+    
+    def _execute_sync(self, sql: str, connection_string: str) -> Dict[str, Any]:
+        """Run a query on a worker thread and materialize its rows"""
+        engine = self.db_manager.get_engine(connection_string)
+        
+        start_time = time.time()
+        
+        with engine.connect() as conn:
+            result = conn.execute(text(sql))
+            columns = list(result.keys())
             rows_dict = [
                 {col: value for col, value in zip(columns, row)}
-                for row in rows
+                for row in result
             ]
+        
+        execution_time = (time.time() - start_time) * 1000  
+        
+        return {
+            "rows": rows_dict,
+            "row_count": len(rows_dict),
+            "execution_time_ms": round(execution_time, 2),
+            "columns": columns
+        }
+    
+    async def stream(
+        self,
+        sql: str,
+        connection_string: str,
+        limit: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ) -> Tuple[List[str], AsyncIterator[List[tuple]]]:
+        """
+        Execute SQL with a server-side cursor.
+        Returns the column names and an async iterator of row batches; at most
+        SQL_STREAM_QUEUE_SIZE batches are buffered, so memory stays flat
+        regardless of result size.
+        """
+        logger.info("Streaming SQL query")
+        
+        validation_result = self.validator.validate(sql)
+        
+        if not validation_result["is_valid"]:
+            raise ValidationException(
+                f"SQL validation failed: {', '.join(validation_result['errors'])}"
+            )
+        
+        sql_to_execute = self._add_limit(sql, limit) if limit else sql
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.SQL_STREAM_QUEUE_SIZE)
+        stop = threading.Event()
+        producer = loop.run_in_executor(
+            self.executor,
+            self._produce_rows,
+            sql_to_execute,
+            connection_string,
+            batch_size or settings.SQL_STREAM_BATCH_SIZE,
+            queue,
+            loop,
+            stop
+        )
+        
+        # The first item is the column list, or the error that prevented it
+        first = await queue.get()
+        if isinstance(first, Exception):
+            await producer
+            logger.error(f"Query execution failed: {str(first)}")
+            raise DatabaseException(f"Failed to execute query: {str(first)}")
+        
+        async def batches() -> AsyncIterator[List[tuple]]:
+            started = time.perf_counter()
+            row_count = 0
+            try:
+                while True:
+                    item = await self._next_item(queue, producer)
+                    if item is _STREAM_END:
+                        break
+                    if isinstance(item, Exception):
+                        logger.error(f"Query streaming failed: {str(item)}")
+                        raise DatabaseException(f"Failed to execute query: {str(item)}")
+                    row_count += len(item)
+                    yield item
+            finally:
+                # Unblock the producer if the consumer stopped early
+                stop.set()
+                while not queue.empty():
+                    queue.get_nowait()
+                await producer
+                metrics.increment("sql_stream.rows", row_count)
+                metrics.observe("sql_stream.duration_ms", (time.perf_counter() - started) * 1000)
+                logger.info(f"Streamed {row_count} rows")
+        
+        return first, batches()
+    
+    @staticmethod
+    async def _next_item(queue: asyncio.Queue, producer: asyncio.Future) -> Any:
+        """
+        Next queued item, or an error once the producer has finished without
+        an end marker (e.g. it gave up after the idle timeout), so a consumer
+        that resumes late never waits on a queue nobody will fill.
+        """
+        if not queue.empty():
+            return queue.get_nowait()
+
+        getter = asyncio.ensure_future(queue.get())
+        try:
+            await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not getter.done():
+                getter.cancel()
+
+        if getter.done() and not getter.cancelled():
+            return getter.result()
+        if not queue.empty():
+            return queue.get_nowait()
+
+        error = producer.exception()
+        return error or DatabaseException(
+            "Row stream closed after the client stopped reading for "
+            f"{settings.SQL_STREAM_IDLE_TIMEOUT_SECONDS}s"
+        )
+    
+    def _produce_rows(
+        self,
+        sql: str,
+        connection_string: str,
+        batch_size: int,
+        queue: asyncio.Queue,
+        loop: asyncio.AbstractEventLoop,
+        stop: threading.Event
+    ):
+        """Read row batches from a server-side cursor into the asyncio queue"""
+        def put(item):
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            try:
+                future.result(timeout=settings.SQL_STREAM_IDLE_TIMEOUT_SECONDS)
+            except FutureTimeoutError:
+                future.cancel()
+                raise _StreamAbandoned()
+        
+        try:
+            engine = self.db_manager.get_engine(connection_string)
             
-            logger.info(f"Query executed successfully, returned {len(rows_dict)} rows")
+            with engine.connect() as conn:
+                result = conn.execution_options(
+                    stream_results=True,
+                    yield_per=batch_size
+                ).execute(text(sql))
+                put(list(result.keys()))
+                
+                for partition in result.partitions():
+                    if stop.is_set():
+                        return
+                    put([tuple(row) for row in partition])
             
-            return {
-                "rows": rows_dict,
-                "row_count": len(rows_dict),
-                "execution_time_ms": round(execution_time, 2),
-                "columns": list(columns)
-            }
+            if not stop.is_set():
+                put(_STREAM_END)
+        
+        except _StreamAbandoned:
+            logger.warning("Row stream consumer stopped reading; closing cursor")
         
         except Exception as e:
-            logger.error(f"Query execution failed: {str(e)}")
-            raise DatabaseException(f"Failed to execute query: {str(e)}")
+            if not stop.is_set():
+                try:
+                    put(e)
+                except _StreamAbandoned:
+                    pass
     
     def _add_limit(self, sql: str, limit: int) -> str:
         """Add LIMIT clause to query if not present"""
@@ -1,15 +1,57 @@
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
+from app.config import settings
+from app.core.database.catalog import schema_catalog, DatabaseCatalog
 from app.core.llm.chains import sql_generation_chain
+from app.core.llm.router import model_router, ModelRouter
 from app.core.rag.retriever import schema_retriever
+from app.core.rag.semantic_cache import semantic_cache
 from app.utils.logger import logger
+from app.utils.metrics import metrics
 from app.utils.exceptions import SQLGenerationException
 
 
+class GenerationContext:
+    """Per-request state shared by every generation attempt"""
+    
+    def __init__(
+        self,
+        user_query: str,
+        database_name: str,
+        schema_context: str,
+        query_embedding: List[float],
+        system_prompt: List[Dict[str, Any]],
+        tables_used: List[str],
+        confidence: float,
+        cached: Optional[Dict[str, Any]] = None,
+        route: str = ModelRouter.FAST
+    ):
+        self.user_query = user_query
+        self.database_name = database_name
+        self.schema_context = schema_context
+        self.query_embedding = query_embedding
+        self.system_prompt = system_prompt
+        self.tables_used = tables_used
+        self.confidence = confidence
+        self.cached = cached
+        # Escalated to the strong model when a candidate fails validation
+        self.route = route
+    
+    def as_result(self) -> Dict[str, Any]:
+        """Fields every generation result carries"""
+        return {
+            "confidence": self.confidence,
+            "tables_used": self.tables_used,
+            "schema_context": self.schema_context,
+            "query_embedding": self.query_embedding
+        }
+
+
 class SQLGenerator:
     """Generate SQL queries from natural language"""
     
     def __init__(self):
         self.chain = sql_generation_chain
+        self.router = model_router
         self.retriever = None
 
     def _get_retriever(self):
@@ -17,15 +59,16 @@ class SQLGenerator:
             self.retriever = schema_retriever
         return self.retriever
     
-    async def generate(
+    async def prepare(
         self,
         user_query: str,
-        database_name: str,
-        include_explanation: bool = True,
-        validation_feedback: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """Generate SQL query from natural language query"""
-        logger.info(f"Generating SQL for query: {user_query}")
+        database_name: str
+    ) -> GenerationContext:
+        """
+        Retrieval phase: embed the question, retrieve schema context and build
+        the system prompt once per request, for reuse across retry attempts.
+        """
+        logger.info(f"Preparing SQL generation for query: {user_query}")
         retriever = self._get_retriever()
         
         try:
@@ -37,45 +80,102 @@ class SQLGenerator:
             )
             
             schema_context = context_result["context"]
+            query_embedding = context_result["query_embedding"]
+            tables_used = self._extract_tables_from_metadata(context_result["metadata"])
+            catalog = await schema_catalog.aget(database_name)
             
-            # Generate SQL
-            result = await self.chain.generate(
+            return GenerationContext(
                 user_query=user_query,
+                database_name=database_name,
                 schema_context=schema_context,
+                query_embedding=query_embedding,
+                system_prompt=self.chain.build_system_prompt(
+                    self._prompt_schema(catalog, schema_context)
+                ),
+                tables_used=tables_used,
+                confidence=self._calculate_confidence(context_result),
+                cached=semantic_cache.lookup(database_name, user_query, query_embedding),
+                route=self.router.route(user_query, tables_used, catalog)
+            )
+        
+        except Exception as e:
+            logger.error(f"SQL generation failed: {str(e)}")
+            raise SQLGenerationException(f"Failed to generate SQL: {str(e)}")
+    
+    async def generate_sql(
+        self,
+        context: GenerationContext,
+        validation_feedback: Optional[str] = None,
+        temperature: Optional[float] = None,
+        hedge: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Generation phase: produce one SQL candidate from prepared context.
+        Returns the SQL and, if it came from the semantic cache, the cached question.
+        """
+        # Reuse validated SQL from a semantically similar question, but
+        # never when retrying after a validation failure
+        if validation_feedback is None and context.cached:
+            return {
+                "sql_query": context.cached["sql"],
+                "semantic_cache_hit": context.cached["question"]
+            }
+        
+        try:
+            metrics.increment("sql_generation.llm_calls")
+            result = await self.chain.generate(
+                user_query=context.user_query,
+                schema_context=context.schema_context,
                 few_shot_examples=None,
                 validation_feedback=validation_feedback,
+                system_prompt=context.system_prompt,
+                temperature=temperature,
+                model=self.router.model_for(context.route),
+                hedge=hedge,
             )
             
-            sql_query = result["sql"]
-            
-            # Extract tables used
-            tables_used = self._extract_tables_from_metadata(
-                context_result["metadata"]
-            )
-            
-            # Generate explanation if requested
-            explanation = None
-            if include_explanation:
-                explanation = await self.chain.explain_sql(
-                    sql=sql_query,
-                    schema_context=schema_context
-                )
-            
-            # Calculate confidence score (simplified)
-            confidence = self._calculate_confidence(context_result)
-            
-            return {
-                "sql_query": sql_query,
-                "explanation": explanation,
-                "confidence": confidence,
-                "tables_used": tables_used,
-                "schema_context": schema_context
-            }
+            return {"sql_query": result["sql"], "semantic_cache_hit": None}
         
         except Exception as e:
             logger.error(f"SQL generation failed: {str(e)}")
             raise SQLGenerationException(f"Failed to generate SQL: {str(e)}")
     
+    async def explain(
+        self,
+        sql_query: str,
+        schema_context: str
+    ) -> str:
+        """Explain the SQL that finally validated"""
+        metrics.increment("sql_generation.explanations")
+        return await self.chain.explain_sql(
+            sql=sql_query,
+            schema_context=schema_context
+        )
+    
+    async def stream_explanation(
+        self,
+        sql_query: str,
+        schema_context: str
+    ) -> AsyncIterator[str]:
+        """Stream explanation tokens for an already validated SQL query"""
+        async for chunk in self.chain.stream_explanation(
+            sql=sql_query,
+            schema_context=schema_context
+        ):
+            yield chunk
+    
+    def _prompt_schema(self, catalog: DatabaseCatalog, schema_context: str) -> str:
+        """
+        Schema section for the cached system prompt: the whole catalog when it
+        is small enough to share across questions, else the retrieved tables.
+        """
+        max_chars = settings.PROMPT_CACHE_FULL_SCHEMA_MAX_CHARS
+        if max_chars > 0:
+            description = catalog.describe()
+            if description and len(description) <= max_chars:
+                return description
+        return schema_context
+    
     def _extract_tables_from_metadata(
         self,
         metadatas: list
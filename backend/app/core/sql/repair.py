@@ -0,0 +1,315 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, Any, List, Optional, Set, Tuple
+import time
+from app.config import settings
+from app.core.database.catalog import schema_catalog, DatabaseCatalog
+from app.core.sql.validator import sql_validator
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+try:
+    import sqlparse
+    from sqlparse import tokens as T
+except ModuleNotFoundError:
+    sqlparse = None
+
+
+def _trigrams(name: str) -> Set[str]:
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance with a single rolling row"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        previous = current
+    return previous[-1]
+
+
+class FuzzyIdentifierIndex:
+    """Trigram candidate lookup over identifiers, ranked by edit distance"""
+
+    def __init__(self, names: Dict[str, str]):
+        # Lower-cased name -> name as stored in the schema
+        self.names = names
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        for name in self.names:
+            for gram in _trigrams(name):
+                self._postings[gram].add(name)
+
+    def match(self, name: str, min_similarity: float, min_margin: float) -> Optional[str]:
+        """Return the single closest identifier, or None if none is close or it is ambiguous"""
+        candidates: Set[str] = set()
+        for gram in _trigrams(name):
+            candidates |= self._postings.get(gram, set())
+
+        scored = sorted(
+            (
+                1.0 - _edit_distance(name, candidate) / max(len(name), len(candidate)),
+                candidate
+            )
+            for candidate in candidates
+        )
+        if not scored:
+            return None
+
+        best_score, best = scored[-1]
+        runner_up = scored[-2][0] if len(scored) > 1 else 0.0
+
+        if best_score < min_similarity or best_score - runner_up < min_margin:
+            return None
+        return self.names[best]
+
+
+class SQLRepairer:
+    """
+    Rewrite misspelled table and column names against the schema catalog so
+    mechanical validation failures do not cost another LLM round trip.
+    """
+
+    MAX_PASSES = 3
+
+    def __init__(self):
+        self.catalog = schema_catalog
+        self.validator = sql_validator
+        self.enabled = settings.SQL_REPAIR_ENABLED
+        self.min_similarity = settings.SQL_REPAIR_MIN_SIMILARITY
+        self.min_margin = settings.SQL_REPAIR_MIN_MARGIN
+        # Indexes are rebuilt only when the catalog version changes
+        self._indexes: Dict[
+            str, Tuple[int, FuzzyIdentifierIndex, Dict[str, FuzzyIdentifierIndex]]
+        ] = {}
+        self._lock = Lock()
+
+    def repair(
+        self,
+        sql: str,
+        database_name: str,
+        validation_result: Dict[str, Any]
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Try to fix unknown table/column references locally.
+        Returns (repaired_sql, validation_result) when the rewrite validates,
+        otherwise None so the caller falls back to regenerating.
+        """
+        if not self.enabled or sqlparse is None or not self._repairable(validation_result):
+            return None
+
+        metrics.increment("sql_repair.attempts")
+        started = time.perf_counter()
+
+        try:
+            catalog = self.catalog.get(database_name)
+            table_index, column_indexes = self._get_indexes(database_name, catalog)
+            result = validation_result
+
+            # Columns on a misspelled table only surface once the table is fixed
+            for _ in range(self.MAX_PASSES):
+                unknown = result["unknown_references"]
+                table_fixes: Dict[str, str] = {}
+                for table in unknown["tables"]:
+                    match = table_index.match(table, self.min_similarity, self.min_margin)
+                    if match is None:
+                        return self._failed(started, f"no unambiguous match for table '{table}'")
+                    table_fixes[table] = match
+
+                column_fixes: Dict[Tuple[str, str], str] = {}
+                for table, column in unknown["columns"]:
+                    index = column_indexes.get(table)
+                    match = index.match(column, self.min_similarity, self.min_margin) if index else None
+                    if match is None:
+                        return self._failed(started, f"no unambiguous match for column '{table}.{column}'")
+                    column_fixes[(table, column)] = match
+
+                sql = self._rewrite(sql, table_fixes, column_fixes)
+                result = self.validator.validate(sql, database_name=database_name)
+
+                if result["is_valid"]:
+                    metrics.increment("sql_repair.repaired")
+                    metrics.observe("sql_repair.duration_ms", (time.perf_counter() - started) * 1000)
+                    logger.info(f"Repaired SQL locally: {sql}")
+                    return sql, result
+
+                if not self._repairable(result):
+                    break
+
+            return self._failed(started, "; ".join(result["errors"]))
+
+        except Exception as e:
+            return self._failed(started, str(e))
+
+    @staticmethod
+    def _repairable(validation_result: Dict[str, Any]) -> bool:
+        """Only failures made up entirely of unknown table/column references qualify"""
+        unknown = validation_result.get("unknown_references") or {}
+        tables = unknown.get("tables") or []
+        columns = unknown.get("columns") or []
+        if not (tables or columns):
+            return False
+        # All unknown tables share one error message; each column has its own
+        return len(validation_result["errors"]) == bool(tables) + len(columns)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Repair attempts and hit rate"""
+        attempts = metrics.get_counter("sql_repair.attempts")
+        repaired = metrics.get_counter("sql_repair.repaired")
+        return {
+            "attempts": attempts,
+            "repaired": repaired,
+            "failed": metrics.get_counter("sql_repair.failed"),
+            "hit_rate": round(repaired / attempts, 4) if attempts else 0.0,
+        }
+
+    def _failed(self, started: float, reason: str) -> None:
+        metrics.increment("sql_repair.failed")
+        metrics.observe("sql_repair.duration_ms", (time.perf_counter() - started) * 1000)
+        logger.info(f"Local SQL repair not possible: {reason}")
+        return None
+
+    def _get_indexes(
+        self,
+        database_name: str,
+        catalog: DatabaseCatalog
+    ) -> Tuple[FuzzyIdentifierIndex, Dict[str, FuzzyIdentifierIndex]]:
+        with self._lock:
+            cached = self._indexes.get(database_name)
+            if cached is not None and cached[0] == catalog.version:
+                return cached[1], cached[2]
+
+            table_index = FuzzyIdentifierIndex({
+                table: entry["name"] for table, entry in catalog.tables.items()
+            })
+            column_indexes = {
+                table: FuzzyIdentifierIndex({
+                    col["name"].lower(): col["name"]
+                    for col in entry.get("columns", []) if col.get("name")
+                })
+                for table, entry in catalog.tables.items()
+            }
+            self._indexes[database_name] = (catalog.version, table_index, column_indexes)
+            return table_index, column_indexes
+
+    def _rewrite(
+        self,
+        sql: str,
+        table_fixes: Dict[str, str],
+        column_fixes: Dict[Tuple[str, str], str]
+    ) -> str:
+        """Replace identifier tokens, leaving literals, comments and layout untouched"""
+        tokens = [
+            token
+            for statement in sqlparse.parse(sql)
+            for token in statement.flatten()
+        ]
+        significant = [i for i, token in enumerate(tokens) if not token.is_whitespace]
+        alias_map = self._alias_map(tokens, significant)
+        table_positions = self._table_positions(tokens, significant)
+
+        for position, i in enumerate(significant):
+            token = tokens[i]
+            if token.ttype not in T.Name and token.ttype not in T.String.Symbol:
+                continue
+
+            name = self._unquote(token.value).lower()
+            previous = tokens[significant[position - 1]] if position > 0 else None
+            qualified = previous is not None and previous.value == "."
+
+            following = tokens[significant[position + 1]] if position + 1 < len(significant) else None
+
+            if qualified and position > 1:
+                qualifier = self._unquote(tokens[significant[position - 2]].value).lower()
+                table = alias_map.get(qualifier, qualifier)
+                replacement = column_fixes.get((table, name))
+            elif position in table_positions or (
+                # Table name used as a qualifier, e.g. custmers.email
+                following is not None and following.value == "." and name not in alias_map
+            ):
+                replacement = table_fixes.get(name)
+            else:
+                # Columns or aliases that happen to share a misspelled table's name
+                replacement = None
+
+            if replacement is not None:
+                token.value = self._requote(token.value, replacement)
+
+        return "".join(token.value for token in tokens)
+
+    def _table_positions(self, tokens: List[Any], significant: List[int]) -> Set[int]:
+        """Positions in significant that name a table: after FROM/JOIN and FROM's commas"""
+        positions: Set[int] = set()
+        for position, i in enumerate(significant[:-1]):
+            keyword = tokens[i]
+            if keyword.ttype not in T.Keyword or not (
+                keyword.normalized == "FROM" or keyword.normalized.endswith("JOIN")
+            ):
+                continue
+
+            table = position + 1
+            while table < len(significant):
+                positions.add(table)
+                if keyword.normalized != "FROM":
+                    break
+                # Skip an optional [AS] alias, then continue past a comma
+                after = table + 1
+                if after < len(significant) and tokens[significant[after]].normalized == "AS":
+                    after += 1
+                if after < len(significant) and (
+                    tokens[significant[after]].ttype in T.Name
+                    or tokens[significant[after]].ttype in T.String.Symbol
+                ):
+                    after += 1
+                if after < len(significant) and tokens[significant[after]].value == ",":
+                    table = after + 1
+                else:
+                    break
+
+        return positions
+
+    def _alias_map(self, tokens: List[Any], significant: List[int]) -> Dict[str, str]:
+        """Map aliases to table names from FROM/JOIN clauses"""
+        alias_map: Dict[str, str] = {}
+        for position, i in enumerate(significant[:-1]):
+            keyword = tokens[i]
+            if keyword.ttype not in T.Keyword or not (
+                keyword.normalized == "FROM" or keyword.normalized.endswith("JOIN")
+            ):
+                continue
+
+            rest = [tokens[j] for j in significant[position + 1:position + 4]]
+            if not rest:
+                continue
+
+            table = self._unquote(rest[0].value).lower()
+            alias_index = 2 if len(rest) > 2 and rest[1].normalized == "AS" else 1
+            if len(rest) > alias_index and (
+                rest[alias_index].ttype in T.Name or rest[alias_index].ttype in T.String.Symbol
+            ):
+                alias_map[self._unquote(rest[alias_index].value).lower()] = table
+
+        return alias_map
+
+    @staticmethod
+    def _unquote(value: str) -> str:
+        return value.strip('`"[]')
+
+    @staticmethod
+    def _requote(original: str, replacement: str) -> str:
+        """Keep the original quoting style around the replacement"""
+        if len(original) > 1 and original[0] in '`"[':
+            return f"{original[0]}{replacement}{original[-1]}"
+        return replacement
+
+
+# Global instance
+sql_repairer = SQLRepairer()
@@ -1,16 +1,134 @@
+from collections import OrderedDict
+from threading import Lock
 from typing import Dict, Any, List, Optional, Set, Tuple
+from app.config import settings
+from app.core.database.catalog import schema_catalog, DatabaseCatalog
 from app.utils.logger import logger
+from app.utils.metrics import metrics
 from app.utils.exceptions import ValidationException
+import hashlib
 import re
-import json
-from pathlib import Path
 
 try:
     import sqlparse
+    from sqlparse import filters as sqlparse_filters
+    from sqlparse import formatter as sqlparse_formatter
+    from sqlparse import tokens as T
+    from sqlparse.engine import FilterStack
 except ModuleNotFoundError:
     sqlparse = None
 
 
+# Patterns are compiled once at import instead of on every validate() call
+LINE_COMMENT_RE = re.compile(r"--.*?$", re.MULTILINE)
+BLOCK_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+EXPLAIN_PREFIX_RE = re.compile(r"^EXPLAIN\s+", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+READ_STATEMENT_RE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+TABLE_REF_RE = re.compile(
+    r"\b(?:FROM|JOIN)\s+([`\"\[]?[\w\.]+[`\"\]]?)(?:\s+(?:AS\s+)?([`\"\[]?[\w]+[`\"\]]?))?",
+    re.IGNORECASE,
+)
+QUALIFIED_COLUMN_RE = re.compile(
+    r"([`\"\[]?[A-Za-z_][\w$]*[`\"\]]?)\s*\.\s*([`\"\[]?[A-Za-z_*][\w$*]*[`\"\]]?)",
+    re.IGNORECASE,
+)
+WITH_RE = re.compile(r"\bWITH\b", re.IGNORECASE)
+RECURSIVE_RE = re.compile(r"\s*RECURSIVE\b", re.IGNORECASE)
+SPACES_RE = re.compile(r"\s*")
+CTE_NAME_RE = re.compile(r"([A-Za-z_][\w$]*)")
+CTE_AS_RE = re.compile(r"\s*AS\s*\(", re.IGNORECASE)
+
+INJECTION_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"'\s*OR\s*'",
+        r"'\s*OR\s+\d+\s*=\s*\d+",
+        r"--",
+        r"/\*.*\*/",
+        r";\s*DROP",
+        r"UNION\s+SELECT"
+    )
+]
+
+if sqlparse is not None:
+    FORMAT_OPTIONS = sqlparse_formatter.validate_options(
+        {"reindent": True, "keyword_case": "upper"}
+    )
+
+
+class ParsedSQL:
+    """
+    SQL lexed and parsed once. Every validation check and the formatter read
+    from this instead of re-parsing the text.
+    """
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.statements = []
+
+        if sqlparse is None:
+            text = LINE_COMMENT_RE.sub("", sql.strip())
+            text = BLOCK_COMMENT_RE.sub("", text)
+        else:
+            self.statements = list(sqlparse.parse(sql))
+            # Comments come out of the token stream, so "--" inside a string
+            # literal is no longer mistaken for one
+            text = "".join(
+                " " if token.ttype in T.Comment else token.value
+                for statement in self.statements
+                for token in statement.flatten()
+            )
+
+        # Strip leading EXPLAIN, then collapse whitespace
+        text = EXPLAIN_PREFIX_RE.sub("", text.strip())
+        self.normalized = WHITESPACE_RE.sub(" ", text).strip()
+        self.upper = self.normalized.upper()
+
+    def statement_count(self) -> int:
+        """Statements with anything besides whitespace and comments"""
+        if sqlparse is None:
+            return 2 if ";" in self.normalized.rstrip(";") else 1
+
+        return sum(
+            1 for statement in self.statements
+            if any(
+                not token.is_whitespace and token.ttype not in T.Comment
+                for token in statement.flatten()
+            )
+        )
+
+    def statement_type(self) -> str:
+        """sqlparse type of the first statement"""
+        return self.statements[0].get_type() if self.statements else "UNKNOWN"
+
+    def format(self) -> str:
+        """
+        Reindent and upper-case keywords using the already-parsed statements.
+        Equivalent to sqlparse.format(sql, reindent=True, keyword_case='upper').
+        Mutates the token tree, so call it after all checks have run.
+        """
+        if sqlparse is None:
+            return self.sql.strip()
+
+        # A fresh stack per call: the reindent filter keeps per-run state
+        stack = sqlparse_formatter.build_filter_stack(FilterStack(), FORMAT_OPTIONS)
+        keyword_case = stack.preprocess[0]
+        serializer = sqlparse_filters.SerializerUnicode()
+
+        formatted = []
+        for statement in self.statements:
+            for token in statement.flatten():
+                if token.ttype in keyword_case.ttype:
+                    token.value = keyword_case.convert(token.value)
+            for filter_ in stack.stmtprocess:
+                filter_.process(statement)
+            formatted.append(serializer.process(statement))
+
+        return "".join(formatted).strip()
+
+
 class SQLValidator:
     """Validate SQL queries for safety and correctness"""
     
@@ -20,6 +138,8 @@ class SQLValidator:
         'INSERT', 'UPDATE', 'GRANT', 'REVOKE', 'EXEC'
     ]
 
+    DANGEROUS_RE = re.compile(r"\b(" + "|".join(DANGEROUS_KEYWORDS) + r")\b")
+
     SQL_KEYWORDS = {
         'SELECT', 'FROM', 'WHERE', 'JOIN', 'LEFT', 'RIGHT', 'FULL', 'INNER', 'OUTER',
         'ON', 'GROUP', 'BY', 'ORDER', 'HAVING', 'LIMIT', 'OFFSET', 'AS', 'AND', 'OR',
@@ -28,47 +148,112 @@ class SQLValidator:
     }
 
     def __init__(self):
-        self._schema_cache: Dict[str, Dict[str, Any]] = {}
+        self.catalog = schema_catalog
+        self._results: "OrderedDict[Tuple[str, str, int], Dict[str, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.max_cached_results = settings.SQL_VALIDATION_CACHE_SIZE
     
     def validate(self, sql: str, database_name: Optional[str] = None) -> Dict[str, Any]:
-        """Validate SQL query"""
+        """
+        Validate SQL query.
+        Results are memoized per (SQL hash, database, schema version), so
+        repeats are free and a re-indexed schema is never served stale.
+        """
+        catalog = self.catalog.get(database_name) if database_name else None
+        version = catalog.version if catalog is not None else 0
+        cache_key = (
+            hashlib.sha256(sql.strip().encode()).hexdigest(),
+            database_name or "",
+            version
+        )
+        
+        with self._lock:
+            cached = self._results.get(cache_key)
+            if cached is not None:
+                self._results.move_to_end(cache_key)
+        
+        if cached is not None:
+            metrics.increment("sql_validation_cache.hits")
+            return self._copy_result(cached)
+        
+        metrics.increment("sql_validation_cache.misses")
+        result = self._validate_uncached(sql, database_name, catalog)
+        
+        if self.max_cached_results > 0:
+            with self._lock:
+                self._results[cache_key] = result
+                while len(self._results) > self.max_cached_results:
+                    self._results.popitem(last=False)
+        
+        return self._copy_result(result)
+    
+    async def avalidate(self, sql: str, database_name: Optional[str] = None) -> Dict[str, Any]:
+        """validate, refreshing a stale catalog off the event loop first"""
+        if database_name:
+            await self.catalog.aget(database_name)
+        return self.validate(sql, database_name=database_name)
+    
+    @staticmethod
+    def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Callers may mutate the lists; keep the memoized copy intact"""
+        return {
+            **result,
+            "errors": list(result["errors"]),
+            "warnings": list(result["warnings"])
+        }
+    
+    def _validate_uncached(
+        self,
+        sql: str,
+        database_name: Optional[str],
+        catalog: Optional[DatabaseCatalog]
+    ) -> Dict[str, Any]:
+        """Parse once and run every check against the shared parse"""
         logger.info("Validating SQL query")
-        # Normalize first: strip comments and leading helper keywords
-        normalized = self._normalize_sql(sql)
-
         errors = []
         warnings = []
         
+        try:
+            parsed = ParsedSQL(sql)
+        except Exception as e:
+            return {
+                "is_valid": False,
+                "errors": [f"Syntax error: {str(e)}"],
+                "warnings": warnings,
+                "formatted_sql": sql.strip()
+            }
+        
         # Check if query is empty
-        if not normalized:
+        if not parsed.normalized:
             errors.append("SQL query is empty")
             return {
                 "is_valid": False,
                 "errors": errors,
-                "warnings": warnings
+                "warnings": warnings,
+                "formatted_sql": ""
             }
         
         # Check for dangerous operations
-        dangerous_check = self._check_dangerous_operations(normalized)
+        dangerous_check = self._check_dangerous_operations(parsed)
         if dangerous_check:
             errors.append(f"Dangerous operation detected: {dangerous_check}")
         
         # Check for SQL injection patterns
-        injection_check = self._check_sql_injection(normalized)
+        injection_check = self._check_sql_injection(parsed)
         if injection_check:
             warnings.append(f"Potential SQL injection pattern: {injection_check}")
         
-        # Validate syntax using sqlparse
-        syntax_check = self._check_syntax(normalized)
+        # Validate syntax using the shared parse
+        syntax_check = self._check_syntax(parsed)
         if syntax_check:
             errors.append(syntax_check)
         
         # Check for multiple statements
-        if self._has_multiple_statements(normalized):
+        if parsed.statement_count() > 1:
             errors.append("Multiple SQL statements not allowed")
 
         # Validate table/column references against selected database schema
-        schema_result = self._check_schema_references(normalized, database_name)
+        schema_result = self._check_schema_references(parsed, database_name, catalog)
         errors.extend(schema_result["errors"])
         warnings.extend(schema_result["warnings"])
         
@@ -77,103 +262,72 @@ class SQLValidator:
         return {
             "is_valid": is_valid,
             "errors": errors,
-            "warnings": warnings
+            "warnings": warnings,
+            "formatted_sql": self._format(parsed, sql),
+            # Structured form of the schema errors, used by local SQL repair
+            "unknown_references": {
+                "tables": schema_result["unknown_tables"],
+                "columns": schema_result["unknown_columns"]
+            }
         }
     
-    def _check_dangerous_operations(self, sql: str) -> str:
+    def _check_dangerous_operations(self, parsed: ParsedSQL) -> str:
         """Check for dangerous SQL operations"""
-        sql_upper = sql.upper()
+        found = set(self.DANGEROUS_RE.findall(parsed.upper))
         
+        # Report in declaration order, as the per-keyword scan did
         for keyword in self.DANGEROUS_KEYWORDS:
-            if re.search(r'\b' + keyword + r'\b', sql_upper):
+            if keyword in found:
                 return keyword
         
         return ""
     
-    def _check_sql_injection(self, sql: str) -> str:
+    def _check_sql_injection(self, parsed: ParsedSQL) -> str:
         """Check for common SQL injection patterns"""
-        injection_patterns = [
-            r"'\s*OR\s*'",
-            r"'\s*OR\s+\d+\s*=\s*\d+",
-            r"--",
-            r"/\*.*\*/",
-            r";\s*DROP",
-            r"UNION\s+SELECT"
-        ]
-        
-        for pattern in injection_patterns:
-            if re.search(pattern, sql, re.IGNORECASE):
-                return pattern
+        for pattern in INJECTION_PATTERNS:
+            if pattern.search(parsed.normalized):
+                return pattern.pattern
         
         return ""
     
-    def _check_syntax(self, sql: str) -> str:
-        """Basic syntax validation using sqlparse"""
-        try:
-            if sqlparse is None:
-                # Fallback when optional dependency is not installed in runtime env.
-                if not re.match(r"^\s*(SELECT|WITH)\b", sql, re.IGNORECASE):
-                    return "Only SELECT/WITH statements are supported"
-                return ""
-
-            parsed = sqlparse.parse(sql)
-            
-            if not parsed:
-                return "Invalid SQL syntax"
-            
-            # Check if it's a valid statement
-            stmt = parsed[0]
-            if stmt.get_type() == 'UNKNOWN':
-                # Be lenient for dialect-specific SQL; accept common read queries
-                if re.match(r"^\s*(SELECT|WITH)\b", sql, re.IGNORECASE):
-                    return ""
-                return "Unrecognized SQL statement"
-            
+    def _check_syntax(self, parsed: ParsedSQL) -> str:
+        """Basic syntax validation using the parsed statements"""
+        is_read_query = READ_STATEMENT_RE.match(parsed.normalized) is not None
+        
+        if sqlparse is None:
+            # Fallback when optional dependency is not installed in runtime env.
+            if not is_read_query:
+                return "Only SELECT/WITH statements are supported"
             return ""
         
-        except Exception as e:
-            return f"Syntax error: {str(e)}"
+        if not parsed.statements:
+            return "Invalid SQL syntax"
+        
+        # Check if it's a valid statement
+        if parsed.statement_type() == 'UNKNOWN':
+            # Be lenient for dialect-specific SQL; accept common read queries
+            if is_read_query:
+                return ""
+            return "Unrecognized SQL statement"
+        
+        return ""
     
-    def _has_multiple_statements(self, sql: str) -> bool:
-        """Check if SQL contains multiple statements"""
-        if sqlparse is None:
-            # Conservative fallback: reject explicit semicolon-separated statements.
-            return ";" in sql.strip().rstrip(";")
-
-        parsed = sqlparse.parse(sql)
-        return len(parsed) > 1
+    def _format(self, parsed: ParsedSQL, sql: str) -> str:
+        try:
+            return parsed.format()
+        except Exception as e:
+            logger.warning(f"SQL formatting failed: {str(e)}")
+            return sql.strip()
     
     def sanitize_query(self, sql: str) -> str:
         """Sanitize SQL query"""
-        if sqlparse is None:
-            return sql.strip()
-
-        # Format the SQL for better readability
-        formatted = sqlparse.format(
-            sql,
-            reindent=True,
-            keyword_case='upper'
-        )
-        return formatted.strip()
-
-    def _normalize_sql(self, sql: str) -> str:
-        """Strip comments, leading helper keywords like EXPLAIN, and whitespace"""
-        s = sql.strip()
-        # Remove line comments
-        s = re.sub(r"--.*?$", "", s, flags=re.MULTILINE)
-        # Remove block comments
-        s = re.sub(r"/\*.*?\*/", "", s, flags=re.DOTALL)
-        s = s.strip()
-        # Strip leading EXPLAIN if present
-        s = re.sub(r"^EXPLAIN\s+", "", s, flags=re.IGNORECASE)
-        # Collapse excessive whitespace
-        s = re.sub(r"\s+", " ", s)
-        return s
+        return self._format(ParsedSQL(sql), sql)
 
     def _check_schema_references(
         self,
-        sql: str,
-        database_name: Optional[str]
+        parsed: ParsedSQL,
+        database_name: Optional[str],
+        catalog: Optional[DatabaseCatalog]
     ) -> Dict[str, List[str]]:
         """Validate table and qualified-column references against stored schema."""
         errors: List[str] = []
@@ -181,18 +335,19 @@ class SQLValidator:
 
         if not database_name:
             warnings.append("Schema validation skipped: database name not provided")
-            return {"errors": errors, "warnings": warnings}
+            return {"errors": errors, "warnings": warnings, "unknown_tables": [], "unknown_columns": []}
 
-        schema = self._load_database_schema(database_name)
-        known_tables: Set[str] = schema.get("tables", set())
-        columns_by_table: Dict[str, Set[str]] = schema.get("columns_by_table", {})
+        # O(1) lookups against the in-memory catalog; no disk I/O here
+        known_tables = catalog.tables if catalog is not None else {}
+        columns_by_table = catalog.columns if catalog is not None else {}
 
         if not known_tables:
             warnings.append(
                 f"Schema validation skipped: no schema metadata found for database '{database_name}'"
             )
-            return {"errors": errors, "warnings": warnings}
+            return {"errors": errors, "warnings": warnings, "unknown_tables": [], "unknown_columns": []}
 
+        sql = parsed.normalized
         cte_names = self._extract_cte_names(sql)
         referenced_tables, alias_map = self._extract_tables_and_aliases(sql)
 
@@ -208,6 +363,7 @@ class SQLValidator:
                 f"Available tables include: {suggestion}"
             )
 
+        unknown_columns: Set[Tuple[str, str]] = set()
         checked_missing_column_support: Set[str] = set()
         for alias_or_table, column in self._extract_qualified_columns(sql):
             resolved_table = alias_map.get(alias_or_table, alias_or_table)
@@ -229,74 +385,21 @@ class SQLValidator:
                 errors.append(
                     f"Unknown column '{column}' on table '{resolved_table}'"
                 )
+                unknown_columns.add((resolved_table, column))
 
         return {
             "errors": sorted(list(set(errors))),
-            "warnings": sorted(list(set(warnings)))
-        }
-
-    def _load_database_schema(self, database_name: str) -> Dict[str, Any]:
-        """Load schema file from disk and normalize to lookup structures."""
-        key = database_name.lower()
-        if key in self._schema_cache:
-            return self._schema_cache[key]
-
-        backend_root = Path(__file__).resolve().parents[3]
-        schema_path = backend_root / "data" / "schemas" / f"{database_name}.json"
-
-        if not schema_path.exists():
-            self._schema_cache[key] = {"tables": set(), "columns_by_table": {}}
-            return self._schema_cache[key]
-
-        try:
-            with schema_path.open("r", encoding="utf-8") as f:
-                payload = json.load(f)
-        except Exception as e:
-            logger.warning(f"Failed to load schema '{schema_path}': {str(e)}")
-            self._schema_cache[key] = {"tables": set(), "columns_by_table": {}}
-            return self._schema_cache[key]
-
-        tables: Set[str] = set()
-        columns_by_table: Dict[str, Set[str]] = {}
-
-        for table_entry in payload.get("tables", []):
-            if isinstance(table_entry, str):
-                table_name = self._normalize_identifier(table_entry)
-                if table_name:
-                    tables.add(table_name)
-                    columns_by_table.setdefault(table_name, set())
-                continue
-
-            if isinstance(table_entry, dict):
-                table_name = self._normalize_identifier(table_entry.get("name", ""))
-                if not table_name:
-                    continue
-                tables.add(table_name)
-
-                columns = set()
-                for col in table_entry.get("columns", []):
-                    col_name = self._normalize_identifier((col or {}).get("name", ""))
-                    if col_name:
-                        columns.add(col_name)
-                columns_by_table[table_name] = columns
-
-        self._schema_cache[key] = {
-            "tables": tables,
-            "columns_by_table": columns_by_table
+            "warnings": sorted(list(set(warnings))),
+            "unknown_tables": unknown_tables,
+            "unknown_columns": sorted(unknown_columns)
         }
-        return self._schema_cache[key]
 
     def _extract_tables_and_aliases(self, sql: str) -> Tuple[Set[str], Dict[str, str]]:
         """Extract table names and aliases from FROM/JOIN clauses."""
         tables: Set[str] = set()
         alias_map: Dict[str, str] = {}
 
-        pattern = re.compile(
-            r"\b(?:FROM|JOIN)\s+([`\"\[]?[\w\.]+[`\"\]]?)(?:\s+(?:AS\s+)?([`\"\[]?[\w]+[`\"\]]?))?",
-            flags=re.IGNORECASE,
-        )
-
-        for match in pattern.finditer(sql):
+        for match in TABLE_REF_RE.finditer(sql):
             raw_table = match.group(1) or ""
             raw_alias = match.group(2) or ""
 
@@ -320,12 +423,7 @@ class SQLValidator:
     def _extract_qualified_columns(self, sql: str) -> List[Tuple[str, str]]:
         """Extract qualified columns like alias.column or table.column."""
         columns: List[Tuple[str, str]] = []
-        pattern = re.compile(
-            r"([`\"\[]?[A-Za-z_][\w$]*[`\"\]]?)\s*\.\s*([`\"\[]?[A-Za-z_*][\w$*]*[`\"\]]?)",
-            flags=re.IGNORECASE,
-        )
-
-        for match in pattern.finditer(sql):
+        for match in QUALIFIED_COLUMN_RE.finditer(sql):
             left = self._normalize_identifier(match.group(1))
             right = self._normalize_identifier(match.group(2), allow_star=True)
             if left and right:
@@ -337,7 +435,7 @@ class SQLValidator:
         """Extract CTE names to avoid false unknown-table errors."""
         ctes: Set[str] = set()
 
-        with_match = re.search(r"\bWITH\b", sql, flags=re.IGNORECASE)
+        with_match = WITH_RE.search(sql)
         if not with_match:
             return ctes
 
@@ -345,28 +443,24 @@ class SQLValidator:
         n = len(sql)
 
         # Support optional WITH RECURSIVE prefix.
-        recursive_match = re.match(r"\s*RECURSIVE\b", sql[i:], flags=re.IGNORECASE)
+        recursive_match = RECURSIVE_RE.match(sql, i)
         if recursive_match:
-            i += recursive_match.end()
+            i = recursive_match.end()
 
         while i < n:
-            ws = re.match(r"\s*", sql[i:])
-            if ws:
-                i += ws.end()
+            i = SPACES_RE.match(sql, i).end()
 
-            name_match = re.match(r"([A-Za-z_][\w$]*)", sql[i:])
+            name_match = CTE_NAME_RE.match(sql, i)
             if not name_match:
                 break
 
             cte_name = self._normalize_identifier(name_match.group(1))
             if cte_name:
                 ctes.add(cte_name)
-            i += name_match.end()
+            i = name_match.end()
 
             # Optional CTE column list: cte_name(col1, col2)
-            ws = re.match(r"\s*", sql[i:])
-            if ws:
-                i += ws.end()
+            i = SPACES_RE.match(sql, i).end()
             if i < n and sql[i] == "(":
                 depth = 1
                 i += 1
@@ -377,10 +471,10 @@ class SQLValidator:
                         depth -= 1
                     i += 1
 
-            as_match = re.match(r"\s*AS\s*\(", sql[i:], flags=re.IGNORECASE)
+            as_match = CTE_AS_RE.match(sql, i)
             if not as_match:
                 break
-            i += as_match.end()
+            i = as_match.end()
 
             # Consume full CTE query body using balanced parentheses.
             depth = 1
@@ -391,9 +485,7 @@ class SQLValidator:
                     depth -= 1
                 i += 1
 
-            ws = re.match(r"\s*", sql[i:])
-            if ws:
-                i += ws.end()
+            i = SPACES_RE.match(sql, i).end()
 
             # Multiple CTEs are comma-separated; main query starts otherwise.
             if i < n and sql[i] == ",":
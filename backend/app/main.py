@@ -2,7 +2,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api import api_router
+from app.core.llm.client import llm_client
+from app.services.cache_service import cache_service
+from app.services.database_registry import database_registry
 from app.utils.logger import logger
+from app.utils.loop_monitor import loop_monitor
 
 
 app = FastAPI(
@@ -32,12 +36,19 @@ async def startup_event():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Debug mode: {settings.DEBUG}")
     logger.info(f"Log level: {settings.LOG_LEVEL}")
+    loop_monitor.start()
+    database_registry.start()
+    llm_client.models.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Run on application shutdown"""
     logger.info(f"Shutting down {settings.APP_NAME}")
+    await loop_monitor.stop()
+    await cache_service.close()
+    await database_registry.stop()
+    await llm_client.models.stop()
 
 
 @app.get("/", tags=["Root"])
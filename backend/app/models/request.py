@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 
 
 class TextToSQLRequest(BaseModel):
@@ -7,6 +7,13 @@ class TextToSQLRequest(BaseModel):
     query: str = Field(..., description="Natural language query", min_length=1, max_length=500)
     database_name: str = Field(..., description="Name of the database to query")
     include_explanation: bool = Field(default=True, description="Include explanation in response")
+    explanation_mode: Optional[Literal["inline", "parallel", "deferred"]] = Field(
+        default=None,
+        description=(
+            "inline, parallel with execution (same as inline without execute_query), "
+            "or deferred to the explanation endpoint"
+        )
+    )
     execute_query: bool = Field(default=False, description="Execute the generated SQL query")
 
 
@@ -15,6 +22,9 @@ class SchemaIndexRequest(BaseModel):
     connection_string: str = Field(..., description="Database connection string")
     database_name: str = Field(..., description="Name of the database")
     description: Optional[str] = Field(None, description="Optional description of the database")
+    pool_size: Optional[int] = Field(None, ge=1, description="Connection pool size for this database")
+    max_overflow: Optional[int] = Field(None, ge=0, description="Connections allowed beyond the pool size")
+    force: bool = Field(default=False, description="Re-index even if the schema fingerprint is unchanged")
 
 
 class QueryExecutionRequest(BaseModel):
@@ -22,3 +32,11 @@ class QueryExecutionRequest(BaseModel):
     sql_query: str = Field(..., description="SQL query to execute")
     database_name: str = Field(..., description="Name of the database")
     limit: int = Field(default=100, description="Maximum number of rows to return")
+
+
+class QueryStreamRequest(BaseModel):
+    """Request model for streaming SQL query results"""
+    sql_query: str = Field(..., description="SQL query to execute")
+    database_name: str = Field(..., description="Name of the database")
+    format: Literal["ndjson", "csv"] = Field(default="ndjson", description="Output format for streamed rows")
+    limit: Optional[int] = Field(default=None, description="Optional maximum number of rows to return")
@@ -7,20 +7,46 @@ class TextToSQLResponse(BaseModel):
     """Response model for text to SQL conversion"""
     sql_query: str = Field(..., description="Generated SQL query")
     explanation: Optional[str] = Field(None, description="Explanation of the query")
+    explanation_id: Optional[str] = Field(None, description="Id for fetching the explanation later")
     confidence: float = Field(..., description="Confidence score (0-1)")
     tables_used: List[str] = Field(default_factory=list, description="List of tables used")
     execution_result: Optional[Dict[str, Any]] = Field(None, description="Query execution results if executed")
 
 
+class ExplanationResponse(BaseModel):
+    """Response model for a query explanation"""
+    explanation_id: str = Field(..., description="Explanation id")
+    sql_query: str = Field(..., description="Explained SQL query")
+    explanation: str = Field(..., description="Explanation of the query")
+
+
 class SchemaIndexResponse(BaseModel):
     """Response model for schema indexing"""
     database_name: str = Field(..., description="Name of the database")
     tables_indexed: int = Field(..., description="Number of tables indexed")
     columns_indexed: int = Field(..., description="Number of columns indexed")
+    tables_added: int = Field(default=0, description="Tables indexed for the first time")
+    tables_changed: int = Field(default=0, description="Tables re-embedded because their schema changed")
+    tables_removed: int = Field(default=0, description="Tables removed from the index")
+    tables_unchanged: int = Field(default=0, description="Tables skipped because their schema is unchanged")
     status: str = Field(..., description="Indexing status")
     indexed_at: datetime = Field(default_factory=datetime.now, description="Timestamp of indexing")
 
 
+class SchemaJobResponse(BaseModel):
+    """Response model for a background schema indexing job"""
+    job_id: str = Field(..., description="Job identifier")
+    database_name: str = Field(..., description="Name of the database")
+    status: str = Field(..., description="queued, running, succeeded, failed or cancelled")
+    phase: Optional[str] = Field(None, description="Current phase: extract, embed or store")
+    progress: Dict[str, Dict[str, int]] = Field(default_factory=dict, description="Done/total counts per phase")
+    result: Optional[SchemaIndexResponse] = Field(None, description="Indexing result once the job succeeds")
+    error: Optional[str] = Field(None, description="Error message if the job failed")
+    created_at: datetime = Field(default_factory=datetime.now, description="Submission timestamp")
+    started_at: Optional[datetime] = Field(None, description="Start timestamp")
+    finished_at: Optional[datetime] = Field(None, description="Completion timestamp")
+
+
 class QueryExecutionResponse(BaseModel):
     """Response model for query execution"""
     rows: List[Dict[str, Any]] = Field(default_factory=list, description="Query result rows")
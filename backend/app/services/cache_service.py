@@ -1,10 +1,12 @@
 try:
     import redis 
+    import redis.asyncio as aioredis
 except ImportError:
     redis = None
+    aioredis = None
    
 import json
-from typing import Any, Optional
+from typing import Any, Dict, Optional
 from app.config import settings
 from app.utils.logger import logger
 
@@ -14,6 +16,7 @@ class CacheService:
     
     def __init__(self):
         self.redis_client = None
+        self.async_client = None
         self._connect() 
     
     def _connect(self):
@@ -34,6 +37,15 @@ class CacheService:
         except Exception as e:
             logger.warning(f"Redis connection failed: {str(e)}. Caching disabled.")
             self.redis_client = None
+            return
+
+        # Request handlers use the asyncio client so cache I/O never blocks the loop
+        pool = aioredis.ConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS
+        )
+        self.async_client = aioredis.Redis(connection_pool=pool)
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache"""
@@ -96,14 +108,88 @@ class CacheService:
         except Exception as e:
             logger.error(f"Cache clear failed: {str(e)}")
     
+    async def aget(self, key: str) -> Optional[Any]:
+        """Get value from cache without blocking the event loop"""
+        if not self.async_client:
+            return None
+        
+        try:
+            value = await self.async_client.get(key)
+            if value:
+                logger.info(f"Cache hit for key: {key}")
+                return json.loads(value)
+            return None
+        
+        except Exception as e:
+            logger.error(f"Cache get failed: {str(e)}")
+            return None
+    
+    async def aset(
+        self,
+        key: str,
+        value: Any,
+        ttl: int = None
+    ):
+        """Set value in cache without blocking the event loop"""
+        if not self.async_client:
+            return
+        
+        try:
+            ttl = ttl or settings.CACHE_TTL
+            serialized = json.dumps(value)
+            await self.async_client.setex(key, ttl, serialized)
+            logger.info(f"Cached value for key: {key}")
+        
+        except Exception as e:
+            logger.error(f"Cache set failed: {str(e)}")
+    
+    async def adelete(self, key: str):
+        """Delete value from cache without blocking the event loop"""
+        if not self.async_client:
+            return
+        
+        try:
+            await self.async_client.delete(key)
+            logger.info(f"Deleted cache key: {key}")
+        
+        except Exception as e:
+            logger.error(f"Cache delete failed: {str(e)}")
+    
+    async def aclear_pattern(self, pattern: str):
+        """Clear all keys matching pattern without blocking the event loop"""
+        if not self.async_client:
+            return
+        
+        try:
+            keys = [key async for key in self.async_client.scan_iter(match=pattern)]
+            if keys:
+                await self.async_client.delete(*keys)
+                logger.info(f"Cleared {len(keys)} keys matching pattern: {pattern}")
+        
+        except Exception as e:
+            logger.error(f"Cache clear failed: {str(e)}")
+    
+    async def close(self):
+        """Release pooled async connections"""
+        if self.async_client:
+            await self.async_client.aclose()
+    
     def generate_query_key(
         self,
         query: str,
-        database_name: str
+        database_name: str,
+        options: Optional[Dict[str, Any]] = None
     ) -> str:
-        """Generate cache key for query"""
+        """
+        Generate cache key for query.
+        options (e.g. execute_query, include_explanation) are part of the key
+        because they change the response.
+        """
         import hashlib
-        query_hash = hashlib.md5(query.encode()).hexdigest()
+        payload = query
+        if options:
+            payload += "\0" + json.dumps(options, sort_keys=True, default=str)
+        query_hash = hashlib.md5(payload.encode()).hexdigest()
         return f"query:{database_name}:{query_hash}"
 
 
@@ -0,0 +1,121 @@
+from typing import Dict, Any, Optional
+import asyncio
+from app.config import settings
+from app.core.database.connections import db_manager
+from app.core.database.catalog import schema_catalog
+from app.utils.logger import logger
+from app.utils.exceptions import DatabaseException
+
+
+class DatabaseRegistry:
+    """Resolve indexed database names to warm, pooled engines"""
+
+    def __init__(self):
+        self.db_manager = db_manager
+        self.catalog = schema_catalog
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+        self._prewarm: Optional[asyncio.Task] = None
+
+    async def resolve(self, database_name: str) -> str:
+        """
+        Return the connection string for a database, creating its pooled
+        engine with the per-database pool settings on first use.
+        """
+        entry = self._entries.get(database_name)
+
+        if entry is None:
+            metadata = (await self.catalog.aget(database_name)).metadata
+            connection_string = metadata.get("connection_string")
+
+            if not connection_string:
+                raise DatabaseException(f"No connection configured for database: {database_name}")
+
+            entry = {
+                "connection_string": connection_string,
+                "pool_size": metadata.get("pool_size") or settings.DB_POOL_SIZE,
+                "max_overflow": (
+                    metadata["max_overflow"]
+                    if metadata.get("max_overflow") is not None
+                    else settings.DB_MAX_OVERFLOW
+                ),
+            }
+            self._entries[database_name] = entry
+
+        self.db_manager.get_engine(
+            entry["connection_string"],
+            pool_size=entry["pool_size"],
+            max_overflow=entry["max_overflow"]
+        )
+        return entry["connection_string"]
+
+    def invalidate(self, database_name: str):
+        """Forget a database so the next resolve re-reads its metadata"""
+        entry = self._entries.pop(database_name, None)
+        if entry is not None:
+            self.db_manager.dispose_engine(entry["connection_string"])
+
+    async def prewarm(self):
+        """Open pooled connections for every indexed database"""
+        database_names = await self.catalog.alist_databases()
+
+        for database_name in database_names:
+            try:
+                connection_string = await self.resolve(database_name)
+                connections = min(
+                    self._entries[database_name]["pool_size"],
+                    settings.DB_PREWARM_CONNECTIONS
+                )
+                await asyncio.to_thread(self._open_connections, connection_string, connections)
+                logger.info(f"Pre-warmed {connections} connections for database: {database_name}")
+
+            except Exception as e:
+                logger.warning(f"Failed to pre-warm database '{database_name}': {str(e)}")
+
+    def _open_connections(self, connection_string: str, count: int):
+        """Check out connections together so the pool keeps all of them"""
+        engine = self.db_manager.get_engine(connection_string)
+        connections = []
+        try:
+            for _ in range(count):
+                connections.append(engine.connect())
+        finally:
+            for connection in connections:
+                connection.close()
+
+    def start(self):
+        """Start pre-warming pools and evicting idle engines in the background"""
+        if settings.DB_PREWARM_ON_STARTUP and (self._prewarm is None or self._prewarm.done()):
+            self._prewarm = asyncio.create_task(self.prewarm())
+
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_idle())
+
+    async def stop(self):
+        """Stop pre-warming and the idle sweeper, then close all pools"""
+        for task in (self._prewarm, self._sweeper):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._prewarm = None
+        self._sweeper = None
+
+        self.db_manager.close_all()
+
+    async def _sweep_idle(self):
+        while True:
+            await asyncio.sleep(settings.DB_IDLE_SWEEP_INTERVAL_SECONDS)
+            evicted = await asyncio.to_thread(
+                self.db_manager.evict_idle,
+                settings.DB_ENGINE_IDLE_SECONDS
+            )
+            if evicted:
+                logger.info(f"Evicted {len(evicted)} idle database engines")
+
+
+# Global instance
+database_registry = DatabaseRegistry()
@@ -0,0 +1,130 @@
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+import hashlib
+from app.config import settings
+from app.core.sql.generator import sql_generator
+from app.services.cache_service import cache_service
+from app.services.request_coalescer import RequestCoalescer
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+from app.utils.exceptions import ExplanationNotFoundException
+
+
+class ExplanationService:
+    """
+    Explain validated SQL at most once per normalized query, so the
+    explanation can be fetched lazily or generated off the critical path.
+    """
+
+    def __init__(self):
+        self.generator = sql_generator
+        self.cache = cache_service
+        # Separate from text-to-SQL coalescing so their metrics stay apart
+        self.coalescer = RequestCoalescer("explanation_coalescer")
+        self.max_entries = settings.EXPLANATION_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def explanation_id(database_name: str, sql: str) -> str:
+        """Stable id for a query; whitespace differences map to the same id"""
+        normalized = " ".join(sql.split())
+        return hashlib.sha256(f"{database_name}\0{normalized}".encode()).hexdigest()[:32]
+
+    async def register(
+        self,
+        database_name: str,
+        sql: str,
+        schema_context: str
+    ) -> str:
+        """Remember what is needed to explain a query later and return its id"""
+        explanation_id, entry, created = self._track(database_name, sql, schema_context)
+        if created:
+            # Shared so any worker can serve the lazy fetch
+            await self.cache.aset(self._cache_key(explanation_id), entry)
+        return explanation_id
+
+    async def explain(
+        self,
+        database_name: str,
+        sql: str,
+        schema_context: str
+    ) -> Dict[str, Any]:
+        """Return the explanation for a query, generating it if needed"""
+        explanation_id, _, _ = self._track(database_name, sql, schema_context)
+        return await self.get(explanation_id)
+
+    async def get(self, explanation_id: str) -> Dict[str, Any]:
+        """Return the explanation for an id, generating it on first request"""
+        entry = self._entries.get(explanation_id)
+
+        if entry is None or entry["explanation"] is None:
+            cached = await self.cache.aget(self._cache_key(explanation_id))
+            if cached:
+                entry = cached
+                self._remember(explanation_id, entry)
+
+        if entry is None:
+            raise ExplanationNotFoundException(f"Explanation not found: {explanation_id}")
+
+        if entry["explanation"] is not None:
+            metrics.increment("explanation_cache.hits")
+        else:
+            metrics.increment("explanation_cache.misses")
+            # Concurrent fetches of the same query share one LLM call
+            entry["explanation"] = await self.coalescer.run(
+                self._cache_key(explanation_id),
+                lambda: self._generate(explanation_id, entry),
+            )
+
+        return {
+            "explanation_id": explanation_id,
+            "sql_query": entry["sql_query"],
+            "explanation": entry["explanation"],
+        }
+
+    async def _generate(self, explanation_id: str, entry: Dict[str, Any]) -> str:
+        logger.info(f"Generating explanation: {explanation_id}")
+        explanation = await self.generator.explain(
+            entry["sql_query"],
+            entry["schema_context"],
+        )
+        await self.cache.aset(
+            self._cache_key(explanation_id),
+            {**entry, "explanation": explanation},
+        )
+        return explanation
+
+    def _track(
+        self,
+        database_name: str,
+        sql: str,
+        schema_context: str
+    ) -> Tuple[str, Dict[str, Any], bool]:
+        explanation_id = self.explanation_id(database_name, sql)
+        entry = self._entries.get(explanation_id)
+        if entry is not None:
+            self._entries.move_to_end(explanation_id)
+            return explanation_id, entry, False
+
+        entry = {
+            "database_name": database_name,
+            "sql_query": sql,
+            "schema_context": schema_context,
+            "explanation": None,
+        }
+        self._remember(explanation_id, entry)
+        return explanation_id, entry, True
+
+    def _remember(self, explanation_id: str, entry: Dict[str, Any]):
+        self._entries[explanation_id] = entry
+        self._entries.move_to_end(explanation_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    @staticmethod
+    def _cache_key(explanation_id: str) -> str:
+        return f"explanation:{explanation_id}"
+
+
+# Global instance
+explanation_service = ExplanationService()
@@ -0,0 +1,137 @@
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import uuid
+from app.config import settings
+from app.services.schema_service import schema_service
+from app.models.request import SchemaIndexRequest
+from app.models.response import SchemaJobResponse
+from app.utils.logger import logger
+from app.utils.exceptions import JobConflictException, JobNotFoundException
+
+TERMINAL_STATUSES = {"succeeded", "failed", "cancelled"}
+
+
+class IndexingJobService:
+    """
+    Run schema indexing as background jobs on a bounded worker pool.
+    Job state lives in this process only: it is lost on restart and each
+    worker of a multi-worker deployment sees just its own jobs.
+    """
+
+    def __init__(self):
+        self.schema_service = schema_service
+        self.jobs: Dict[str, SchemaJobResponse] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.INDEXING_MAX_CONCURRENT_JOBS)
+        return self._semaphore
+
+    def submit(self, request: SchemaIndexRequest) -> SchemaJobResponse:
+        """
+        Queue an indexing job and return immediately.
+        Raises JobConflictException if the database already has an active job.
+        """
+        active = self._active_job(request.database_name)
+        if active is not None:
+            raise JobConflictException(
+                f"Database '{request.database_name}' is already being indexed by job {active.job_id}"
+            )
+
+        job = SchemaJobResponse(
+            job_id=uuid.uuid4().hex,
+            database_name=request.database_name,
+            status="queued"
+        )
+        self.jobs[job.job_id] = job
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job, request))
+        self._prune()
+
+        logger.info(f"Queued indexing job {job.job_id} for database: {request.database_name}")
+        return job
+
+    def get(self, job_id: str) -> SchemaJobResponse:
+        """Get a job by ID"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise JobNotFoundException(f"No indexing job found with ID: {job_id}")
+        return job
+
+    def list_jobs(self) -> List[SchemaJobResponse]:
+        """List known jobs, newest first"""
+        return sorted(self.jobs.values(), key=lambda job: job.created_at, reverse=True)
+
+    def cancel(self, job_id: str) -> SchemaJobResponse:
+        """Cancel a queued or running job"""
+        job = self.get(job_id)
+        task = self._tasks.get(job_id)
+
+        if task is not None and not task.done():
+            task.cancel()
+            logger.info(f"Cancellation requested for indexing job {job_id}")
+
+            # A task cancelled before its first step never runs _run's handlers
+            if job.status == "queued":
+                job.status = "cancelled"
+                job.finished_at = datetime.now()
+                self._tasks.pop(job_id, None)
+
+        return job
+
+    async def wait(self, job_id: str) -> SchemaJobResponse:
+        """Wait for a job to reach a terminal status"""
+        job = self.get(job_id)
+        task = self._tasks.get(job_id)
+
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
+
+        return job
+
+    async def _run(self, job: SchemaJobResponse, request: SchemaIndexRequest):
+        def report(phase: str, done: int, total: int):
+            job.phase = phase
+            job.progress[phase] = {"done": done, "total": total}
+
+        try:
+            async with self._get_semaphore():
+                job.status = "running"
+                job.started_at = datetime.now()
+                job.result = await self.schema_service.index_schema(request, progress=report)
+                job.status = "succeeded"
+
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            logger.info(f"Indexing job {job.job_id} cancelled")
+
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Indexing job {job.job_id} failed: {str(e)}")
+
+        finally:
+            job.finished_at = datetime.now()
+            self._tasks.pop(job.job_id, None)
+
+    def _active_job(self, database_name: str) -> Optional[SchemaJobResponse]:
+        return next(
+            (
+                job for job in self.jobs.values()
+                if job.database_name == database_name and job.status not in TERMINAL_STATUSES
+            ),
+            None
+        )
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the retention limit"""
+        finished = [job for job in self.list_jobs() if job.status in TERMINAL_STATUSES]
+        for job in finished[settings.INDEXING_JOB_RETENTION:]:
+            self.jobs.pop(job.job_id, None)
+
+
+# Global instance
+indexing_job_service = IndexingJobService()
@@ -1,10 +1,19 @@
-from typing import Dict, Any
-from app.core.sql.generator import sql_generator
+from typing import AsyncIterator, Awaitable, Dict, Any, List, Optional, Tuple
+import asyncio
+import time
+from app.config import settings
+from app.core.llm.router import model_router
+from app.core.sql.generator import GenerationContext, sql_generator
 from app.core.sql.validator import sql_validator
+from app.core.sql.repair import sql_repairer
 from app.core.sql.executor import sql_executor
-from app.models.request import TextToSQLRequest, QueryExecutionRequest
-from app.models.response import TextToSQLResponse, QueryExecutionResponse
+from app.core.rag.semantic_cache import semantic_cache
+from app.services.database_registry import database_registry
+from app.services.explanation_service import explanation_service
+from app.models.request import TextToSQLRequest, QueryExecutionRequest, QueryStreamRequest
+from app.models.response import TextToSQLResponse, QueryExecutionResponse, ExplanationResponse
 from app.utils.logger import logger
+from app.utils.metrics import metrics
 from app.utils.exceptions import ValidationException, SQLGenerationException
 
 
@@ -14,7 +23,16 @@ class QueryService:
     def __init__(self):
         self.generator = sql_generator
         self.validator = sql_validator
+        self.repairer = sql_repairer
         self.executor = sql_executor
+        self.registry = database_registry
+        self.explanations = explanation_service
+        self.router = model_router
+        self.n_best = settings.SQL_CANDIDATES
+        self.candidate_stagger_seconds = settings.SQL_CANDIDATE_STAGGER_MS / 1000
+        self.candidate_temperatures = [
+            float(value) for value in settings.SQL_CANDIDATE_TEMPERATURES.split(",") if value.strip()
+        ] or [settings.LLM_TEMPERATURE]
     
     async def text_to_sql(
         self,
@@ -24,37 +42,208 @@ class QueryService:
         logger.info(f"Processing text-to-SQL request for database: {request.database_name}")
         
         try:
-            max_attempts = 3
-            generation_result: Dict[str, Any] = {}
-            sql_query = ""
-            validation_result: Dict[str, Any] = {
-                "is_valid": False,
-                "errors": ["Validation not executed"],
-                "warnings": [],
-            }
-            feedback: str | None = None
-
-            for attempt in range(1, max_attempts + 1):
-                generation_result = await self.generator.generate(
-                    user_query=request.query,
-                    database_name=request.database_name,
-                    include_explanation=request.include_explanation,
-                    validation_feedback=feedback,
+            generation_result, sql_query = await self._generate_validated_sql(request)
+            
+            explanation = None
+            explanation_id = None
+            explanation_task = None
+            if request.include_explanation:
+                mode = request.explanation_mode or settings.EXPLANATION_MODE
+                metrics.increment(f"explanation.mode.{mode}")
+                
+                if mode == "deferred":
+                    # The client fetches it from the explanation endpoint when needed
+                    explanation_id = await self.explanations.register(
+                        request.database_name,
+                        sql_query,
+                        generation_result["schema_context"],
+                    )
+                else:
+                    pending = self.explanations.explain(
+                        request.database_name,
+                        sql_query,
+                        generation_result["schema_context"],
+                    )
+                    if mode == "parallel":
+                        explanation_task = asyncio.create_task(pending)
+                    else:
+                        explanation, explanation_id = await self._await_explanation(
+                            pending, request.database_name, sql_query, generation_result
+                        )
+            
+            try:
+                # Execute if requested
+                execution_result = None
+                if request.execute_query:
+                    connection_string = await self.registry.resolve(request.database_name)
+                    execution_result = await self.executor.execute(
+                        sql=sql_query,
+                        connection_string=connection_string
+                    )
+            except BaseException:
+                if explanation_task is not None:
+                    explanation_task.cancel()
+                raise
+            
+            # In parallel mode the explanation ran while the query executed
+            if explanation_task is not None:
+                explanation, explanation_id = await self._await_explanation(
+                    explanation_task, request.database_name, sql_query, generation_result
                 )
+            
+            return TextToSQLResponse(
+                sql_query=sql_query,
+                explanation=explanation,
+                explanation_id=explanation_id,
+                confidence=generation_result["confidence"],
+                tables_used=generation_result["tables_used"],
+                execution_result=execution_result
+            )
+        
+        except Exception as e:
+            logger.error(f"Text-to-SQL conversion failed: {str(e)}")
+            raise SQLGenerationException(f"Failed to convert text to SQL: {str(e)}")
+
+    async def _await_explanation(
+        self,
+        pending: Awaitable[Dict[str, Any]],
+        database_name: str,
+        sql_query: str,
+        generation_result: Dict[str, Any]
+    ) -> Tuple[Optional[str], str]:
+        """
+        Explanation for the response; on failure the SQL is still returned
+        with an explanation_id so the client can retry the explanation.
+        """
+        try:
+            result = await pending
+        except Exception as e:
+            logger.error(f"SQL explanation failed, returning SQL without it: {str(e)}")
+            metrics.increment("explanation.failures")
+            explanation_id = await self.explanations.register(
+                database_name,
+                sql_query,
+                generation_result["schema_context"],
+            )
+            return None, explanation_id
+        return result["explanation"], result["explanation_id"]
 
-                sql_query_raw = generation_result["sql_query"]
-                logger.info(f"Generated SQL candidate (attempt {attempt}/{max_attempts}): {sql_query_raw}")
+    async def get_explanation(self, explanation_id: str) -> ExplanationResponse:
+        """Explain a previously generated query, generating it on first request"""
+        result = await self.explanations.get(explanation_id)
+        return ExplanationResponse(**result)
 
-                sql_query = self._extract_sql(sql_query_raw)
-                validation_result = self.validator.validate(
-                    sql_query,
-                    database_name=request.database_name,
-                )
+    async def text_to_sql_stream(
+        self,
+        request: TextToSQLRequest
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Convert natural language to SQL, yielding (event, data) pairs.
+        The sql event is emitted as soon as validation passes and explanation
+        chunks are forwarded while the LLM is still generating them.
+        """
+        logger.info(f"Streaming text-to-SQL request for database: {request.database_name}")
+        started = time.perf_counter()
+
+        try:
+            generation_result, sql_query = await self._generate_validated_sql(request)
+        except Exception as e:
+            logger.error(f"Text-to-SQL conversion failed: {str(e)}")
+            raise SQLGenerationException(f"Failed to convert text to SQL: {str(e)}")
+
+        ttfb_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("stream.ttfb_ms", ttfb_ms)
+        logger.info(f"Streaming SQL event after {ttfb_ms:.1f} ms")
+
+        yield "sql", {
+            "sql_query": sql_query,
+            "confidence": generation_result["confidence"],
+            "tables_used": generation_result["tables_used"],
+        }
+
+        first_token_ms = None
+        if request.include_explanation:
+            async for chunk in self.generator.stream_explanation(
+                sql_query=sql_query,
+                schema_context=generation_result["schema_context"],
+            ):
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - started) * 1000
+                    metrics.observe("stream.explanation_first_token_ms", first_token_ms)
+                yield "explanation", {"chunk": chunk}
+
+        total_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("stream.total_ms", total_ms)
+
+        yield "done", {
+            "ttfb_ms": round(ttfb_ms, 2),
+            "explanation_first_token_ms": (
+                round(first_token_ms, 2) if first_token_ms is not None else None
+            ),
+            "total_ms": round(total_ms, 2),
+        }
+
+    async def _generate_validated_sql(
+        self,
+        request: TextToSQLRequest
+    ) -> Tuple[Dict[str, Any], str]:
+        """
+        Generate SQL, retrying with validation feedback until it validates.
+        Retrieval and prompt building run once; only generation is retried.
+        With SQL_CANDIDATES > 1 the first attempt races several candidates.
+        """
+        max_attempts = 3
+        started = time.perf_counter()
+        context = await self.generator.prepare(request.query, request.database_name)
+        sql_query = ""
+        validation_result: Dict[str, Any] = {
+            "is_valid": False,
+            "errors": ["Validation not executed"],
+            "warnings": [],
+        }
+        feedback: str | None = None
+        # A rejected semantic-cache hit says nothing about the routed model
+        model_failed = False
+
+        initial_route = context.route
+
+        try:
+            for attempt in range(1, max_attempts + 1):
+                if attempt == 1 and self.n_best > 1 and not context.cached:
+                    sql_query, validation_result = await self._first_valid_candidate(context, request)
+                    cached_question = None
+                else:
+                    if model_failed:
+                        context.route = self.router.escalate(context.route)
+                    candidate = await self.generator.generate_sql(
+                        context,
+                        validation_feedback=feedback,
+                    )
+                    logger.info(
+                        f"Generated SQL candidate (attempt {attempt}/{max_attempts}): {candidate['sql_query']}"
+                    )
+                    sql_query, validation_result = await self._check_candidate(
+                        candidate["sql_query"],
+                        request.database_name,
+                    )
+                    cached_question = candidate["semantic_cache_hit"]
 
                 if validation_result["is_valid"]:
                     logger.info(f"SQL validation passed on attempt {attempt}")
+                    if not cached_question:
+                        semantic_cache.add(
+                            database_name=request.database_name,
+                            question=request.query,
+                            sql=sql_query,
+                            embedding=context.query_embedding,
+                        )
                     break
 
+                if cached_question:
+                    semantic_cache.discard(request.database_name, cached_question)
+                else:
+                    model_failed = True
+
                 logger.warning(
                     "SQL validation failed on attempt %s: %s",
                     attempt,
@@ -73,27 +262,123 @@ class QueryService:
                         f"Generated SQL is invalid after {max_attempts} attempts: "
                         f"{', '.join(validation_result['errors'])}"
                     )
-            
-            # Sanitize query
-            sql_query = self.validator.sanitize_query(sql_query)
-            
-            # Execute if requested
-            execution_result = None
-            if request.execute_query:
-                # Note: Would need connection string from database registry
-                logger.info("Query execution requested but connection string not provided")
-            
-            return TextToSQLResponse(
-                sql_query=sql_query,
-                explanation=generation_result.get("explanation"),
-                confidence=generation_result["confidence"],
-                tables_used=generation_result["tables_used"],
-                execution_result=execution_result
+        except Exception:
+            self.router.record(
+                initial_route,
+                valid=False,
+                elapsed_ms=(time.perf_counter() - started) * 1000,
+                escalated=context.route != initial_route,
             )
-        
-        except Exception as e:
-            logger.error(f"Text-to-SQL conversion failed: {str(e)}")
-            raise SQLGenerationException(f"Failed to convert text to SQL: {str(e)}")
+            raise
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("sql_generation.attempts", attempt)
+        metrics.observe("sql_generation.validated_ms", elapsed_ms)
+        self.router.record(
+            initial_route,
+            valid=True,
+            elapsed_ms=elapsed_ms,
+            escalated=context.route != initial_route,
+        )
+
+        # Formatted by the validator from the same parse
+        sql_query = validation_result["formatted_sql"]
+
+        generation_result = {
+            **context.as_result(),
+            "sql_query": sql_query,
+            "semantic_cache_hit": cached_question,
+        }
+
+        return generation_result, sql_query
+
+    async def _check_candidate(
+        self,
+        raw_sql: str,
+        database_name: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Extract, validate and, if possible, locally repair one candidate"""
+        sql_query = self._extract_sql(raw_sql)
+        # Refreshed catalog also serves the repairer's lookup below
+        validation_result = await self.validator.avalidate(
+            sql_query,
+            database_name=database_name,
+        )
+
+        # Misspelled identifiers are fixed locally instead of costing a regeneration
+        if not validation_result["is_valid"]:
+            repaired = self.repairer.repair(
+                sql_query,
+                database_name,
+                validation_result,
+            )
+            if repaired is not None:
+                sql_query, validation_result = repaired
+
+        return sql_query, validation_result
+
+    async def _first_valid_candidate(
+        self,
+        context: GenerationContext,
+        request: TextToSQLRequest
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Generate n candidates concurrently at different temperatures and
+        validate each as it arrives. The first valid one wins and the rest
+        are cancelled; if none is valid the last invalid one is returned so
+        its errors drive the feedback retries.
+
+        Requests sent together all miss a cold prompt cache, since a cache
+        entry is readable only once the first response has started; a
+        stagger delay lets the later candidates read it. Candidates are not
+        hedged, so a request makes at most n calls.
+        """
+        metrics.increment("sql_nbest.requests")
+
+        def start(i: int) -> asyncio.Future:
+            return asyncio.ensure_future(self.generator.generate_sql(
+                context,
+                temperature=self.candidate_temperatures[i % len(self.candidate_temperatures)],
+                hedge=False,
+            ))
+
+        tasks = [start(0)]
+        if self.candidate_stagger_seconds > 0:
+            try:
+                await asyncio.wait(tasks, timeout=self.candidate_stagger_seconds)
+            except BaseException:
+                tasks[0].cancel()
+                raise
+        tasks += [start(i) for i in range(1, self.n_best)]
+
+        result: Tuple[str, Dict[str, Any]] | None = None
+        last_error: Exception | None = None
+        try:
+            for arrival, next_candidate in enumerate(asyncio.as_completed(tasks), 1):
+                try:
+                    candidate = await next_candidate
+                except Exception as e:
+                    logger.warning(f"SQL candidate generation failed: {str(e)}")
+                    last_error = e
+                    continue
+
+                logger.info(f"Generated SQL candidate {arrival}/{self.n_best}: {candidate['sql_query']}")
+                result = await self._check_candidate(candidate["sql_query"], request.database_name)
+
+                if result[1]["is_valid"]:
+                    metrics.increment("sql_nbest.valid")
+                    metrics.observe("sql_nbest.winner_arrival", arrival)
+                    metrics.increment("sql_nbest.cancelled", self.n_best - arrival)
+                    return result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if result is None:
+            raise last_error
+
+        metrics.increment("sql_nbest.all_invalid")
+        return result
 
     def _extract_sql(self, text: str) -> str:
         """Extract SQL statement from LLM output possibly containing markdown fences and prose."""
@@ -137,13 +422,14 @@ class QueryService:
     
     async def execute_query(
         self,
-        request: QueryExecutionRequest,
-        connection_string: str
+        request: QueryExecutionRequest
     ) -> QueryExecutionResponse:
         """Execute SQL query"""
         logger.info(f"Executing query for database: {request.database_name}")
         
         try:
+            connection_string = await self.registry.resolve(request.database_name)
+            
             result = await self.executor.execute(
                 sql=request.sql_query,
                 connection_string=connection_string,
@@ -160,6 +446,22 @@ class QueryService:
             logger.error(f"Query execution failed: {str(e)}")
             raise
 
+    async def stream_query(
+        self,
+        request: QueryStreamRequest
+    ) -> Tuple[List[str], AsyncIterator[List[tuple]]]:
+        """Execute SQL query and stream row batches"""
+        logger.info(f"Streaming query for database: {request.database_name}")
+        
+        connection_string = await self.registry.resolve(request.database_name)
+        
+        return await self.executor.stream(
+            sql=request.sql_query,
+            connection_string=connection_string,
+            limit=request.limit
+        )
+    
+
 
 # Global instance
 query_service = QueryService()
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+class RequestCoalescer:
+    """Share one in-flight computation between concurrent identical requests"""
+
+    def __init__(self, name: str = "coalescer"):
+        # Metric prefix, so each coalescer reports its own traffic
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run factory() once per key among concurrent callers.
+        Every caller awaits the same task, so results and errors are shared.
+        """
+        task = self._in_flight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._on_done(key, done))
+            self.leaders += 1
+            metrics.increment(f"{self.name}.leaders")
+        else:
+            self.coalesced += 1
+            metrics.increment(f"{self.name}.coalesced")
+            logger.info(f"Coalesced request onto in-flight key: {key}")
+
+        # Shield so one disconnecting caller does not cancel the shared work.
+        return await asyncio.shield(task)
+
+    def _on_done(self, key: str, task: asyncio.Task):
+        """Forget the finished task and mark its error as observed"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        if not task.cancelled():
+            # Avoid "exception was never retrieved" when every waiter went away.
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing counters"""
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
+
+
+# Global instance
+request_coalescer = RequestCoalescer()
@@ -1,8 +1,12 @@
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 from datetime import datetime
+import asyncio
+from app.config import settings
 from app.core.database.schema_extractor import schema_extractor
-from app.core.database.metadata import metadata_store
+from app.core.database.catalog import schema_catalog
 from app.core.rag.indexer import schema_indexer
+from app.core.rag.semantic_cache import semantic_cache
+from app.services.database_registry import database_registry
 from app.models.request import SchemaIndexRequest
 from app.models.response import SchemaIndexResponse
 from app.utils.logger import logger
@@ -15,48 +19,106 @@ class SchemaService:
     def __init__(self):
         self.extractor = schema_extractor
         self.indexer = schema_indexer
-        self.metadata_store = metadata_store
+        self.catalog = schema_catalog
     
     async def index_schema(
         self,
-        request: SchemaIndexRequest
+        request: SchemaIndexRequest,
+        progress: Optional[Callable[[str, int, int], None]] = None
     ) -> SchemaIndexResponse:
-        """Index database schema into vector store"""
+        """
+        Index database schema into vector store.
+        progress(phase, done, total) is called as extract/embed/store advance.
+        """
         logger.info(f"Indexing schema for database: {request.database_name}")
+        report = progress or (lambda phase, done, total: None)
         
         try:
-            # Extract schema from database
-            database_schema = self.extractor.extract_schema(
-                connection_string=request.connection_string,
-                database_name=request.database_name
+            # Cheap catalog fingerprint lets unchanged schemas skip the whole pipeline
+            fingerprint = await asyncio.to_thread(
+                self.extractor.compute_fingerprint,
+                request.connection_string
             )
             
-            # Add description if provided
-            if request.description:
-                database_schema.description = request.description
+            if not request.force:
+                stored = (await self.catalog.aget(request.database_name)).metadata
+                if (
+                    self._is_unchanged(stored, request, fingerprint)
+                    # The collection may have been wiped or rebuilt since
+                    and await self.indexer.count_documents(request.database_name) == stored["table_count"]
+                ):
+                    logger.info(
+                        f"Schema fingerprint unchanged for {request.database_name}; skipping re-index"
+                    )
+                    return SchemaIndexResponse(
+                        database_name=request.database_name,
+                        tables_indexed=stored["table_count"],
+                        columns_indexed=stored.get("column_count", 0),
+                        tables_unchanged=stored["table_count"],
+                        status="unchanged",
+                        indexed_at=datetime.fromisoformat(stored["indexed_at"])
+                    )
             
-            # Index schema into vector store
-            stats = await self.indexer.index_database_schema(database_schema)
+            # Listing names is cheap; columns and constraints are reflected batch by batch
+            table_names = await asyncio.to_thread(
+                self.extractor.get_table_names,
+                request.connection_string
+            )
+            batches = self.extractor.iter_table_batches(
+                request.connection_string,
+                table_names,
+                batch_size=settings.INDEXING_BATCH_SIZE
+            )
+            
+            # Keep the compact column-level form for the catalog as batches stream past
+            table_entries = []
+            
+            def collect(batches):
+                for batch in batches:
+                    table_entries.extend(self.catalog.table_entry(table) for table in batch)
+                    yield batch
+            
+            # Index schema into vector store as tables stream in
+            stats = await self.indexer.index_table_batches(
+                request.database_name,
+                collect(batches),
+                total_tables=len(table_names),
+                progress=report
+            )
             
             # Save metadata
             metadata = {
                 "database_name": request.database_name,
                 "connection_string": request.connection_string,  
                 "description": request.description,
-                "tables": [t.name for t in database_schema.tables],
-                "table_count": len(database_schema.tables),
+                "pool_size": request.pool_size,
+                "max_overflow": request.max_overflow,
+                "tables": table_entries,
+                "table_count": stats["tables_indexed"],
+                "column_count": stats["columns_indexed"],
+                "fingerprint": fingerprint,
+                "embedding_model": settings.EMBEDDING_MODEL,
                 "indexed_at": datetime.now().isoformat()
             }
             
-            self.metadata_store.save_metadata(
-                database_name=request.database_name,
-                metadata=metadata
-            )
+            # Atomic write; installs a new catalog version, which also
+            # retires memoized validation results for this database
+            await self.catalog.asave(request.database_name, metadata)
+            
+            # Cached SQL may reference tables or columns that no longer exist
+            if stats["tables_added"] or stats["tables_changed"] or stats["tables_removed"]:
+                semantic_cache.invalidate(request.database_name)
+            # Pick up a changed connection string or pool settings
+            database_registry.invalidate(request.database_name)
             
             return SchemaIndexResponse(
                 database_name=request.database_name,
                 tables_indexed=stats["tables_indexed"],
                 columns_indexed=stats["columns_indexed"],
+                tables_added=stats["tables_added"],
+                tables_changed=stats["tables_changed"],
+                tables_removed=stats["tables_removed"],
+                tables_unchanged=stats["tables_unchanged"],
                 status="success",
                 indexed_at=datetime.now()
             )
@@ -65,23 +127,46 @@ class SchemaService:
             logger.error(f"Schema indexing failed: {str(e)}")
             raise DatabaseException(f"Failed to index schema: {str(e)}")
     
-    def get_schema_info(
+    @staticmethod
+    def _is_unchanged(
+        stored: Dict[str, Any],
+        request: SchemaIndexRequest,
+        fingerprint: str
+    ) -> bool:
+        """Whether the stored index already reflects this catalog and request"""
+        if not stored or stored.get("fingerprint") != fingerprint:
+            return False
+        
+        # Older metadata listed table names only; re-index to store columns
+        if not all(isinstance(table, dict) for table in stored.get("tables", [])):
+            return False
+        
+        # Documents embedded with another model must be re-embedded
+        if stored.get("embedding_model") != settings.EMBEDDING_MODEL:
+            return False
+        
+        return all(
+            stored.get(field) == getattr(request, field)
+            for field in ("connection_string", "description", "pool_size", "max_overflow")
+        )
+    
+    async def get_schema_info(
         self,
         database_name: str
     ) -> Dict[str, Any]:
         """Get schema information for a database"""
         logger.info(f"Retrieving schema info for database: {database_name}")
         
-        metadata = self.metadata_store.load_metadata(database_name)
+        catalog = await self.catalog.aget(database_name)
         
-        if not metadata:
+        if not catalog.exists:
             raise DatabaseException(f"No schema found for database: {database_name}")
         
-        return metadata
+        return catalog.metadata
     
-    def list_databases(self) -> list:
+    async def list_databases(self) -> list:
         """List all indexed databases"""
-        return self.metadata_store.list_databases()
+        return await self.catalog.alist_databases()
 
 
 # Global instance
@@ -31,3 +31,18 @@ class SchemaNotFoundException(Text2SQLException):
 class SQLGenerationException(Text2SQLException):
     """Exception raised when SQL generation fails"""
     pass
+
+
+class JobNotFoundException(Text2SQLException):
+    """Exception raised when a background job is not found"""
+    pass
+
+
+class JobConflictException(Text2SQLException):
+    """Exception raised when a database already has an active indexing job"""
+    pass
+
+
+class ExplanationNotFoundException(Text2SQLException):
+    """Exception raised when a query explanation is not found"""
+    pass
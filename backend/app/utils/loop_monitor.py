@@ -0,0 +1,46 @@
+import asyncio
+import time
+from typing import Optional
+from app.config import settings
+from app.utils.logger import logger
+from app.utils.metrics import metrics
+
+
+class EventLoopMonitor:
+    """Measure how late the event loop wakes up a periodic timer"""
+
+    def __init__(self):
+        self.interval = settings.LOOP_LAG_INTERVAL_MS / 1000
+        self.warn_threshold_ms = settings.LOOP_LAG_WARN_MS
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling loop lag on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop sampling"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+
+            metrics.observe("event_loop.lag_ms", lag_ms)
+            if lag_ms > self.warn_threshold_ms:
+                metrics.increment("event_loop.lag_warnings")
+                logger.warning(f"Event loop blocked for {lag_ms:.1f} ms")
+
+
+# Global instance
+loop_monitor = EventLoopMonitor()
@@ -0,0 +1,94 @@
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, Any
+
+
+class Histogram:
+    """Rolling histogram over the most recent observations"""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        """Record a single observation"""
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self._recent.append(value)
+
+    def percentile(self, pct: float) -> float:
+        """Return the given percentile over the recent window"""
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the histogram for reporting"""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "min": round(self.min, 3) if self.min is not None else 0.0,
+            "max": round(self.max, 3) if self.max is not None else 0.0,
+            "p50": round(self.percentile(50), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+        }
+
+
+class MetricsRegistry:
+    """In-process counters and histograms for performance reporting"""
+
+    def __init__(self):
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = Lock()
+
+    def increment(self, name: str, value: float = 1):
+        """Increment a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float):
+        """Record a value in a histogram"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def get_counter(self, name: str) -> float:
+        """Return the current value of a counter"""
+        return self._counters.get(name, 0)
+
+    def get_count(self, name: str) -> int:
+        """Return how many observations a histogram has recorded"""
+        histogram = self._histograms.get(name)
+        return histogram.count if histogram else 0
+
+    def percentile(self, name: str, pct: float) -> float:
+        """Return a percentile for a histogram, or 0 when it has no data"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return histogram.percentile(pct) if histogram else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all counters and histogram summaries"""
+        with self._lock:
+            return {
+                "counters": dict(sorted(self._counters.items())),
+                "histograms": {
+                    name: histogram.summary()
+                    for name, histogram in sorted(self._histograms.items())
+                },
+            }
+
+
+# Global instance
+metrics = MetricsRegistry()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark SQLValidator.validate + formatting against the multi-pass validator
+it replaced. The baseline is the real module loaded from git (the revision
+before the parse-once change by default), run as validate + sanitize_query.
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import subprocess
+import importlib.util
+import random
+import argparse
+from pathlib import Path
+
+# Add parent directory to path
+BACKEND_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BACKEND_ROOT)
+
+from app.core.database.catalog import schema_catalog
+from app.core.sql.validator import SQLValidator
+
+
+TABLES = {
+    "customers": ["id", "name", "email", "country", "created_at"],
+    "orders": ["id", "customer_id", "status", "total", "created_at"],
+    "order_items": ["id", "order_id", "product_id", "quantity", "unit_price"],
+    "products": ["id", "name", "category", "price"],
+    "payments": ["id", "order_id", "amount", "method", "paid_at"],
+}
+
+SCHEMA = {
+    "tables": [
+        {"name": name, "columns": [{"name": col} for col in cols]}
+        for name, cols in TABLES.items()
+    ]
+}
+
+
+def build_corpus(size: int, rng: random.Random) -> list:
+    """Generate queries shaped like LLM output for a small commerce schema"""
+    templates = [
+        lambda: (
+            "SELECT c.name, COUNT(o.id) AS order_count FROM customers c "
+            "JOIN orders o ON o.customer_id = c.id "
+            f"WHERE o.status = '{rng.choice(['paid', 'shipped', 'pending'])}' "
+            "GROUP BY c.name ORDER BY order_count DESC LIMIT 10"
+        ),
+        lambda: (
+            "WITH monthly AS (SELECT DATE_TRUNC('month', o.created_at) AS month, "
+            "SUM(o.total) AS revenue FROM orders o GROUP BY 1) "
+            "SELECT m.month, m.revenue FROM monthly m ORDER BY m.month"
+        ),
+        lambda: (
+            "SELECT p.category, SUM(oi.quantity * oi.unit_price) AS sales "
+            "FROM order_items oi JOIN products p ON p.id = oi.product_id "
+            "JOIN orders o ON o.id = oi.order_id "
+            f"WHERE o.created_at >= '2024-0{rng.randint(1, 9)}-01' "
+            "GROUP BY p.category HAVING SUM(oi.quantity) > 5"
+        ),
+        lambda: (
+            "-- top spenders\n"
+            "SELECT c.email, SUM(pay.amount) AS spent FROM customers c "
+            "LEFT JOIN orders o ON o.customer_id = c.id "
+            "LEFT JOIN payments pay ON pay.order_id = o.id "
+            f"WHERE c.country = '{rng.choice(['US', 'DE', 'IN'])}' "
+            "GROUP BY c.email ORDER BY spent DESC"
+        ),
+        lambda: (
+            "SELECT o.id, o.total, RANK() OVER (PARTITION BY o.customer_id "
+            "ORDER BY o.total DESC) AS rnk FROM orders o "
+            "WHERE o.total > (SELECT AVG(o2.total) FROM orders o2)"
+        ),
+        lambda: "SELECT p.name, p.misspelled FROM products p",
+        lambda: "DELETE FROM orders WHERE id = 1",
+        lambda: "SELECT * FROM customers; DROP TABLE customers",
+    ]
+    return [rng.choice(templates)() for _ in range(size)]
+
+
+def load_baseline_validator(revision: str, workdir: Path):
+    """
+    Import SQLValidator as it was at a git revision. The module is written to
+    a scratch tree so its file-based schema lookup reads the benchmark schema.
+    """
+    source = subprocess.run(
+        ["git", "show", f"{revision}:backend/app/core/sql/validator.py"],
+        cwd=BACKEND_ROOT, check=True, capture_output=True, text=True
+    ).stdout
+
+    module_path = workdir / "app" / "core" / "sql" / "validator.py"
+    module_path.parent.mkdir(parents=True)
+    module_path.write_text(source, encoding="utf-8")
+
+    schema_path = workdir / "data" / "schemas" / "benchmark.json"
+    schema_path.parent.mkdir(parents=True)
+    schema_path.write_text(json.dumps(SCHEMA), encoding="utf-8")
+
+    spec = importlib.util.spec_from_file_location("baseline_validator", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SQLValidator
+
+
+def run(validator, corpus, database_name, baseline: bool) -> float:
+    """Return queries per second for validate + format"""
+    start = time.perf_counter()
+    for sql in corpus:
+        result = validator.validate(sql, database_name=database_name)
+        if baseline:
+            validator.sanitize_query(sql)
+        else:
+            result["formatted_sql"]
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def compare(baseline, corpus, rounds: int):
+    """Print formatting parity and throughput for both validators"""
+    parse_once = SQLValidator()
+    # Measure the validation pipeline itself, not memoized repeats
+    parse_once.max_cached_results = 0
+    validators = {"baseline": baseline, "parse-once": parse_once}
+
+    # Formatting must match the baseline sanitize_query output
+    mismatches = sum(
+        validators["parse-once"].validate(sql)["formatted_sql"]
+        != validators["baseline"].sanitize_query(sql)
+        for sql in corpus[:200]
+    )
+    print(f"\nFormatting mismatches vs baseline sanitize_query: {mismatches}/200")
+
+    print(f"\n{'pipeline':>12} {'queries/s':>12}")
+    results = {}
+    for name, validator in validators.items():
+        results[name] = max(
+            run(validator, corpus, "benchmark", baseline=(name == "baseline"))
+            for _ in range(rounds)
+        )
+        print(f"{name:>12} {results[name]:>12.0f}")
+
+    print(f"\nSpeedup: {results['parse-once'] / results['baseline']:.2f}x")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Compare parse-once SQL validation with the multi-pass baseline"
+    )
+    parser.add_argument("--queries", type=int, default=2000, help="Corpus size")
+    parser.add_argument("--rounds", type=int, default=3, help="Timed rounds (best is reported)")
+    parser.add_argument(
+        "--baseline-rev", default="bfb1d3d^",
+        help="Git revision to load the baseline validator from"
+    )
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.queries, random.Random(42))
+    schema_catalog.put("benchmark", SCHEMA)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline_cls = load_baseline_validator(args.baseline_rev, Path(workdir))
+        compare(baseline_cls(), corpus, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-memory NumPy vector index against Chroma's collection.query.
+Uses random normalized embeddings in a throwaway Chroma collection.
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+
+from app.core.rag.vector_index import DatabaseVectorIndex
+
+
+def random_embeddings(rng, count: int, dim: int) -> np.ndarray:
+    """Generate random unit vectors"""
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def time_queries(func, queries) -> float:
+    """Return mean latency in milliseconds"""
+    start = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def benchmark(table_count: int, dim: int, queries: int, top_k: int, rng) -> dict:
+    """Benchmark both backends for one schema size"""
+    with tempfile.TemporaryDirectory() as path:
+        client = chromadb.PersistentClient(
+            path=path,
+            settings=ChromaSettings(anonymized_telemetry=False)
+        )
+        collection = client.create_collection("benchmark")
+
+        embeddings = random_embeddings(rng, table_count, dim)
+        ids = [f"table_{i}" for i in range(table_count)]
+        documents = [f"Table: table_{i}" for i in range(table_count)]
+        metadatas = [
+            {"database_name": "benchmark", "table_name": f"table_{i}"}
+            for i in range(table_count)
+        ]
+
+        # Respect Chroma's maximum batch size
+        batch = 5000
+        for start in range(0, table_count, batch):
+            end = start + batch
+            collection.add(
+                ids=ids[start:end],
+                documents=documents[start:end],
+                metadatas=metadatas[start:end],
+                embeddings=embeddings[start:end].tolist()
+            )
+
+        index = DatabaseVectorIndex(ids, documents, metadatas, embeddings)
+        query_vectors = [q.tolist() for q in random_embeddings(rng, queries, dim)]
+
+        chroma_ms = time_queries(
+            lambda q: collection.query(
+                query_embeddings=[q],
+                n_results=top_k,
+                where={"database_name": "benchmark"}
+            ),
+            query_vectors
+        )
+        numpy_ms = time_queries(lambda q: index.query(q, top_k), query_vectors)
+
+        return {
+            "tables": table_count,
+            "chroma_ms": chroma_ms,
+            "numpy_ms": numpy_ms,
+        }
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(
+        description="Compare in-memory vector index with Chroma queries"
+    )
+    parser.add_argument("--sizes", default="100,1000,10000", help="Comma-separated table counts")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per size")
+    parser.add_argument("--top-k", type=int, default=5, help="Results per query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    print(f"\n{'tables':>8} {'chroma ms':>12} {'numpy ms':>12} {'speedup':>10}")
+    for size in sizes:
+        result = benchmark(size, args.dim, args.queries, args.top_k, rng)
+        speedup = result["chroma_ms"] / result["numpy_ms"] if result["numpy_ms"] else float("inf")
+        print(
+            f"{result['tables']:>8} {result['chroma_ms']:>12.3f} "
+            f"{result['numpy_ms']:>12.3f} {speedup:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -12,32 +12,74 @@ import argparse
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.services.schema_service import schema_service
+from app.services.job_service import indexing_job_service
+from app.core.database.schema_extractor import schema_extractor
 from app.models.request import SchemaIndexRequest
 from app.utils.logger import logger
 
 
+def compare_extraction(connection_string: str, database_name: str):
+    """Time bulk reflection against per-table reflection"""
+    print("\n⏱️  Comparing schema extraction strategies...")
+    
+    for bulk in (False, True):
+        schema = schema_extractor.extract_schema(
+            connection_string=connection_string,
+            database_name=database_name,
+            bulk=bulk
+        )
+        extraction = schema.metadata["extraction"]
+        print(
+            f"   {extraction['mode']:<10} {len(schema.tables):>6} tables "
+            f"in {extraction['duration_ms']:>10.1f} ms"
+        )
+
+
 async def index_database(
     connection_string: str,
     database_name: str,
-    description: str = None
+    description: str = None,
+    compare: bool = False,
+    force: bool = False
 ):
     """Index a database schema"""
     logger.info(f"Starting schema indexing for: {database_name}")
     
     try:
+        if compare:
+            compare_extraction(connection_string, database_name)
+        
         request = SchemaIndexRequest(
             connection_string=connection_string,
             database_name=database_name,
-            description=description
+            description=description,
+            force=force
         )
         
-        response = await schema_service.index_schema(request)
+        job = indexing_job_service.submit(request)
+        print(f"\n🧵 Indexing job {job.job_id} queued")
+        
+        await indexing_job_service.wait(job.job_id)
+        
+        for phase, progress in job.progress.items():
+            print(f"   {phase:<8} {progress['done']}/{progress['total']}")
         
-        print("\n✅ Schema indexed successfully!")
+        if job.status != "succeeded":
+            raise RuntimeError(job.error or f"Job {job.status}")
+        
+        response = job.result
+        
+        if response.status == "unchanged":
+            print("\n✅ Schema unchanged since last index; nothing to do")
+        else:
+            print("\n✅ Schema indexed successfully!")
         print(f"📊 Database: {response.database_name}")
         print(f"📋 Tables indexed: {response.tables_indexed}")
         print(f"📝 Columns indexed: {response.columns_indexed}")
+        print(
+            f"🔄 Added: {response.tables_added}, changed: {response.tables_changed}, "
+            f"removed: {response.tables_removed}, unchanged: {response.tables_unchanged}"
+        )
         print(f"⏰ Indexed at: {response.indexed_at}")
         
     except Exception as e:
@@ -70,13 +112,27 @@ def main():
         help="Optional description of the database"
     )
     
+    parser.add_argument(
+        "--compare-extraction",
+        action="store_true",
+        help="Time bulk vs per-table schema reflection before indexing"
+    )
+    
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-index even if the schema fingerprint is unchanged"
+    )
+    
     args = parser.parse_args()
     
     # Run async function
     asyncio.run(index_database(
         connection_string=args.connection_string,
         database_name=args.database_name,
-        description=args.description
+        description=args.description,
+        compare=args.compare_extraction,
+        force=args.force
     ))
 
 
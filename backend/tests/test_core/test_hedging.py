@@ -0,0 +1,93 @@
+from app.core.llm.hedging import HedgingPolicy
+from app.utils.metrics import metrics
+
+
+def make_policy(budget_percent=5, metric="test.hedging.latency_ms"):
+    policy = HedgingPolicy()
+    policy.budget = budget_percent / 100
+    policy.max_tokens = max(1.0, policy.budget * 100)
+    policy._tokens = 0.0
+    policy.min_delay_ms = 100
+    policy.min_samples = 10
+    policy.delay_percentile = 95
+    policy.LATENCY_METRIC = metric
+    policy.delay_refresh_seconds = 0
+    return policy
+
+
+def test_budget_allows_one_hedge_per_twenty_requests():
+    policy = make_policy(budget_percent=5)
+
+    granted = 0
+    for _ in range(100):
+        policy.on_request()
+        granted += policy.try_acquire()
+
+    assert granted == 5
+
+
+def test_budget_is_not_spent_when_no_hedge_fires():
+    policy = make_policy(budget_percent=5)
+    for _ in range(19):
+        policy.on_request()
+    assert policy.try_acquire() is False
+
+    policy.on_request()
+    assert policy.try_acquire() is True
+    assert policy.try_acquire() is False
+
+
+def test_idle_budget_is_capped():
+    policy = make_policy(budget_percent=10)
+    for _ in range(1000):
+        policy.on_request()
+
+    assert policy._tokens == policy.max_tokens
+    granted = sum(policy.try_acquire() for _ in range(100))
+    assert granted == int(policy.max_tokens)
+
+
+def test_delay_uses_floor_until_enough_samples():
+    policy = make_policy(metric="test.hedging.delay_ms")
+    for _ in range(9):
+        policy.record_latency(5000, "sql", "model-a")
+    assert policy.delay_seconds("sql", "model-a") == 0.1
+
+    policy.record_latency(5000, "sql", "model-a")
+    assert policy.delay_seconds("sql", "model-a") == 5.0
+
+
+def test_delay_is_tracked_per_purpose_and_model():
+    policy = make_policy(metric="test.hedging.split_ms")
+    for _ in range(10):
+        policy.record_latency(200, "sql", "model-a")
+        policy.record_latency(9000, "explanation", "model-a")
+        policy.record_latency(3000, "sql", "model-b")
+
+    assert policy.delay_seconds("sql", "model-a") == 0.2
+    assert policy.delay_seconds("explanation", "model-a") == 9.0
+    assert policy.delay_seconds("sql", "model-b") == 3.0
+
+
+def test_delay_is_cached_between_refreshes():
+    policy = make_policy(metric="test.hedging.cached_ms")
+    policy.delay_refresh_seconds = 60
+    for _ in range(10):
+        policy.record_latency(500, "sql", "model-a")
+    assert policy.delay_seconds("sql", "model-a") == 0.5
+
+    for _ in range(100):
+        policy.record_latency(8000, "sql", "model-a")
+    assert policy.delay_seconds("sql", "model-a") == 0.5
+
+    policy.delay_refresh_seconds = 0
+    assert policy.delay_seconds("sql", "model-a") == 8.0
+
+
+def test_delay_never_drops_below_floor():
+    policy = make_policy(metric="test.hedging.fast_ms")
+    for _ in range(20):
+        policy.record_latency(10, "sql", "model-a")
+
+    assert metrics.get_count("test.hedging.fast_ms.sql.model-a") == 20
+    assert policy.delay_seconds("sql", "model-a") == 0.1
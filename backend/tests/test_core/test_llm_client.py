@@ -0,0 +1,141 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from anthropic import InternalServerError
+
+from app.core.llm.client import LLMClient
+from app.utils.exceptions import LLMException
+
+
+REQUEST = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+MESSAGES = [{"role": "user", "content": "How many orders?"}]
+
+
+class FakeMessages:
+    """messages.create that answers after a per-model delay, or fails"""
+
+    def __init__(self, delays, failing=()):
+        self.delays = delays
+        self.failing = set(failing)
+        self.calls = []
+        self.cancelled = []
+
+    async def create(self, **kwargs):
+        model = kwargs["model"]
+        self.calls.append(model)
+        try:
+            await asyncio.sleep(self.delays.get(model, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        if model in self.failing:
+            raise InternalServerError(
+                "overloaded", response=httpx.Response(529, request=REQUEST), body=None
+            )
+        return SimpleNamespace(content=[SimpleNamespace(text=model)], usage=None)
+
+
+def make_client(delays, failing=(), models=("primary", "secondary", "tertiary")):
+    client = LLMClient()
+    messages = FakeMessages(delays, failing)
+    client.client = SimpleNamespace(messages=messages)
+
+    client.models.auto_discover_models = False
+    client.models.configured = list(models)
+    client.models._ordered = list(models)
+
+    client.hedging.enabled = True
+    client.hedging.min_delay_ms = 20
+    client.hedging.min_samples = 10 ** 6
+    client.hedging.budget = 1.0
+    client.hedging.max_tokens = 1.0
+    return client, messages
+
+
+def test_hedge_wins_when_primary_is_slow_and_primary_is_cancelled():
+    client, messages = make_client({"primary": 1.0, "secondary": 0.01})
+
+    async def run():
+        result = await client.generate_completion(MESSAGES)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == "secondary"
+    assert messages.calls == ["primary", "secondary"]
+    assert messages.cancelled == ["primary"]
+
+
+def test_primary_wins_after_hedge_fired_and_hedge_is_cancelled():
+    client, messages = make_client({"primary": 0.04, "secondary": 1.0})
+
+    async def run():
+        result = await client.generate_completion(MESSAGES)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == "primary"
+    assert messages.calls == ["primary", "secondary"]
+    assert messages.cancelled == ["secondary"]
+
+
+def test_fast_primary_is_not_hedged():
+    client, messages = make_client({"primary": 0.0})
+
+    assert asyncio.run(client.generate_completion(MESSAGES)) == "primary"
+    assert messages.calls == ["primary"]
+
+
+def test_hedge_answers_when_primary_raises():
+    client, messages = make_client({"primary": 0.04, "secondary": 0.08}, failing={"primary"})
+
+    assert asyncio.run(client.generate_completion(MESSAGES)) == "secondary"
+    assert client.models._health["primary"]["failures"] == 1
+
+
+def test_falls_back_to_next_model_when_primary_raises_before_hedging():
+    client, messages = make_client({"primary": 0.0}, failing={"primary"})
+
+    assert asyncio.run(client.generate_completion(MESSAGES)) == "secondary"
+    assert messages.calls == ["primary", "secondary"]
+
+
+def test_falls_back_past_both_when_primary_and_hedge_raise():
+    client, messages = make_client(
+        {"primary": 0.04, "secondary": 0.05, "tertiary": 0.0},
+        failing={"primary", "secondary"},
+    )
+    client.hedging.max_tokens = 2.0
+    client.hedging._tokens = 1.0
+
+    assert asyncio.run(client.generate_completion(MESSAGES)) == "tertiary"
+    # The hedge already failed on secondary, so it is not tried again
+    assert messages.calls == ["primary", "secondary", "tertiary"]
+
+
+def test_exhausted_budget_skips_the_hedge():
+    client, messages = make_client({"primary": 0.05, "secondary": 0.0})
+    client.hedging.budget = 0.0
+
+    assert asyncio.run(client.generate_completion(MESSAGES)) == "primary"
+    assert messages.calls == ["primary"]
+
+
+def test_hedge_false_never_hedges():
+    client, messages = make_client({"primary": 0.05, "secondary": 0.0})
+
+    assert asyncio.run(client.generate_completion(MESSAGES, hedge=False)) == "primary"
+    assert messages.calls == ["primary"]
+
+
+def test_non_model_errors_are_raised():
+    client, messages = make_client({"primary": 0.0})
+
+    async def create(**kwargs):
+        raise ValueError("bad request body")
+
+    messages.create = create
+
+    with pytest.raises(LLMException):
+        asyncio.run(client.generate_completion(MESSAGES))
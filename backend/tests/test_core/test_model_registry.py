@@ -0,0 +1,125 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from anthropic import BadRequestError, InternalServerError, NotFoundError
+
+from app.core.llm import model_registry
+from app.core.llm.model_registry import ModelHealthRegistry
+
+
+REQUEST = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+
+
+def api_error(error_class, status_code, message="error"):
+    return error_class(message, response=httpx.Response(status_code, request=REQUEST), body=None)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+def make_registry(monkeypatch, models=("primary", "fallback"), list_models=None):
+    clock = FakeClock()
+    monkeypatch.setattr(model_registry, "time", SimpleNamespace(monotonic=clock.monotonic))
+
+    async def no_models():
+        return []
+
+    registry = ModelHealthRegistry(list_models or no_models)
+    registry.configured = list(models)
+    registry._ordered = list(models)
+    registry.auto_discover_models = list_models is not None
+    registry.failure_threshold = 3
+    registry.cooldown_seconds = 30
+    registry.not_found_cooldown_seconds = 3600
+    return registry, clock
+
+
+def test_breaker_opens_after_threshold(monkeypatch):
+    registry, _ = make_registry(monkeypatch)
+    overloaded = api_error(InternalServerError, 529, "overloaded")
+
+    for _ in range(2):
+        assert registry.record_failure("primary", overloaded) is True
+    assert asyncio.run(registry.candidates()) == ["primary", "fallback"]
+
+    registry.record_failure("primary", overloaded)
+    assert asyncio.run(registry.candidates()) == ["fallback"]
+    assert registry.get_stats()["models"]["primary"]["state"] == "open"
+
+
+def test_breaker_half_opens_after_cooldown_and_reopens_on_failure(monkeypatch):
+    registry, clock = make_registry(monkeypatch)
+    overloaded = api_error(InternalServerError, 529, "overloaded")
+    for _ in range(3):
+        registry.record_failure("primary", overloaded)
+
+    clock.now += 31
+    assert asyncio.run(registry.candidates()) == ["primary", "fallback"]
+
+    # A single failure in the half-open state reopens the breaker
+    registry.record_failure("primary", overloaded)
+    assert asyncio.run(registry.candidates()) == ["fallback"]
+
+
+def test_breaker_closes_on_success(monkeypatch):
+    registry, clock = make_registry(monkeypatch)
+    overloaded = api_error(InternalServerError, 529, "overloaded")
+    for _ in range(3):
+        registry.record_failure("primary", overloaded)
+
+    clock.now += 31
+    registry.record_success("primary")
+    registry.record_failure("primary", overloaded)
+
+    assert asyncio.run(registry.candidates()) == ["primary", "fallback"]
+    assert registry.get_stats()["models"]["primary"]["failures"] == 1
+
+
+def test_not_found_opens_immediately(monkeypatch):
+    registry, clock = make_registry(monkeypatch)
+
+    assert registry.record_failure("primary", api_error(NotFoundError, 404, "not_found_error")) is True
+    clock.now += 31
+    assert asyncio.run(registry.candidates()) == ["fallback"]
+
+
+def test_request_errors_mentioning_a_model_are_not_model_failures(monkeypatch):
+    registry, _ = make_registry(monkeypatch)
+    error = api_error(BadRequestError, 400, "invalid_request_error: model: max_tokens too large")
+
+    assert registry.record_failure("primary", error) is False
+    assert asyncio.run(registry.candidates()) == ["primary", "fallback"]
+
+
+def test_preferred_model_is_skipped_when_not_discovered(monkeypatch):
+    async def list_models():
+        return ["primary", "fallback"]
+
+    registry, _ = make_registry(monkeypatch, list_models=list_models)
+
+    assert asyncio.run(registry.candidates(preferred="fallback")) == ["fallback", "primary"]
+    assert asyncio.run(registry.candidates(preferred="retired")) == ["primary", "fallback"]
+
+
+def test_concurrent_first_requests_list_models_once(monkeypatch):
+    calls = []
+
+    async def list_models():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["primary"]
+
+    registry, _ = make_registry(monkeypatch, list_models=list_models)
+
+    async def first_requests():
+        return await asyncio.gather(*(registry.candidates() for _ in range(5)))
+
+    results = asyncio.run(first_requests())
+    assert len(calls) == 1
+    assert all(result == ["primary"] for result in results)
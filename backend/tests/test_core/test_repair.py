@@ -0,0 +1,105 @@
+import pytest
+
+from app.core.database.catalog import schema_catalog
+from app.core.sql.repair import FuzzyIdentifierIndex, SQLRepairer, _edit_distance, sqlparse
+from app.core.sql.validator import sql_validator
+
+
+DATABASE = "test_repair_shop"
+
+
+def make_index(*names):
+    return FuzzyIdentifierIndex({name.lower(): name for name in names})
+
+
+def test_edit_distance():
+    assert _edit_distance("customer", "customer") == 0
+    assert _edit_distance("custmer", "customer") == 1
+    assert _edit_distance("", "abc") == 3
+
+
+def test_match_returns_closest_identifier():
+    index = make_index("customers", "orders", "order_items")
+
+    assert index.match("custmers", min_similarity=0.75, min_margin=0.1) == "customers"
+
+
+def test_match_rejects_names_below_similarity():
+    index = make_index("customers", "orders")
+
+    assert index.match("products", min_similarity=0.75, min_margin=0.1) is None
+
+
+def test_match_rejects_ambiguous_names():
+    # "orderx" is one edit from both candidates, so neither wins by the margin
+    index = make_index("orders", "ordera")
+
+    assert index.match("orderx", min_similarity=0.75, min_margin=0.1) is None
+
+
+def test_match_preserves_schema_casing():
+    index = make_index("CustomerId")
+
+    assert index.match("customerld", min_similarity=0.75, min_margin=0.1) == "CustomerId"
+
+
+@pytest.mark.skipif(sqlparse is None, reason="sqlparse is not installed")
+def test_repair_rewrites_misspelled_table_and_column():
+    schema_catalog.put(DATABASE, {"tables": [
+        {"name": "customers", "columns": [{"name": "id"}, {"name": "email"}]},
+        {"name": "orders", "columns": [{"name": "id"}, {"name": "customer_id"}]},
+    ]})
+    repairer = SQLRepairer()
+    repairer.enabled = True
+    sql = "SELECT c.emal FROM custmers c"
+
+    result = repairer.repair(sql, DATABASE, sql_validator.validate(sql, database_name=DATABASE))
+
+    assert result is not None
+    repaired, validation = result
+    assert repaired == "SELECT c.email FROM customers c"
+    assert validation["is_valid"]
+
+
+@pytest.mark.skipif(sqlparse is None, reason="sqlparse is not installed")
+def test_repair_gives_up_on_unknown_identifiers():
+    schema_catalog.put(DATABASE, {"tables": [
+        {"name": "customers", "columns": [{"name": "id"}, {"name": "email"}]},
+    ]})
+    repairer = SQLRepairer()
+    repairer.enabled = True
+    sql = "SELECT p.sku FROM products p"
+
+    assert repairer.repair(sql, DATABASE, sql_validator.validate(sql, database_name=DATABASE)) is None
+
+
+@pytest.mark.skipif(sqlparse is None, reason="sqlparse is not installed")
+def test_repair_leaves_columns_named_like_the_misspelled_table():
+    schema_catalog.put(DATABASE, {"tables": [
+        {"name": "region", "columns": [{"name": "id"}, {"name": "name"}]},
+        {"name": "sales", "columns": [{"name": "id"}, {"name": "regin"}, {"name": "amount"}]},
+    ]})
+    repairer = SQLRepairer()
+    repairer.enabled = True
+    sql = "SELECT s.amount, regin FROM regin r JOIN sales s ON s.id = r.id"
+
+    result = repairer.repair(sql, DATABASE, sql_validator.validate(sql, database_name=DATABASE))
+
+    assert result is not None
+    assert result[0] == "SELECT s.amount, regin FROM region r JOIN sales s ON s.id = r.id"
+
+
+@pytest.mark.skipif(sqlparse is None, reason="sqlparse is not installed")
+def test_repair_fixes_table_names_used_as_qualifiers():
+    schema_catalog.put(DATABASE, {"tables": [
+        {"name": "customers", "columns": [{"name": "id"}, {"name": "email"}]},
+        {"name": "orders", "columns": [{"name": "id"}, {"name": "customer_id"}]},
+    ]})
+    repairer = SQLRepairer()
+    repairer.enabled = True
+    sql = "SELECT custmers.email FROM orders o JOIN custmers ON o.customer_id = custmers.id"
+
+    result = repairer.repair(sql, DATABASE, sql_validator.validate(sql, database_name=DATABASE))
+
+    assert result is not None
+    assert result[0] == "SELECT customers.email FROM orders o JOIN customers ON o.customer_id = customers.id"
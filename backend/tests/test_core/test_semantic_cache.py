@@ -0,0 +1,56 @@
+from app.core.rag.semantic_cache import SemanticCache
+
+
+EMBEDDING = [0.6, 0.8, 0.0]
+NEARBY = [0.6, 0.79, 0.01]
+
+
+def make_cache():
+    cache = SemanticCache()
+    cache.enabled = True
+    cache.threshold = 0.92
+    return cache
+
+
+def test_similar_question_with_same_literals_hits():
+    cache = make_cache()
+    cache.add("shop", "orders in the last 30 days", "SELECT 30", EMBEDDING)
+
+    hit = cache.lookup("shop", "Orders from the last 30 days", NEARBY)
+
+    assert hit is not None
+    assert hit["sql"] == "SELECT 30"
+
+
+def test_different_numbers_miss():
+    cache = make_cache()
+    cache.add("shop", "orders in the last 30 days", "SELECT 30", EMBEDDING)
+
+    assert cache.lookup("shop", "orders in the last 60 days", NEARBY) is None
+    assert cache.lookup("shop", "orders in the last days", NEARBY) is None
+
+
+def test_different_quoted_values_miss():
+    cache = make_cache()
+    cache.add("shop", "customers in 'Berlin'", "SELECT 'Berlin'", EMBEDDING)
+
+    assert cache.lookup("shop", "customers in 'Paris'", NEARBY) is None
+
+
+def test_falls_through_to_next_best_entry_with_matching_literals():
+    cache = make_cache()
+    cache.add("shop", "revenue in 2023", "SELECT 2023", EMBEDDING)
+    cache.add("shop", "revenue in 2024", "SELECT 2024", NEARBY)
+
+    hit = cache.lookup("shop", "revenue in 2023", NEARBY)
+
+    assert hit is not None
+    assert hit["sql"] == "SELECT 2023"
+
+
+def test_disabled_cache_never_hits():
+    cache = make_cache()
+    cache.add("shop", "orders in the last 30 days", "SELECT 30", EMBEDDING)
+    cache.enabled = False
+
+    assert cache.lookup("shop", "orders in the last 30 days", EMBEDDING) is None
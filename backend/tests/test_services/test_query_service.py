@@ -0,0 +1,121 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.query_service import QueryService
+
+
+def make_service(delays, results, n_best=3):
+    """QueryService whose candidates finish after delays[temperature] seconds"""
+    service = QueryService()
+    service.n_best = n_best
+    service.candidate_temperatures = list(delays)
+    service.candidate_stagger_seconds = 0
+    started, cancelled = [], []
+
+    async def generate_sql(context, temperature=None, validation_feedback=None, hedge=True):
+        assert hedge is False
+        started.append(temperature)
+        try:
+            await asyncio.sleep(delays[temperature])
+        except asyncio.CancelledError:
+            cancelled.append(temperature)
+            raise
+        outcome = results[temperature]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return {"sql_query": outcome, "semantic_cache_hit": None}
+
+    service.generator = SimpleNamespace(generate_sql=generate_sql)
+
+    async def check_candidate(sql, database_name):
+        valid = sql.startswith("good")
+        return sql, {"is_valid": valid, "errors": [] if valid else ["bad"]}
+
+    service._check_candidate = check_candidate
+    return service, started, cancelled
+
+
+REQUEST = SimpleNamespace(database_name="db")
+
+
+def test_first_valid_candidate_cancels_the_rest():
+    service, started, cancelled = make_service(
+        delays={0.0: 0.05, 0.4: 0.01, 0.8: 0.05},
+        results={0.0: "good slow", 0.4: "good fast", 0.8: "good slow"},
+    )
+
+    async def run():
+        result = await service._first_valid_candidate(SimpleNamespace(), REQUEST)
+        await asyncio.sleep(0)
+        return result
+
+    sql, validation = asyncio.run(run())
+
+    assert sql == "good fast"
+    assert validation["is_valid"]
+    assert sorted(started) == [0.0, 0.4, 0.8]
+    assert sorted(cancelled) == [0.0, 0.8]
+
+
+def test_invalid_candidates_wait_for_a_valid_one():
+    service, _, cancelled = make_service(
+        delays={0.0: 0.01, 0.4: 0.03, 0.8: 0.06},
+        results={0.0: "bad", 0.4: "good", 0.8: "good later"},
+    )
+
+    async def run():
+        result = await service._first_valid_candidate(SimpleNamespace(), REQUEST)
+        await asyncio.sleep(0)
+        return result
+
+    sql, _ = asyncio.run(run())
+
+    assert sql == "good"
+    assert cancelled == [0.8]
+
+
+def test_all_invalid_returns_last_invalid_candidate():
+    service, _, cancelled = make_service(
+        delays={0.0: 0.01, 0.4: 0.02, 0.8: 0.03},
+        results={0.0: "bad one", 0.4: "bad two", 0.8: RuntimeError("overloaded")},
+    )
+
+    sql, validation = asyncio.run(service._first_valid_candidate(SimpleNamespace(), REQUEST))
+
+    assert sql == "bad two"
+    assert not validation["is_valid"]
+    assert cancelled == []
+
+
+def test_all_failed_raises_the_generation_error():
+    error = RuntimeError("overloaded")
+    service, _, _ = make_service(
+        delays={0.0: 0.01, 0.4: 0.01},
+        results={0.0: error, 0.4: error},
+        n_best=2,
+    )
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service._first_valid_candidate(SimpleNamespace(), REQUEST))
+
+
+def test_stagger_starts_the_first_candidate_alone():
+    service, started, _ = make_service(
+        delays={0.0: 0.05, 0.4: 0.01, 0.8: 0.03},
+        results={0.0: "bad", 0.4: "good", 0.8: "good too"},
+    )
+    service.candidate_stagger_seconds = 0.02
+    seen_at_stagger = []
+
+    async def run():
+        task = asyncio.ensure_future(service._first_valid_candidate(SimpleNamespace(), REQUEST))
+        await asyncio.sleep(0.01)
+        seen_at_stagger.extend(started)
+        return await task
+
+    sql, _ = asyncio.run(run())
+
+    assert seen_at_stagger == [0.0]
+    assert sql == "good"
@@ -76,18 +76,26 @@ export interface TextToSQLRequest {
   query: string;
   database_name: string;
   include_explanation?: boolean;
+  explanation_mode?: 'inline' | 'parallel' | 'deferred';
   execute_query?: boolean;
 }
 
 export interface TextToSQLResponse {
   sql: string;
   explanation?: string;
+  explanation_id?: string;
   confidence: number;
   database_name: string;
   tables_used?: string[];
   execution_result?: any;
 }
 
+export interface ExplanationResponse {
+  explanation_id: string;
+  sql_query: string;
+  explanation: string;
+}
+
 export interface SchemaIndexRequest {
   database_name: string;
   connection_string: string;
@@ -101,6 +109,18 @@ export interface SchemaIndexResponse {
   tables_indexed: number;
 }
 
+export interface SchemaJobResponse {
+  job_id: string;
+  database_name: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed' | 'cancelled';
+  phase: string | null;
+  progress: Record<string, { done: number; total: number }>;
+  result: SchemaIndexResponse | null;
+  error: string | null;
+}
+
+const JOB_POLL_INTERVAL_MS = 1000;
+
 export interface DatabaseSchema {
   database_name: string;
   tables: Array<{
@@ -143,6 +163,7 @@ export const api = {
       query: request.query,
       database_name: request.database_name,
       include_explanation: request.include_explanation ?? true,
+      explanation_mode: request.explanation_mode,
       execute_query: request.execute_query ?? false,
     };
 
@@ -164,6 +185,7 @@ export const api = {
       const mapped: TextToSQLResponse = {
         sql: data.sql_query,
         explanation: data.explanation,
+        explanation_id: data.explanation_id,
         confidence: data.confidence,
         database_name: request.database_name,
         tables_used: data.tables_used,
@@ -175,6 +197,23 @@ export const api = {
     }
   },
 
+  // Fetch an explanation deferred by textToSQL
+  async getExplanation(explanationId: string): Promise<ExplanationResponse> {
+    try {
+      const response = await fetch(
+        `${API_BASE_URL}/api/v1/query/text-to-sql/${explanationId}/explanation`,
+      );
+
+      if (!response.ok) {
+        throw new Error(await readErrorMessage(response, 'Failed to fetch explanation'));
+      }
+
+      return response.json();
+    } catch (error) {
+      throw getFriendlyNetworkError(error);
+    }
+  },
+
   // Index Database Schema
   async indexSchema(request: SchemaIndexRequest): Promise<SchemaIndexResponse> {
     try {
@@ -190,6 +229,32 @@ export const api = {
         throw new Error(await readErrorMessage(response, 'Failed to index schema'));
       }
 
+      // Indexing runs as a background job; poll until it finishes
+      let job: SchemaJobResponse = await response.json();
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        job = await api.getIndexingJob(job.job_id);
+      }
+
+      if (job.status !== 'succeeded' || !job.result) {
+        throw new Error(job.error || `Schema indexing ${job.status}`);
+      }
+
+      return job.result;
+    } catch (error) {
+      throw getFriendlyNetworkError(error);
+    }
+  },
+
+  // Get Schema Indexing Job
+  async getIndexingJob(jobId: string): Promise<SchemaJobResponse> {
+    try {
+      const response = await fetch(`${API_BASE_URL}/api/v1/schema/jobs/${jobId}`);
+
+      if (!response.ok) {
+        throw new Error(await readErrorMessage(response, 'Failed to fetch indexing job'));
+      }
+
       return response.json();
     } catch (error) {
       throw getFriendlyNetworkError(error);